@@ -6,16 +6,25 @@ Generates comparative plots showing:
 2. Compute vs Communication time breakdown
 3. Speedup analysis
 4. Communication overhead comparison
+5. Per-rank phase times (load imbalance heat map)
+6. Roofline (GFLOP/s vs arithmetic intensity)
+7. Alpha-beta-gamma model predictions against measurements
 
 Usage:
     python plot_results.py
 """
 
+import math
 import os
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'src'))
+from perf_model import compute_config, fit_model, measured_phases, predict
+
 
 def load_results():
     """Load results from CSV files."""
@@ -38,12 +47,29 @@ def load_results():
     if 'method' not in block_df.columns:
         block_df['method'] = 'Block'
     
+    frames = [row_df, block_df]
+    
+    # Cannon results are optional (only square process counts)
+    cannon_file = os.path.join(results_dir, 'cannon_results.csv')
+    if os.path.exists(cannon_file):
+        cannon_df = pd.read_csv(cannon_file)
+        if 'method' not in cannon_df.columns:
+            cannon_df['method'] = 'Cannon'
+        frames.append(cannon_df)
+    
     # Combine dataframes
-    df = pd.concat([row_df, block_df], ignore_index=True)
+    df = pd.concat(frames, ignore_index=True)
     
     return df
 
 
+def method_label(method):
+    """Return the legend label for a method name."""
+    if method == 'Cannon':
+        return "Cannon's Algorithm"
+    return f'{method} Striping'
+
+
 def plot_total_time_comparison(df, output_dir='results'):
     """Plot total execution time comparison."""
     fig, ax = plt.subplots(figsize=(10, 6))
@@ -51,11 +77,11 @@ def plot_total_time_comparison(df, output_dir='results'):
     for method in df['method'].unique():
         method_df = df[df['method'] == method].sort_values('n_processes')
         ax.plot(method_df['n_processes'], method_df['total_time'], 
-                marker='o', linewidth=2, markersize=8, label=f'{method} Striping')
+                marker='o', linewidth=2, markersize=8, label=method_label(method))
     
     ax.set_xlabel('Number of MPI Processes', fontsize=12, fontweight='bold')
     ax.set_ylabel('Total Execution Time (seconds)', fontsize=12, fontweight='bold')
-    ax.set_title('Total Execution Time: Row vs Block Striping', 
+    ax.set_title('Total Execution Time by Method', 
                  fontsize=14, fontweight='bold')
     ax.legend(fontsize=11)
     ax.grid(True, alpha=0.3)
@@ -69,9 +95,10 @@ def plot_total_time_comparison(df, output_dir='results'):
 
 def plot_compute_vs_communication(df, output_dir='results'):
     """Plot compute time vs communication time breakdown."""
-    fig, axes = plt.subplots(1, 2, figsize=(16, 6))
-    
     methods = df['method'].unique()
+    fig, axes = plt.subplots(1, len(methods), figsize=(8 * len(methods), 6),
+                             squeeze=False)
+    axes = axes[0]
     
     for idx, method in enumerate(methods):
         method_df = df[df['method'] == method].sort_values('n_processes')
@@ -86,7 +113,7 @@ def plot_compute_vs_communication(df, output_dir='results'):
         
         axes[idx].set_xlabel('Number of MPI Processes', fontsize=11, fontweight='bold')
         axes[idx].set_ylabel('Time (seconds)', fontsize=11, fontweight='bold')
-        axes[idx].set_title(f'{method} Striping: Compute vs Communication', 
+        axes[idx].set_title(f'{method_label(method)}: Compute vs Communication', 
                            fontsize=12, fontweight='bold')
         axes[idx].set_xticks(x)
         axes[idx].set_xticklabels(method_df['n_processes'].values)
@@ -101,9 +128,10 @@ def plot_compute_vs_communication(df, output_dir='results'):
 
 def plot_communication_breakdown(df, output_dir='results'):
     """Plot detailed communication time breakdown."""
-    fig, axes = plt.subplots(1, 2, figsize=(16, 6))
-    
     methods = df['method'].unique()
+    fig, axes = plt.subplots(1, len(methods), figsize=(8 * len(methods), 6),
+                             squeeze=False)
+    axes = axes[0]
     
     for idx, method in enumerate(methods):
         method_df = df[df['method'] == method].sort_values('n_processes')
@@ -120,7 +148,7 @@ def plot_communication_breakdown(df, output_dir='results'):
         
         axes[idx].set_xlabel('Number of MPI Processes', fontsize=11, fontweight='bold')
         axes[idx].set_ylabel('Time (seconds)', fontsize=11, fontweight='bold')
-        axes[idx].set_title(f'{method} Striping: Communication Breakdown', 
+        axes[idx].set_title(f'{method_label(method)}: Communication Breakdown', 
                            fontsize=12, fontweight='bold')
         axes[idx].set_xticks(x)
         axes[idx].set_xticklabels(method_df['n_processes'].values)
@@ -145,7 +173,7 @@ def plot_speedup(df, output_dir='results'):
         speedup = baseline_time / method_df['total_time']
         
         ax.plot(method_df['n_processes'], speedup, 
-                marker='o', linewidth=2, markersize=8, label=f'{method} Striping')
+                marker='o', linewidth=2, markersize=8, label=method_label(method))
     
     # Plot ideal speedup
     processes = df['n_processes'].unique()
@@ -156,7 +184,7 @@ def plot_speedup(df, output_dir='results'):
     
     ax.set_xlabel('Number of MPI Processes', fontsize=12, fontweight='bold')
     ax.set_ylabel('Speedup', fontsize=12, fontweight='bold')
-    ax.set_title('Speedup Analysis: Row vs Block Striping', 
+    ax.set_title('Speedup Analysis by Method', 
                  fontsize=14, fontweight='bold')
     ax.legend(fontsize=11)
     ax.grid(True, alpha=0.3)
@@ -182,7 +210,7 @@ def plot_efficiency(df, output_dir='results'):
         efficiency = (speedup * baseline_p / method_df['n_processes']) * 100
         
         ax.plot(method_df['n_processes'], efficiency, 
-                marker='o', linewidth=2, markersize=8, label=f'{method} Striping')
+                marker='o', linewidth=2, markersize=8, label=method_label(method))
     
     # Add 100% efficiency line
     ax.axhline(y=100, color='k', linestyle='--', linewidth=2, 
@@ -190,7 +218,7 @@ def plot_efficiency(df, output_dir='results'):
     
     ax.set_xlabel('Number of MPI Processes', fontsize=12, fontweight='bold')
     ax.set_ylabel('Parallel Efficiency (%)', fontsize=12, fontweight='bold')
-    ax.set_title('Parallel Efficiency: Row vs Block Striping', 
+    ax.set_title('Parallel Efficiency by Method', 
                  fontsize=14, fontweight='bold')
     ax.legend(fontsize=11)
     ax.grid(True, alpha=0.3)
@@ -213,12 +241,17 @@ def plot_time_percentage(df, output_dir='results'):
     width = 0.35
     
     for idx, method in enumerate(methods):
-        method_df = df[df['method'] == method].sort_values('n_processes')
+        # One row per P (the latest run), aligned on the shared P axis;
+        # P a method has no run for (e.g. non-square P for Cannon) is a gap
+        method_df = (df[df['method'] == method]
+                     .drop_duplicates('n_processes', keep='last')
+                     .set_index('n_processes')
+                     .reindex(processes))
         
         compute_pct = (method_df['compute_time'] / method_df['total_time']) * 100
         comm_pct = (method_df['communication_time'] / method_df['total_time']) * 100
         
-        offset = width * (idx - 0.5)
+        offset = width * (idx - (len(methods) - 1) / 2)
         ax.bar(x + offset, compute_pct, width * 0.45, 
                label=f'{method} Compute %', alpha=0.8)
         ax.bar(x + offset, comm_pct, width * 0.45, 
@@ -240,6 +273,192 @@ def plot_time_percentage(df, output_dir='results'):
     plt.close()
 
 
+def plot_roofline(df, output_dir='results'):
+    """Plot achieved GFLOP/s against arithmetic intensity (roofline)."""
+    columns = ['gflops', 'arithmetic_intensity', 'comm_bandwidth']
+    if not set(columns) <= set(df.columns):
+        return False
+    roof_df = df.dropna(subset=columns)
+    if roof_df.empty:
+        return False
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for method in roof_df['method'].unique():
+        method_df = roof_df[roof_df['method'] == method]
+        ax.scatter(method_df['arithmetic_intensity'], method_df['gflops'],
+                   s=60, label=method_label(method))
+        for _, row in method_df.iterrows():
+            ax.annotate(f"P={row['n_processes']}",
+                        (row['arithmetic_intensity'], row['gflops']),
+                        textcoords='offset points', xytext=(5, 5), fontsize=8)
+
+    # Ceilings: compute peak and best observed communication bandwidth
+    intensity = np.logspace(np.log10(roof_df['arithmetic_intensity'].min() / 4),
+                            np.log10(roof_df['arithmetic_intensity'].max() * 4),
+                            100)
+    bandwidth = roof_df['comm_bandwidth'].max()
+    roof = intensity * bandwidth
+    label = f'Network roof ({bandwidth:.2f} GB/s best observed)'
+    if 'peak_gflops' in roof_df.columns and roof_df['peak_gflops'].notna().any():
+        peak = roof_df['peak_gflops'].max()
+        roof = np.minimum(roof, peak)
+        ax.axhline(peak, color='gray', linestyle=':', linewidth=1,
+                   label=f'Compute peak ({peak:.1f} GFLOP/s)')
+    ax.plot(intensity, roof, 'k--', linewidth=2, label=label)
+
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_xlabel('Arithmetic Intensity (FLOP / communicated byte)',
+                  fontsize=12, fontweight='bold')
+    ax.set_ylabel('Achieved GFLOP/s (compute phase)', fontsize=12,
+                  fontweight='bold')
+    ax.set_title('Roofline: Compute-bound vs Network-bound',
+                 fontsize=14, fontweight='bold')
+    ax.legend(fontsize=10)
+    ax.grid(True, which='both', alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig(os.path.join(output_dir, 'roofline.png'), dpi=300)
+    print(f"✓ Saved: {os.path.join(output_dir, 'roofline.png')}")
+    plt.close()
+    return True
+
+
+def plot_model_validation(df, output_dir='results'):
+    """
+    Overlay alpha-beta-gamma predictions on the measured phase times.
+
+    The model covers scatter, broadcast, compute and gather only, so the
+    points are the sum of those measured phases (generation and pool
+    start-up excluded). gamma differs per local backend and worker count,
+    so every (method, backend, n_workers) configuration gets its own
+    line, compared only with its own runs.
+    """
+    try:
+        model = fit_model(df.to_dict('records'))
+    except ValueError:
+        return None
+
+    df = df.copy()
+    records = df.to_dict('records')
+    df['modelled_time'] = [measured_phases(run) for run in records]
+    df['config'] = [compute_config(run) for run in records]
+    df = df[df['modelled_time'].notna()]
+
+    N_ref = int(df['matrix_size'].max())
+    P_ref = int(df['n_processes'].max())
+    P_grid = [2 ** k for k in range(int(math.log2(P_ref)) + 3)]
+    N_grid = sorted(set(np.geomspace(max(64, df['matrix_size'].min() // 2),
+                                     4 * N_ref, 12).astype(int)))
+
+    fig, (ax_p, ax_n) = plt.subplots(1, 2, figsize=(16, 6))
+    for config in sorted(model['gamma']):
+        name, backend, n_workers = config
+        config_df = df[[c == config for c in df['config']]]
+        if config_df.empty:
+            continue
+        method = config_df['method'].iloc[0]
+        label = f'{method_label(method)} ({backend} x{n_workers})'
+        panel = (int(config_df['panel_width'].dropna().iloc[-1])
+                 if 'panel_width' in config_df
+                 and config_df['panel_width'].notna().any() else 256)
+
+        # Time vs P at the largest N, extrapolated to 4x the largest P
+        counts = [P for P in P_grid
+                  if name != 'cannon' or math.isqrt(P) ** 2 == P]
+        predicted = [predict(model, name, N_ref, P, panel, backend,
+                             n_workers)['total'] for P in counts]
+        line, = ax_p.plot(counts, predicted, linestyle='--',
+                          label=f'{label} model')
+        measured = config_df[config_df['matrix_size'] == N_ref]
+        measured = measured.groupby('n_processes')['modelled_time'].median()
+        ax_p.plot(measured.index, measured.values, 'o', color=line.get_color(),
+                  markersize=8, label=f'{label} measured')
+
+        # Time vs N at the largest P, extrapolated to 4x the largest N
+        P_n = P_ref
+        if name == 'cannon':
+            P_n = math.isqrt(P_ref) ** 2
+        predicted = [predict(model, name, N, P_n, panel, backend,
+                             n_workers)['total'] for N in N_grid]
+        ax_n.plot(N_grid, predicted, linestyle='--', color=line.get_color(),
+                  label=f'{label} model, P={P_n}')
+        measured = config_df[config_df['n_processes'] == P_n]
+        measured = measured.groupby('matrix_size')['modelled_time'].median()
+        ax_n.plot(measured.index, measured.values, 'o', color=line.get_color(),
+                  markersize=8, label=f'{label} measured')
+
+    for ax, xlabel, title in (
+            (ax_p, 'Number of MPI Processes',
+             f'Modelled Phases vs P (N={N_ref})'),
+            (ax_n, 'Matrix Size N', 'Modelled Phases vs N')):
+        ax.set_xscale('log', base=2)
+        ax.set_yscale('log')
+        ax.set_xlabel(xlabel, fontsize=12, fontweight='bold')
+        ax.set_ylabel('Scatter + Bcast + Compute + Gather (seconds)',
+                      fontsize=12, fontweight='bold')
+        ax.set_title(title, fontsize=14, fontweight='bold')
+        ax.legend(fontsize=9)
+        ax.grid(True, which='both', alpha=0.3)
+
+    bandwidth = 1 / model['beta'] / 1e9 if model['beta'] > 0 else float('inf')
+    fig.suptitle(f"Alpha-Beta-Gamma Model: alpha={model['alpha']*1e6:.1f} us, "
+                 f"1/beta={bandwidth:.2f} GB/s", fontsize=13)
+    plt.tight_layout()
+    plt.savefig(os.path.join(output_dir, 'model_validation.png'), dpi=300)
+    print(f"✓ Saved: {os.path.join(output_dir, 'model_validation.png')}")
+    plt.close()
+    return model
+
+
+def load_rank_results(results_dir='results'):
+    """Load the latest run of every per-rank CSV file (None if there are none)."""
+    frames = []
+    for name in ('row', 'block', 'cannon'):
+        rank_file = os.path.join(results_dir, f'{name}_rank_results.csv')
+        if os.path.exists(rank_file):
+            rank_df = pd.read_csv(rank_file)
+            latest = rank_df['run_id'].max()
+            frames.append(rank_df[rank_df['run_id'] == latest])
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True)
+
+
+def plot_rank_heatmap(rank_df, output_dir='results'):
+    """Plot per-rank phase times relative to the phase mean (load imbalance)."""
+    phases = ['generation', 'scatter', 'broadcast', 'compute', 'gather', 'total']
+    methods = rank_df['method'].unique()
+    fig, axes = plt.subplots(1, len(methods), figsize=(7 * len(methods), 6),
+                             squeeze=False)
+
+    for ax, method in zip(axes[0], methods):
+        method_df = rank_df[rank_df['method'] == method].sort_values('rank')
+        times = method_df[[f'{phase}_time' for phase in phases]].to_numpy()
+        mean = times.mean(axis=0)
+        ratio = times / np.where(mean > 0, mean, 1.0)
+
+        image = ax.imshow(ratio, aspect='auto', cmap='coolwarm',
+                          vmin=0.0, vmax=max(2.0, ratio.max()))
+        ax.set_xticks(range(len(phases)))
+        ax.set_xticklabels([p.capitalize() for p in phases], rotation=30)
+        ax.set_yticks(range(len(method_df)))
+        ax.set_yticklabels([f"{r} ({h})" for r, h in
+                            zip(method_df['rank'], method_df['host'])])
+        ax.set_xlabel('Phase', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Rank (host)', fontsize=12, fontweight='bold')
+        first = method_df.iloc[0]
+        ax.set_title(f"{method_label(method)}\n"
+                     f"P={first['n_processes']}, N={first['matrix_size']}",
+                     fontsize=14, fontweight='bold')
+        fig.colorbar(image, ax=ax, label='Time / phase mean')
+
+    plt.tight_layout()
+    plt.savefig(os.path.join(output_dir, 'rank_heatmap.png'), dpi=300)
+    print(f"✓ Saved: {os.path.join(output_dir, 'rank_heatmap.png')}")
+    plt.close()
+
+
 def generate_summary_table(df, output_dir='results'):
     """Generate a summary table of results."""
     summary_file = os.path.join(output_dir, 'summary_table.txt')
@@ -252,17 +471,18 @@ def generate_summary_table(df, output_dir='results'):
         for method in df['method'].unique():
             method_df = df[df['method'] == method].sort_values('n_processes')
             
-            f.write(f"\n{method.upper()} STRIPING\n")
+            f.write(f"\n{method_label(method).upper()}\n")
             f.write("-"*100 + "\n")
             f.write(f"{'Procs':<8} {'Workers':<10} {'Size':<10} {'Scatter':<12} {'Broadcast':<12} "
-                   f"{'Compute':<12} {'Gather':<12} {'Total':<12}\n")
+                   f"{'Compute':<12} {'Gather':<12} {'Total':<12} {'GFLOP/s':<10}\n")
             f.write("-"*100 + "\n")
             
             for _, row in method_df.iterrows():
                 f.write(f"{row['n_processes']:<8} {row['n_workers']:<10} "
                        f"{row['matrix_size']:<10} {row['scatter_time']:<12.6f} "
                        f"{row['broadcast_time']:<12.6f} {row['compute_time']:<12.6f} "
-                       f"{row['gather_time']:<12.6f} {row['total_time']:<12.6f}\n")
+                       f"{row['gather_time']:<12.6f} {row['total_time']:<12.6f} "
+                       f"{row.get('gflops', float('nan')):<10.2f}\n")
             
             f.write("\n")
     
@@ -293,6 +513,11 @@ def main():
         plot_speedup(df, output_dir)
         plot_efficiency(df, output_dir)
         plot_time_percentage(df, output_dir)
+        has_roofline = plot_roofline(df, output_dir)
+        model = plot_model_validation(df, output_dir)
+        rank_df = load_rank_results(output_dir)
+        if rank_df is not None:
+            plot_rank_heatmap(rank_df, output_dir)
         
         # Generate summary table
         print("\nGenerating summary table...")
@@ -310,6 +535,12 @@ def main():
         print("  5. efficiency_analysis.png")
         print("  6. time_percentage.png")
         print("  7. summary_table.txt")
+        if rank_df is not None:
+            print("  8. rank_heatmap.png")
+        if has_roofline:
+            print("  9. roofline.png")
+        if model is not None:
+            print("  10. model_validation.png")
         print("")
         
     except FileNotFoundError as e:
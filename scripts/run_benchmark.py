@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Automated benchmark runner for hybrid parallel matrix multiplication.
+
+Launches src/matrix_benchmark.py once per process count from config.ini
+[BENCHMARK] process_counts. Each launch runs all enabled methods with
+warm-up and repeated measurements in-process, so results carry median,
+min, stddev and 95% confidence intervals instead of single cold runs.
+
+Usage:
+    python3 scripts/run_benchmark.py
+    python3 scripts/run_benchmark.py --clean --process-counts 2,4
+    python scripts\\run_benchmark.py --launcher "mpiexec -n" --workers-auto
+"""
+
+import argparse
+import configparser
+import math
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HARNESS = os.path.join(PROJECT_ROOT, 'src', 'matrix_benchmark.py')
+CSV_KEYS = ('row_results_file', 'block_results_file', 'cannon_results_file',
+            'sparse_results_file', 'dynamic_results_file')
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Run the benchmark harness for every process count'
+    )
+    parser.add_argument('--config', default=os.path.join(PROJECT_ROOT,
+                                                         'config.ini'),
+                        help='Configuration file (default: config.ini)')
+    parser.add_argument('--process-counts', default=None,
+                        help='Comma-separated process counts '
+                             '(default: process_counts)')
+    parser.add_argument('--launcher', default=None,
+                        help='MPI launcher, process count is appended '
+                             '(default: mpi_launcher)')
+    parser.add_argument('--workers-auto', action='store_true',
+                        help='Use local_workers for P <= 2 and 1 worker '
+                             'above (MS-MPI stability)')
+    parser.add_argument('--clean', action='store_true',
+                        help='Delete previous results first (also done when '
+                             'overwrite_results = true)')
+
+    args, harness_args = parser.parse_known_args()
+    config = configparser.ConfigParser()
+    config.read(args.config)
+    bench = config['BENCHMARK']
+    output = config['OUTPUT']
+
+    process_counts = [int(p) for p in
+                      (args.process_counts or bench['process_counts']).split(',')]
+    launcher = shlex.split(args.launcher or bench.get('mpi_launcher',
+                                                      'mpirun -np'))
+    workers = bench.getint('local_workers', 2)
+
+    if shutil.which(launcher[0]) is None:
+        print(f"Error: {launcher[0]} not found. Please install MPI.",
+              file=sys.stderr)
+        return 1
+
+    results_dir = os.path.join(PROJECT_ROOT, output.get('results_dir',
+                                                        'results'))
+    os.makedirs(results_dir, exist_ok=True)
+    if args.clean or output.getboolean('overwrite_results', False):
+        print("Clearing previous results...")
+        for key in CSV_KEYS:
+            path = os.path.join(results_dir, output.get(key, ''))
+            if os.path.isfile(path):
+                os.remove(path)
+
+    failed = []
+    for P in process_counts:
+        n_workers = workers if not args.workers_auto or P <= 2 else 1
+        methods = [m for m, flag in (('row', 'run_row_striping'),
+                                     ('block', 'run_block_striping'),
+                                     ('cannon', 'run_cannon'),
+                                     ('sparse', 'run_sparse'),
+                                     ('dynamic', 'run_dynamic'))
+                   if bench.getboolean(flag, m not in ('sparse', 'dynamic'))]
+        if math.isqrt(P) ** 2 != P and 'cannon' in methods:
+            methods.remove('cannon')
+        if not methods:
+            continue
+
+        print(f"\n{'=' * 44}\nTesting with {P} processes, {n_workers} workers"
+              f"\n{'=' * 44}")
+        cmd = launcher + [str(P), sys.executable, HARNESS,
+                          '--config', args.config,
+                          '--methods', ','.join(methods),
+                          '--workers', str(n_workers)] + harness_args
+        if subprocess.call(cmd, cwd=PROJECT_ROOT) != 0:
+            print(f"Benchmark failed with {P} processes", file=sys.stderr)
+            failed.append(P)
+
+    print(f"\n{'=' * 40}\nBenchmark completed!\n{'=' * 40}")
+    print(f"Results saved to {results_dir}")
+    print("To visualize results, run: python3 plot_results.py")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,415 @@
+"""
+Auto-tuner for the strategy and local compute settings.
+
+For a matrix size N on P processes, tune() picks the strategy (row,
+block or Cannon), the local backend and worker count, the SUMMA panel
+width and the work split of parallel_matmul_local (the minimum rows per
+worker below which workers are skipped, and the chunks per worker). The
+decision comes from short calibration multiplies and is stored in a JSON
+tuning database keyed by host fingerprint, P and the power-of-two range
+of N, so later runs on the same machines start tuned.
+
+Usage:
+    mpirun -np <P> python autotune.py --N 4096
+    mpirun -np <P> python autotune.py --N 4096 --retune --tune-only
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import sys
+import time
+import numpy as np
+from mpi4py import MPI
+
+# Import the strategies
+sys.path.insert(0, os.path.dirname(__file__))
+from utils import (
+    now, configure_local_compute, cores_per_rank, host_fingerprint,
+    ranks_per_node,
+    local_tuning, parallel_matmul_local, set_local_tuning
+)
+from matrix_row_striping import row_striping_matmul
+from matrix_block_striping import block_striping_matmul
+from matrix_cannon import cannon_matmul
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Default location of the tuning database
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, 'results', 'tuning_db.json')
+
+# Strategy -> function(N, n_workers, **options)
+STRATEGIES = {
+    'row': row_striping_matmul,
+    'block': block_striping_matmul,
+    'cannon': cannon_matmul,
+}
+
+# Candidate SUMMA panel widths
+PANEL_WIDTHS = (64, 128, 256)
+
+# Candidate chunks per worker of parallel_matmul_local
+CHUNKS_PER_WORKER = (1, 2, 4)
+
+# Largest matrix used for calibration multiplies
+CALIBRATION_SIZE = 512
+
+
+def tuning_key(fingerprint, P, N, strategies):
+    """Return the database key of a (machines, P, N range, strategies) point."""
+    n_range = 1 << max(0, N - 1).bit_length()
+    return f"{fingerprint}|P={P}|N<={n_range}|{','.join(sorted(strategies))}"
+
+
+def load_db(path):
+    """Return the tuning database at path (empty if it does not exist)."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_db(path, db):
+    """Write the tuning database to path."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(db, f, indent=2, sort_keys=True)
+
+
+def _best_time(func, repeats=3):
+    """Return the fastest of a few timed calls of func after one warm-up."""
+    func()
+    best = float('inf')
+    for _ in range(repeats):
+        t_start = now()
+        func()
+        best = min(best, now() - t_start)
+    return best
+
+
+def _slowest(comm, seconds):
+    """Return the time of the slowest rank, identical on every rank."""
+    return comm.allreduce(seconds, op=MPI.MAX)
+
+
+def _local_candidates(local_ranks):
+    """Return the (backend, n_workers) pairs worth trying on this node."""
+    cores = cores_per_rank(local_ranks)
+    candidates = [('blas', 1)]
+    workers = 2
+    while workers <= cores:
+        candidates += [('threads', workers), ('processes', workers)]
+        workers *= 2
+    return candidates
+
+
+def calibrate_local(comm, N):
+    """
+    Choose the local backend, worker count and work split (collective).
+
+    Every rank multiplies a block shaped like its share of the problem
+    with each candidate; the slowest rank decides. For the winner the
+    smallest number of rows per worker at which the workers beat a plain
+    np.dot is searched, which replaces the built-in threshold. The work
+    split in effect before the call is left unchanged.
+
+    Args:
+        comm: MPI communicator
+        N: Matrix dimension
+
+    Returns:
+        Dictionary with backend, n_workers, chunks_per_worker and
+        min_rows_per_worker
+    """
+    size = comm.Get_size()
+    local_ranks = ranks_per_node(comm)
+    n = min(N, CALIBRATION_SIZE)
+    rows = max(1, min(-(-N // size), 4 * n))
+    rng = np.random.default_rng(comm.Get_rank())
+    A = rng.random((rows, n))
+    B = rng.random((n, n))
+
+    # The split is changed while measuring and restored afterwards
+    with local_tuning(min_rows_per_worker=0):
+        # Backend and worker count, with workers always used
+        best = None
+        for backend, n_workers in _local_candidates(local_ranks):
+            configure_local_compute(backend, n_workers, local_ranks)
+            t = _slowest(comm, _best_time(
+                lambda: parallel_matmul_local(A, B, n_workers, backend)))
+            if best is None or t < best[0]:
+                best = (t, backend, n_workers)
+        _, backend, n_workers = best
+        configure_local_compute(backend, n_workers, local_ranks)
+
+        decision = {'backend': backend, 'n_workers': n_workers,
+                    'chunks_per_worker': 1, 'min_rows_per_worker': 10}
+        if n_workers == 1 or backend == 'blas':
+            return decision
+
+        # Work split: chunks per worker
+        best = None
+        for chunks in CHUNKS_PER_WORKER:
+            set_local_tuning(min_rows_per_worker=0, chunks_per_worker=chunks)
+            t = _slowest(comm, _best_time(
+                lambda: parallel_matmul_local(A, B, n_workers, backend)))
+            if best is None or t < best[0]:
+                best = (t, chunks)
+        decision['chunks_per_worker'] = best[1]
+
+        # Threshold: fewest rows per worker where the workers pay off
+        set_local_tuning(min_rows_per_worker=0,
+                         chunks_per_worker=decision['chunks_per_worker'])
+        threshold = 64
+        for per_worker in (1, 2, 4, 8, 16, 32, 64):
+            A_small = rng.random((n_workers * per_worker, n))
+            t_serial = _slowest(comm, _best_time(lambda: np.dot(A_small, B)))
+            t_workers = _slowest(comm, _best_time(
+                lambda: parallel_matmul_local(A_small, B, n_workers, backend)))
+            if t_workers < t_serial:
+                threshold = per_worker
+                break
+        decision['min_rows_per_worker'] = threshold
+        return decision
+
+
+def calibrate_strategy(comm, N, strategies, local):
+    """
+    Choose the strategy and SUMMA panel width (collective).
+
+    Each candidate runs a reduced multiply (at most CALIBRATION_SIZE²,
+    output suppressed, no CSV) twice; the faster total time counts. The
+    strategies reduce their timings over all ranks, so every rank takes
+    the same decision.
+
+    Args:
+        comm: MPI communicator
+        N: Matrix dimension
+        strategies: Candidate strategy names
+        local: Decision of calibrate_local
+
+    Returns:
+        Dictionary with strategy and panel_width
+    """
+    size = comm.Get_size()
+    n = min(N, CALIBRATION_SIZE)
+    candidates = []
+    for strategy in strategies:
+        if strategy == 'cannon' and math.isqrt(size) ** 2 != size:
+            continue
+        if strategy == 'block':
+            widths = sorted({min(w, n) for w in PANEL_WIDTHS})
+            candidates += [(strategy, {'panel_width': w}) for w in widths]
+        else:
+            candidates.append((strategy, {}))
+    if not candidates:
+        raise ValueError(f"No strategy of {sorted(strategies)} can run on "
+                         f"{size} processes")
+
+    best = None
+    for strategy, options in candidates:
+        func = STRATEGIES[strategy]
+        totals = []
+        for _ in range(2):
+            with contextlib.redirect_stdout(io.StringIO()):
+                run = func(n, local['n_workers'], backend=local['backend'],
+                           save_csv=False, **options)
+            totals.append(run['total_time'])
+        if best is None or min(totals) < best[0]:
+            best = (min(totals), strategy, options)
+    _, strategy, options = best
+    return {'strategy': strategy,
+            'panel_width': options.get('panel_width')}
+
+
+def tune(comm, N, strategies=None, db_path=None, retune=False):
+    """
+    Return the tuned settings for N on this communicator (collective).
+
+    The decision is looked up in the tuning database first; otherwise
+    (or with retune) it is calibrated and stored. The local work split
+    is not applied: run the strategy inside tuned_split(decision).
+
+    Args:
+        comm: MPI communicator
+        N: Matrix dimension
+        strategies: Candidate strategies (default: all)
+        db_path: Tuning database (default: results/tuning_db.json)
+        retune: Calibrate even if a decision is cached
+
+    Returns:
+        Decision dictionary: strategy, backend, n_workers, panel_width,
+        chunks_per_worker, min_rows_per_worker (plus bookkeeping fields)
+
+    Raises:
+        ValueError: if a strategy is unknown or none of them can run
+    """
+    strategies = tuple(strategies or STRATEGIES)
+    for strategy in strategies:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy!r}, expected one "
+                             f"of {', '.join(STRATEGIES)}")
+    db_path = db_path or DEFAULT_DB_PATH
+    rank = comm.Get_rank()
+    key = tuning_key(host_fingerprint(comm), comm.Get_size(), N, strategies)
+
+    decision = None
+    if rank == 0 and not retune:
+        decision = load_db(db_path).get(key)
+    decision = comm.bcast(decision, root=0)
+
+    if decision is None:
+        if rank == 0:
+            print(f"[Autotune] Calibrating {key}...")
+        t_start = now()
+        decision = calibrate_local(comm, N)
+        with tuned_split(decision):
+            decision.update(calibrate_strategy(comm, N, strategies,
+                                               decision))
+        decision['calibration_time'] = now() - t_start
+        decision['created'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        if rank == 0:
+            db = load_db(db_path)
+            db[key] = decision
+            save_db(db_path, db)
+    elif rank == 0:
+        print(f"[Autotune] Using cached decision for {key}")
+
+    if rank == 0:
+        print(f"[Autotune] {describe(decision)}")
+    return decision
+
+
+def tuned_split(decision):
+    """
+    Return a context manager applying the work split of a decision.
+
+    The split in effect before is restored on exit, so later runs in the
+    same process (service jobs, benchmark calls) keep their own.
+
+    Args:
+        decision: Decision dictionary from tune
+
+    Returns:
+        utils.local_tuning context manager
+    """
+    return local_tuning(decision['min_rows_per_worker'],
+                        decision['chunks_per_worker'])
+
+
+def describe(decision):
+    """Return a one-line summary of a tuning decision."""
+    text = (f"strategy={decision['strategy']}, "
+            f"backend={decision['backend']}, "
+            f"workers={decision['n_workers']}")
+    if decision.get('panel_width'):
+        text += f", panel={decision['panel_width']}"
+    return (text + f", chunks/worker={decision['chunks_per_worker']}, "
+            f"min rows/worker={decision['min_rows_per_worker']}")
+
+
+def strategy_options(decision):
+    """Return the keyword arguments of the chosen strategy's function."""
+    options = {'backend': decision['backend']}
+    if decision['strategy'] == 'block' and decision.get('panel_width'):
+        options['panel_width'] = decision['panel_width']
+    return options
+
+
+def tune_cli_args(args, strategy):
+    """
+    Replace the workers, backend and panel width of a strategy's parsed
+    command line with the tuned ones (collective, used by --auto).
+
+    The CLI runs a single multiply, so the tuned work split is applied
+    for the rest of the process.
+
+    Args:
+        args: argparse namespace of the strategy's CLI
+        strategy: Name of the strategy the CLI runs
+
+    Returns:
+        The decision
+    """
+    from mpi_io import read_npy_header
+
+    comm = MPI.COMM_WORLD
+    N = args.N
+    if getattr(args, 'A', None):
+        N = read_npy_header(comm, args.A)[0][0]
+    decision = tune(comm, N, (strategy,))
+    args.workers = decision['n_workers']
+    args.backend = decision['backend']
+    if strategy == 'block' and decision.get('panel_width'):
+        args.panel = decision['panel_width']
+    set_local_tuning(decision['min_rows_per_worker'],
+                     decision['chunks_per_worker'])
+    return decision
+
+
+def run_tuned(N, strategies=None, db_path=None, retune=False, **options):
+    """
+    Tune for N and run the chosen strategy once (collective).
+
+    Args:
+        N: Matrix dimension
+        strategies: Candidate strategies (default: all)
+        db_path: Tuning database (default: results/tuning_db.json)
+        retune: Calibrate even if a decision is cached
+        **options: Further arguments of the strategy function
+
+    Returns:
+        tuple of (decision, timing dictionary of the run)
+    """
+    decision = tune(MPI.COMM_WORLD, N, strategies, db_path, retune)
+    func = STRATEGIES[decision['strategy']]
+    options = dict(strategy_options(decision), **options)
+    with tuned_split(decision):
+        return decision, func(N, decision['n_workers'], **options)
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Pick strategy, workers, backend and panel size '
+                    'automatically and run the multiplication'
+    )
+    parser.add_argument('--N', type=int, default=1024,
+                        help='Matrix dimension (default: 1024)')
+    parser.add_argument('--strategies', default=None,
+                        help='Comma-separated candidate strategies '
+                             '(default: row,block,cannon)')
+    parser.add_argument('--db', default=None,
+                        help='Tuning database (default: '
+                             'results/tuning_db.json)')
+    parser.add_argument('--retune', action='store_true',
+                        help='Calibrate even if a decision is cached')
+    parser.add_argument('--tune-only', action='store_true',
+                        help='Only tune, do not run the multiplication')
+
+    args = parser.parse_args()
+    strategies = args.strategies.split(',') if args.strategies else None
+
+    try:
+        if args.tune_only:
+            tune(MPI.COMM_WORLD, args.N, strategies, args.db, args.retune)
+        else:
+            run_tuned(args.N, strategies, args.db, args.retune)
+    except ValueError as e:
+        # Raised identically on every rank
+        if MPI.COMM_WORLD.Get_rank() == 0:
+            print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        rank = MPI.COMM_WORLD.Get_rank()
+        print(f"[ERROR] Rank {rank}: {e}", file=sys.stderr)
+        MPI.COMM_WORLD.Abort(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Distributed result matrices.
+
+A DistributedMatrix keeps every rank's block of a result where it was
+computed and records which rank owns which rows and columns, so results
+can be inspected or consumed further without gathering N² elements on
+rank 0.
+"""
+
+import numpy as np
+from mpi4py import MPI
+
+
+class DistributedMatrix:
+    """
+    Handle to a matrix split into one rectangular block per rank.
+
+    Attributes:
+        comm: Communicator the matrix is distributed over
+        shape: Global (rows, cols)
+        local: This rank's block (a numpy array, not a copy)
+        block: This rank's (row_start, row_end, col_start, col_end)
+        layout: Blocks of all ranks, indexed by rank
+    """
+
+    def __init__(self, comm, shape, local, block):
+        """
+        Args:
+            comm: MPI communicator (collective: every rank must construct)
+            shape: Global matrix shape
+            local: Local block, shaped (row_end - row_start,
+                col_end - col_start)
+            block: (row_start, row_end, col_start, col_end) of the block
+        """
+        self.comm = comm
+        self.shape = tuple(shape)
+        self.local = local
+        self.block = tuple(block)
+        self.layout = comm.allgather(self.block)
+        self._gathered = None
+        self._gathered_root = None
+
+    @classmethod
+    def from_rows(cls, comm, local, row_start, n_cols):
+        """Wrap a row slab starting at global row row_start."""
+        n_rows = comm.allreduce(local.shape[0], op=MPI.SUM)
+        return cls(comm, (n_rows, n_cols), local,
+                   (row_start, row_start + local.shape[0], 0, n_cols))
+
+    def owner(self, i, j=0):
+        """Return the rank owning element (i, j)."""
+        for rank, (r0, r1, c0, c1) in enumerate(self.layout):
+            if r0 <= i < r1 and c0 <= j < c1:
+                return rank
+        raise IndexError(f"({i}, {j}) is outside a {self.shape} matrix")
+
+    def gather(self, root=0):
+        """
+        Assemble the full matrix on one rank (collective).
+
+        The result is cached, so repeated calls do not communicate again.
+
+        Args:
+            root: Rank receiving the matrix
+
+        Returns:
+            Full matrix on root, None on all other ranks
+        """
+        if self._gathered_root == root:
+            return self._gathered
+
+        counts = [(r1 - r0) * (c1 - c0) for r0, r1, c0, c1 in self.layout]
+        displs = [sum(counts[:r]) for r in range(len(counts))]
+        packed = None
+        if self.comm.Get_rank() == root:
+            packed = np.empty(sum(counts), dtype=np.float64)
+        self.comm.Gatherv(np.ascontiguousarray(self.local),
+                          [packed, counts, displs, MPI.DOUBLE], root=root)
+
+        full = None
+        if packed is not None:
+            full = np.empty(self.shape, dtype=np.float64)
+            for (r0, r1, c0, c1), d, c in zip(self.layout, displs, counts):
+                full[r0:r1, c0:c1] = packed[d:d + c].reshape(r1 - r0, c1 - c0)
+        self._gathered = full
+        self._gathered_root = root
+        return full
+
+    def checksum(self):
+        """Return the sum of all elements on every rank (collective)."""
+        return self.comm.allreduce(float(self.local.sum()), op=MPI.SUM)
+
+    def norm(self, ord='fro'):
+        """
+        Return a matrix norm on every rank (collective).
+
+        Args:
+            ord: 'fro' (Frobenius) or 'max' (largest absolute element)
+        """
+        if ord == 'fro':
+            local = float(np.sum(self.local * self.local))
+            return float(np.sqrt(self.comm.allreduce(local, op=MPI.SUM)))
+        if ord == 'max':
+            local = float(np.abs(self.local).max()) if self.local.size else 0.0
+            return self.comm.allreduce(local, op=MPI.MAX)
+        raise ValueError(f"Unsupported norm {ord!r}, use 'fro' or 'max'")
+
+    def row_stats(self):
+        """
+        Return per-row statistics on every rank (collective).
+
+        Rows split over several ranks (tile layouts) are combined with one
+        Allreduce per statistic.
+
+        Returns:
+            Dictionary with 'sum', 'min' and 'max' arrays of length rows
+        """
+        r0, r1, _, _ = self.block
+        n_rows = self.shape[0]
+        stats = {}
+        for name, op, fill, reduce in (('sum', MPI.SUM, 0.0, np.sum),
+                                       ('min', MPI.MIN, np.inf, np.min),
+                                       ('max', MPI.MAX, -np.inf, np.max)):
+            local = np.full(n_rows, fill)
+            if self.local.size:
+                local[r0:r1] = reduce(self.local, axis=1)
+            stats[name] = np.empty(n_rows)
+            self.comm.Allreduce(local, stats[name], op=op)
+        return stats
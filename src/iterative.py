@@ -0,0 +1,370 @@
+"""
+Resident distributed operands for iterative products.
+
+Matrix powers, power iteration and iterative refinement multiply by the
+same operands again and again. A ResidentGrid keeps the process grid,
+the local worker pool and every operand distributed as SUMMA tiles
+between multiplies. The product of two tiled matrices has the same tile
+layout as its inputs, so it is used directly as the input of the next
+multiply: nothing is regenerated, scattered, broadcast in full or
+gathered between iterations, and only the SUMMA panel broadcasts of each
+multiply remain.
+
+matpow computes A^k by repeated squaring (⌊log2 k⌋ squarings plus one
+multiply per further set bit of k); power_iteration estimates the
+dominant eigenvalue with a replicated vector. Both return per-iteration
+timings, which the CLI saves to results/iterative_results.csv.
+
+Usage:
+    mpirun -np <P> python iterative.py --N 2048 --power 8 --workers 2
+    mpirun -np <P> python iterative.py --N 4096 --power-iterations 50
+"""
+
+import argparse
+import os
+import sys
+import numpy as np
+from mpi4py import MPI
+
+# Import utility functions
+sys.path.insert(0, os.path.dirname(__file__))
+from utils import (
+    now, phase_start, configure_local_compute, ranks_per_node, philox_block,
+    BACKENDS, MATRIX_STREAMS, distribute_rows, pack_tiles,
+    save_results_to_csv
+)
+from distributed import DistributedMatrix
+from matrix_block_striping import ProcessGrid, summa_multiply
+import tracing
+
+
+# Column order of results/iterative_results.csv (one row per iteration)
+ITERATIVE_FIELDNAMES = ['operation', 'n_processes', 'n_workers',
+                        'matrix_size', 'panel_width', 'backend', 'step',
+                        'kind', 'broadcast_time', 'compute_time',
+                        'total_time', 'gflops']
+
+
+class ResidentGrid:
+    """
+    Process grid, local compute and tile layout shared by resident operands.
+
+    Every operand is a DistributedMatrix holding this rank's tile of the
+    grid; products returned by multiply have the same layout.
+
+    Attributes:
+        comm: MPI communicator
+        grid: ProcessGrid of the tile layout
+        N: Matrix dimension
+        n_workers: Number of local workers
+        panel_width: SUMMA panel width
+        backend: Local compute backend
+        pool_startup_time: Time spent starting the local pool (once)
+    """
+
+    def __init__(self, comm, N, n_workers=1, panel_width=256,
+                 backend='processes'):
+        """
+        Args:
+            comm: MPI communicator (collective: every rank must construct)
+            N: Matrix dimension
+            n_workers: Number of local multiprocessing workers
+            panel_width: SUMMA panel width
+            backend: Local compute backend ('processes', 'threads' or 'blas')
+        """
+        self.comm = comm
+        self.N = N
+        self.n_workers = n_workers
+        self.panel_width = panel_width
+        self.backend = backend
+        self.grid = ProcessGrid(comm, N)
+        self.pool_startup_time, self.blas_threads = configure_local_compute(
+            backend, n_workers, ranks_per_node(comm))
+
+    def _wrap(self, tile):
+        """Return a tile of this grid as a DistributedMatrix."""
+        return DistributedMatrix(self.comm, (self.N, self.N), tile,
+                                 self.grid.tile)
+
+    def scatter(self, M=None, root=0):
+        """
+        Distribute a full matrix held by one rank (collective).
+
+        Args:
+            M: N × N matrix on root (ignored elsewhere)
+            root: Rank holding the matrix
+
+        Returns:
+            DistributedMatrix in the grid's tile layout
+        """
+        r0, r1, c0, c1 = self.grid.tile
+        tile = np.empty((r1 - r0, c1 - c0), dtype=np.float64)
+        send = None
+        if self.comm.Get_rank() == root:
+            packed, counts, displs = pack_tiles(M, self.grid.pr, self.grid.pc)
+            send = [packed, counts, displs, MPI.DOUBLE]
+        self.grid.cart.Scatterv(send, tile, root=root)
+        return self._wrap(tile)
+
+    def generate(self, seed=42, stream=MATRIX_STREAMS['A'], scale=1.0):
+        """
+        Generate a synthetic matrix tile by tile on every rank (collective).
+
+        Args:
+            seed: Random seed
+            stream: Philox stream of the matrix (see MATRIX_STREAMS)
+            scale: Factor applied to all elements
+
+        Returns:
+            DistributedMatrix in the grid's tile layout
+        """
+        r0, r1, c0, c1 = self.grid.tile
+        tile = philox_block(self.N, seed, stream, r0, r1, c0, c1)
+        if scale != 1.0:
+            tile *= scale
+        return self._wrap(tile)
+
+    def multiply(self, X, Y):
+        """
+        Multiply two resident matrices with SUMMA (collective).
+
+        Args:
+            X: Left operand in this grid's layout
+            Y: Right operand in this grid's layout
+
+        Returns:
+            tuple of (X @ Y as a DistributedMatrix in the same layout,
+            dictionary with this rank's broadcast_time, compute_time and
+            total_time)
+        """
+        t_start = phase_start(self.comm)
+        C_tile, broadcast_time, compute_time = summa_multiply(
+            self.grid, X.local, Y.local, self.n_workers, self.panel_width,
+            self.backend)
+        product = self._wrap(C_tile)
+        t_end = now()
+        tracing.record('multiply', t_start, t_end, category='iteration')
+        return product, {'broadcast_time': broadcast_time,
+                         'compute_time': compute_time,
+                         'total_time': t_end - t_start}
+
+    def matpow(self, A, k):
+        """
+        Compute A^k by repeated squaring, keeping all operands resident.
+
+        Args:
+            A: Resident matrix
+            k: Exponent (at least 1)
+
+        Returns:
+            tuple of (A^k as a DistributedMatrix, list of per-multiply
+            timings with 'step' and 'kind' ('square' or 'multiply'); the
+            times are the maximum over all ranks)
+
+        Raises:
+            ValueError: if k < 1
+        """
+        if k < 1:
+            raise ValueError(f"Exponent must be at least 1, got {k}")
+        result = None
+        base = A
+        steps = []
+        while True:
+            if k & 1:
+                if result is None:
+                    result = base
+                else:
+                    result, timing = self.multiply(result, base)
+                    steps.append(dict(timing, kind='multiply'))
+            k >>= 1
+            if not k:
+                break
+            base, timing = self.multiply(base, base)
+            steps.append(dict(timing, kind='square'))
+        return result, self._reduce_timings(steps)
+
+    def power_iteration(self, A, iterations, seed=42):
+        """
+        Estimate the dominant eigenvalue of a resident matrix.
+
+        The vector is replicated on every rank: each iteration multiplies
+        the local tile with its slice of the vector, sums the partial
+        rows along the grid rows (Allreduce) and reassembles the vector
+        along the grid columns (Allgatherv).
+
+        Args:
+            A: Resident N × N matrix
+            iterations: Number of iterations
+            seed: Random seed of the start vector
+
+        Returns:
+            tuple of (eigenvalue estimate, eigenvector estimate, list of
+            per-iteration timings; the times are the maximum over all
+            ranks)
+        """
+        grid = self.grid
+        r0, r1, c0, c1 = grid.tile
+        counts = [distribute_rows(self.N, grid.pr, i)[2]
+                  for i in range(grid.pr)]
+        displs = [distribute_rows(self.N, grid.pr, i)[0]
+                  for i in range(grid.pr)]
+
+        x = np.random.default_rng(seed).random(self.N)
+        x /= np.linalg.norm(x)
+        y_rows = np.empty(r1 - r0, dtype=np.float64)
+        y = np.empty(self.N, dtype=np.float64)
+        eigenvalue = 0.0
+        steps = []
+        for _ in range(iterations):
+            t_start = phase_start(self.comm)
+            t_compute_start = now()
+            partial = A.local @ x[c0:c1]
+            compute_time = now() - t_compute_start
+            t_comm_start = now()
+            grid.row_comm.Allreduce(partial, y_rows, op=MPI.SUM)
+            grid.col_comm.Allgatherv(y_rows, [y, counts, displs, MPI.DOUBLE])
+            comm_time = now() - t_comm_start
+            eigenvalue = float(x @ y)
+            x = y / np.linalg.norm(y)
+            t_end = now()
+            tracing.record('power iteration', t_start, t_end,
+                           category='iteration')
+            steps.append({'kind': 'matvec', 'broadcast_time': comm_time,
+                          'compute_time': compute_time,
+                          'total_time': t_end - t_start})
+        return eigenvalue, x, self._reduce_timings(steps)
+
+    def _reduce_timings(self, steps):
+        """Number the steps and take every time's maximum over all ranks."""
+        keys = ('broadcast_time', 'compute_time', 'total_time')
+        local = np.array([[step[key] for key in keys] for step in steps],
+                         dtype=np.float64).reshape(-1, len(keys))
+        slowest = np.empty_like(local)
+        self.comm.Allreduce(local, slowest, op=MPI.MAX)
+        for i, (step, row) in enumerate(zip(steps, slowest)):
+            step.update(zip(keys, row.tolist()))
+            step['step'] = i + 1
+        return steps
+
+    def free(self):
+        """Release the grid's communicators."""
+        self.grid.free()
+
+
+def print_iteration_summary(rank, title, steps, flops_per_step):
+    """
+    Print per-iteration timings (only from rank 0).
+
+    Args:
+        rank: MPI rank
+        title: Summary heading
+        steps: Timings from matpow or power_iteration
+        flops_per_step: Floating point operations of one step
+    """
+    if rank != 0:
+        return
+    print(f"\n{'='*70}")
+    print(f"  {title} - PER-ITERATION TIMINGS")
+    print(f"{'='*70}")
+    print(f"  {'Step':>4}  {'Kind':<9}{'Comm':>12}{'Compute':>12}"
+          f"{'Total':>12}{'GFLOP/s':>10}")
+    for step in steps:
+        gflops = flops_per_step / step['total_time'] / 1e9
+        print(f"  {step['step']:>4}  {step['kind']:<9}"
+              f"{step['broadcast_time']:>12.6f}{step['compute_time']:>12.6f}"
+              f"{step['total_time']:>12.6f}{gflops:>10.2f}")
+    total = sum(step['total_time'] for step in steps)
+    print(f"{'-'*70}")
+    print(f"  Total over {len(steps)} steps: {total:.6f} s")
+    print(f"{'='*70}\n")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Iterative products on resident distributed operands'
+    )
+    parser.add_argument('--N', type=int, default=1024,
+                        help='Matrix dimension (default: 1024)')
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Number of local multiprocessing workers (default: 2)')
+    parser.add_argument('--panel', type=int, default=256,
+                        help='SUMMA panel width (default: 256)')
+    parser.add_argument('--backend', choices=BACKENDS, default='processes',
+                        help='Local compute backend (default: processes)')
+    parser.add_argument('--power', type=int, default=8,
+                        help='Compute A^k by repeated squaring (default: 8)')
+    parser.add_argument('--power-iterations', type=int, default=0,
+                        help='Run this many power iterations instead '
+                             '(default: 0, off)')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Random seed (default: 42)')
+    parser.add_argument('--trace', default=None,
+                        help='Write a Chrome/Perfetto timeline of all ranks '
+                             'to this .json file')
+
+    args = parser.parse_args()
+    comm = MPI.COMM_WORLD
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+    N = args.N
+
+    tracing.enable(args.trace is not None)
+    try:
+        session = ResidentGrid(comm, N, args.workers, args.panel,
+                               args.backend)
+        # Scaled by 1/N so that powers stay bounded
+        A = session.generate(args.seed, scale=1.0 / N)
+        if rank == 0:
+            print(f"\n[Iterative] {size} processes ({session.grid.pr}×"
+                  f"{session.grid.pc} grid), {args.workers} workers each, "
+                  f"N={N}")
+
+        if args.power_iterations > 0:
+            operation = 'power_iteration'
+            eigenvalue, _, steps = session.power_iteration(
+                A, args.power_iterations, args.seed)
+            print_iteration_summary(rank, "POWER ITERATION", steps,
+                                    2.0 * N * N)
+            if rank == 0:
+                print(f"[Iterative] Dominant eigenvalue ≈ {eigenvalue:.6e}")
+        else:
+            operation = 'matpow'
+            result, steps = session.matpow(A, args.power)
+            print_iteration_summary(rank, f"MATPOW A^{args.power}", steps,
+                                    2.0 * N ** 3)
+            fro_norm = result.norm('fro')
+            if rank == 0:
+                print(f"[Iterative] ||A^{args.power}||_F = {fro_norm:.6e}")
+        session.free()
+
+        if rank == 0 and steps:
+            flops = 2.0 * N * N if operation == 'power_iteration' else 2.0 * N ** 3
+            csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                                    'results', 'iterative_results.csv')
+            os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+            save_results_to_csv(csv_path, [
+                dict(step, operation=operation, n_processes=size,
+                     n_workers=args.workers, matrix_size=N,
+                     panel_width=args.panel, backend=args.backend,
+                     gflops=flops / step['total_time'] / 1e9)
+                for step in steps], fieldnames=ITERATIVE_FIELDNAMES)
+            print(f"[Iterative] Results saved to {csv_path}")
+
+        if args.trace:
+            n_events = tracing.write_trace(comm, args.trace)
+            if n_events is not None:
+                print(f"[Iterative] Trace of {n_events} events written to "
+                      f"{args.trace}")
+    except ValueError as e:
+        # Raised identically on every rank
+        if rank == 0:
+            print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"[ERROR] Rank {rank}: {e}", file=sys.stderr)
+        comm.Abort(1)
+
+
+if __name__ == '__main__':
+    main()
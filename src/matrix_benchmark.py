@@ -0,0 +1,232 @@
+"""
+In-process benchmark harness for the matrix multiplication strategies.
+
+Within one MPI launch, every (method, N) point is run a few times without
+measuring (warm-up: page faults, BLAS initialisation, pool start-up) and
+then repeatedly with all ranks synchronised by a barrier before each
+timed phase. One CSV row per point records the median of every phase in
+the usual columns plus median, min, standard deviation and 95%
+confidence interval per phase.
+
+Defaults come from config.ini ([DEFAULT], [BENCHMARK], [OUTPUT]).
+
+Usage:
+    mpirun -np <P> python matrix_benchmark.py
+    mpirun -np <P> python matrix_benchmark.py --methods row,block --N 1024,2048
+    mpirun -np <P> python matrix_benchmark.py --warmup 2 --repetitions 10
+"""
+
+import argparse
+import configparser
+import math
+import os
+import sys
+from mpi4py import MPI
+
+# Import the strategies
+sys.path.insert(0, os.path.dirname(__file__))
+from utils import (
+    BACKENDS, BENCHMARK_PHASES, BENCHMARK_STATS, save_results_to_csv,
+    save_rank_results_to_csv, set_phase_barriers, summarize_timings,
+    throughput_metrics, now
+)
+import tracing
+from matrix_row_striping import row_striping_matmul
+from matrix_block_striping import block_striping_matmul
+from matrix_cannon import cannon_matmul
+from matrix_sparse import sparse_striping_matmul
+from matrix_dynamic import dynamic_row_matmul
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Method -> (function, [OUTPUT] key of its CSV file, [BENCHMARK] run flag)
+METHODS = {
+    'row': (row_striping_matmul, 'row_results_file', 'run_row_striping'),
+    'block': (block_striping_matmul, 'block_results_file',
+              'run_block_striping'),
+    'cannon': (cannon_matmul, 'cannon_results_file', 'run_cannon'),
+    'sparse': (sparse_striping_matmul, 'sparse_results_file', 'run_sparse'),
+    'dynamic': (dynamic_row_matmul, 'dynamic_results_file', 'run_dynamic'),
+}
+
+# Methods only run when enabled in [BENCHMARK] or named with --methods
+OPT_IN_METHODS = ('sparse', 'dynamic')
+
+
+def load_config(path=None):
+    """
+    Load the benchmark configuration.
+
+    Args:
+        path: config.ini path (default: config.ini in the project root)
+
+    Returns:
+        ConfigParser (empty sections fall back to the built-in defaults)
+    """
+    config = configparser.ConfigParser()
+    config.read(path or os.path.join(PROJECT_ROOT, 'config.ini'))
+    for section in ('BENCHMARK', 'OUTPUT'):
+        if not config.has_section(section):
+            config.add_section(section)
+    return config
+
+
+def results_path(config, method):
+    """Return the CSV file of a method as configured in [OUTPUT]."""
+    output = config['OUTPUT']
+    results_dir = output.get('results_dir', 'results')
+    if not os.path.isabs(results_dir):
+        results_dir = os.path.join(PROJECT_ROOT, results_dir)
+    return os.path.join(results_dir,
+                        output.get(METHODS[method][1], f'{method}_results.csv'))
+
+
+def benchmark_point(method, N, n_workers, warmup, repetitions, **options):
+    """
+    Warm up and measure one (method, N) point on all ranks.
+
+    Args:
+        method: 'row', 'block' or 'cannon'
+        N: Matrix dimension
+        n_workers: Number of local workers
+        warmup: Number of unmeasured runs
+        repetitions: Number of measured runs
+        **options: Further arguments of the strategy function
+
+    Returns:
+        tuple of (CSV record with the per-phase statistics, per-rank rows
+        of the last measured run) on rank 0, (None, None) elsewhere
+    """
+    func = METHODS[method][0]
+    for i in range(warmup):
+        t_run_start = now()
+        func(N, n_workers, save_csv=False, **options)
+        tracing.record(f'{method} N={N} warm-up {i}', t_run_start,
+                       category='benchmark', track='runs')
+    runs = []
+    for i in range(repetitions):
+        t_run_start = now()
+        runs.append(func(N, n_workers, save_csv=False, **options))
+        tracing.record(f'{method} N={N} run {i}', t_run_start,
+                       category='benchmark', track='runs')
+
+    if MPI.COMM_WORLD.Get_rank() != 0:
+        return None, None
+
+    # Phase timings are already the maximum over all ranks
+    record = dict(runs[-1]['csv_row'])
+    for phase in BENCHMARK_PHASES:
+        stats = summarize_timings([run[f'{phase}_time'] for run in runs])
+        for stat in BENCHMARK_STATS:
+            record[f'{phase}_{stat}'] = stats[stat]
+        record[f'{phase}_time'] = stats['median']
+    record['communication_time'] = (record['scatter_time']
+                                    + record['broadcast_time']
+                                    + record['gather_time'])
+    # Throughput from the median timings
+    medians = {phase: record[f'{phase}_time']
+               for phase in ('scatter', 'broadcast', 'compute', 'gather')}
+    record.update(throughput_metrics(N, medians, runs[-1]['phase_bytes'],
+                                     runs[-1]['peak_gflops'],
+                                     runs[-1].get('flops')))
+    record['warmup_runs'] = warmup
+    record['repetitions'] = repetitions
+    return record, runs[-1]['rank_rows']
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Benchmark the strategies with warm-up and repetitions'
+    )
+    parser.add_argument('--config', default=None,
+                        help='Configuration file (default: config.ini)')
+    parser.add_argument('--methods', default=None,
+                        help='Comma-separated methods (default: the run_* '
+                             'flags of [BENCHMARK])')
+    parser.add_argument('--N', default=None,
+                        help='Comma-separated matrix sizes '
+                             '(default: matrix_size)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Local workers per process (default: local_workers)')
+    parser.add_argument('--warmup', type=int, default=None,
+                        help='Unmeasured runs per point (default: warmup_runs)')
+    parser.add_argument('--repetitions', type=int, default=None,
+                        help='Measured runs per point (default: repetitions)')
+    parser.add_argument('--backend', choices=BACKENDS, default='processes',
+                        help='Local compute backend (default: processes)')
+    parser.add_argument('--no-barriers', action='store_true',
+                        help='Do not synchronise ranks before timed phases')
+    parser.add_argument('--trace', default=None,
+                        help='Write a Chrome/Perfetto timeline of all runs '
+                             'to this .json file')
+
+    args = parser.parse_args()
+    config = load_config(args.config)
+    bench = config['BENCHMARK']
+
+    if args.methods:
+        methods = args.methods.split(',')
+    else:
+        methods = [m for m in METHODS
+                   if bench.getboolean(METHODS[m][2], m not in OPT_IN_METHODS)]
+    sizes = [int(n) for n in (args.N or bench.get('matrix_size', '1024')).split(',')]
+    n_workers = args.workers or bench.getint('local_workers', 2)
+    warmup = args.warmup if args.warmup is not None else bench.getint('warmup_runs', 1)
+    repetitions = args.repetitions or bench.getint('repetitions', 5)
+    seed = bench.getint('random_seed', 42)
+    peak_gflops = bench.getfloat('peak_gflops', 0.0) or None
+    set_phase_barriers(not args.no_barriers
+                       and bench.getboolean('phase_barriers', True))
+
+    comm = MPI.COMM_WORLD
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+    tracing.enable(args.trace is not None)
+
+    try:
+        for method in methods:
+            if method not in METHODS:
+                raise ValueError(f"Unknown method {method!r}, expected one "
+                                 f"of {', '.join(METHODS)}")
+            if method == 'cannon' and math.isqrt(size) ** 2 != size:
+                if rank == 0:
+                    print(f"[Benchmark] Skipping cannon: P={size} is not a "
+                          f"perfect square")
+                continue
+            for N in sizes:
+                if rank == 0:
+                    print(f"\n[Benchmark] {method} N={N} P={size} "
+                          f"workers={n_workers}: {warmup} warm-up, "
+                          f"{repetitions} measured runs")
+                record, rank_rows = benchmark_point(
+                    method, N, n_workers, warmup, repetitions,
+                    backend=args.backend, seed=seed, peak_gflops=peak_gflops)
+                if rank == 0:
+                    csv_path = results_path(config, method)
+                    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+                    save_results_to_csv(csv_path, record)
+                    save_rank_results_to_csv(
+                        csv_path.replace('_results.csv', '_rank_results.csv'),
+                        rank_rows, record)
+                    print(f"[Benchmark] total median {record['total_median']:.6f} s "
+                          f"± {record['total_ci95']:.6f} s (95% CI), "
+                          f"saved to {csv_path}")
+        if args.trace:
+            n_events = tracing.write_trace(comm, args.trace)
+            if rank == 0:
+                print(f"[Benchmark] Trace of {n_events} events written to "
+                      f"{args.trace}")
+    except ValueError as e:
+        # Raised identically on every rank
+        if rank == 0:
+            print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"[ERROR] Rank {rank}: {e}", file=sys.stderr)
+        comm.Abort(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,21 @@
 """
 Block Striping Matrix Multiplication using MPI + Multiprocessing.
 
-This implementation distributes blocks of matrix A across MPI processes,
-broadcasts matrix B to all processes, and uses multiprocessing for local computation.
+This implementation distributes 2D tiles of matrices A and B over a pr × pc
+process grid and runs SUMMA: panels of A are broadcast along grid rows and
+panels of B along grid columns, so no process ever receives all of B.
+Multiprocessing is used for the local panel products.
 
 Usage:
     mpirun -np <P> python matrix_block_striping.py --N 4096 --workers 4
     mpirun -np <P> python matrix_block_striping.py --N 1024 --workers 2 --simulate-failure 1
+    mpirun -np <P> python matrix_block_striping.py --N 4096 --workers 4 --panel 128
+    mpirun -np <P> python matrix_block_striping.py --N 4096 --backend blas
+    mpirun -np <P> python matrix_block_striping.py --N 4096 --stream-gather 4
+    mpirun -np <P> python matrix_block_striping.py --N 4096 --hierarchical
+    mpirun -np <P> python matrix_block_striping.py --A a.npy --B b.npy --out c.npy
+    mpirun -np <P> python matrix_block_striping.py --N 8192 --no-gather
+    mpirun -np <P> python matrix_block_striping.py --N 4096 --verify
 """
 
 import argparse
@@ -18,27 +27,226 @@ from mpi4py import MPI
 # Import utility functions
 sys.path.insert(0, os.path.dirname(__file__))
 from utils import (
-    now, parallel_matmul_local, create_test_matrices,
-    save_results_to_csv, calculate_process_grid, 
-    distribute_rows, print_timing_summary
+    now, phase_start, parallel_matmul_local, configure_local_compute,
+    ranks_per_node, local_buffer, create_test_matrices, philox_block, BACKENDS,
+    GENERATION_MODES, MATRIX_STREAMS,
+    save_results_to_csv, save_rank_results_to_csv, gather_rank_timings,
+    measure_peak_gflops, throughput_metrics, calculate_process_grid,
+    distribute_rows, distribute_tile, tile_counts, pack_tiles, unpack_tiles,
+    print_timing_summary, StreamingGather, NodeTopology, freivalds_check,
+    verification_fields, VERIFY_TOLERANCE
 )
+from mpi_io import read_npy_header, read_block, write_block
+from distributed import DistributedMatrix
+import tracing
 
 
-def block_striping_matmul(N, n_workers, simulate_failure_rank=None):
+class ProcessGrid:
     """
-    Perform matrix multiplication using block striping approach.
-    
-    Creates a 2D process grid (pr × pc) and distributes blocks accordingly.
-    For simplicity, uses row-block distribution similar to row striping
-    but with potential for 2D grid optimization.
-    
+    2D Cartesian process grid with row and column sub-communicators.
+
+    Rank r sits at grid position (r // pc, r % pc). The row communicator
+    links the pc processes of one grid row (its rank is the grid column),
+    the column communicator links the pr processes of one grid column
+    (its rank is the grid row).
+    """
+
+    def __init__(self, comm, N):
+        self.pr, self.pc = calculate_process_grid(comm.Get_size())
+        self.cart = comm.Create_cart([self.pr, self.pc],
+                                     periods=[False, False], reorder=False)
+        self.myrow, self.mycol = self.cart.Get_coords(self.cart.Get_rank())
+        self.row_comm = self.cart.Sub([False, True])
+        self.col_comm = self.cart.Sub([True, False])
+        self.N = N
+        self.tile = distribute_tile(N, self.pr, self.pc, self.myrow, self.mycol)
+
+    def free(self):
+        """Release the communicators owned by the grid."""
+        self.row_comm.Free()
+        self.col_comm.Free()
+        self.cart.Free()
+
+
+def summa_panels(N, pr, pc, panel_width):
+    """
+    Split the inner dimension into SUMMA panels.
+
+    A is split by columns over the pc grid columns and B by rows over the
+    pr grid rows, so every panel must lie inside one owner of each. Panels
+    follow the union of both partitions and are cut further to at most
+    panel_width columns.
+
+    Args:
+        N: Matrix dimension
+        pr: Number of rows in the process grid
+        pc: Number of columns in the process grid
+        panel_width: Maximum panel width (columns of A / rows of B)
+
+    Yields:
+        tuple of (k_start, k_end, a_owner_col, b_owner_row)
+    """
+    a_bounds = [distribute_rows(N, pc, c)[0] for c in range(pc)]
+    b_bounds = [distribute_rows(N, pr, r)[0] for r in range(pr)]
+    breaks = sorted(set(a_bounds) | set(b_bounds) | {N})
+
+    a_owner = 0
+    b_owner = 0
+    for lo, hi in zip(breaks[:-1], breaks[1:]):
+        while a_owner + 1 < pc and a_bounds[a_owner + 1] <= lo:
+            a_owner += 1
+        while b_owner + 1 < pr and b_bounds[b_owner + 1] <= lo:
+            b_owner += 1
+        for k0 in range(lo, hi, panel_width):
+            yield k0, min(k0 + panel_width, hi), a_owner, b_owner
+
+
+def summa_multiply(grid, A_tile, B_tile, n_workers, panel_width,
+                   backend='processes', row_chunks=1, on_rows_done=None):
+    """
+    Multiply two tile-distributed matrices with the SUMMA algorithm.
+
+    For each panel of the inner dimension, the owning grid column
+    broadcasts its slice of A along the row communicators and the owning
+    grid row broadcasts its slice of B along the column communicators.
+    Every process then accumulates A_panel @ B_panel into its C tile, so
+    each rank only ever receives O(N²/√P) elements.
+
+    The last panel can be applied in row chunks: rows of C are final as
+    soon as their chunk of the last panel is added, and on_rows_done is
+    called for every such chunk so it can be shipped early. Only the
+    last panel's compute can hide these sends; the earlier panels touch
+    every row of C.
+
+    Args:
+        grid: ProcessGrid describing the tile layout
+        A_tile: Local tile of A
+        B_tile: Local tile of B
+        n_workers: Number of local multiprocessing workers
+        panel_width: Maximum panel width
+        backend: Local compute backend
+        row_chunks: Number of row chunks of the last panel
+        on_rows_done: Optional callback(chunk, row_start, row_end, C_tile)
+            invoked once rows row_start:row_end of C_tile are final
+
+    Returns:
+        tuple of (C_tile, broadcast_time, compute_time)
+    """
+    N = grid.N
+    r0, r1, c0, c1 = grid.tile
+    C_tile = np.zeros((r1 - r0, c1 - c0), dtype=np.float64)
+
+    broadcast_time = 0.0
+    compute_time = 0.0
+
+    # Size the shared panel buffers for the widest panel up front
+    max_width = min(panel_width, N)
+    local_buffer('A', (r1 - r0, max_width), n_workers)
+    local_buffer('B', (max_width, c1 - c0), n_workers)
+
+    panels = list(summa_panels(N, grid.pr, grid.pc, panel_width))
+    for i, (k0, k1, owner_col, owner_row) in enumerate(panels):
+        width = k1 - k0
+
+        # Panels are received straight into the local workers' buffers
+        t_bcast_start = now()
+        A_panel = local_buffer('A', (r1 - r0, width), n_workers)
+        if grid.mycol == owner_col:
+            a_off = distribute_rows(N, grid.pc, owner_col)[0]
+            A_panel[...] = A_tile[:, k0 - a_off:k1 - a_off]
+        grid.row_comm.Bcast(A_panel, root=owner_col)
+
+        B_panel = local_buffer('B', (width, c1 - c0), n_workers)
+        if grid.myrow == owner_row:
+            b_off = distribute_rows(N, grid.pr, owner_row)[0]
+            B_panel[...] = B_tile[k0 - b_off:k1 - b_off]
+        grid.col_comm.Bcast(B_panel, root=owner_row)
+        t_bcast_end = now()
+        broadcast_time += t_bcast_end - t_bcast_start
+        tracing.record(f'broadcast panel {i}', t_bcast_start, t_bcast_end,
+                       category='mpi')
+
+        if i < len(panels) - 1 or on_rows_done is None:
+            t_compute_start = now()
+            C_tile += parallel_matmul_local(A_panel, B_panel, n_workers,
+                                            backend)
+            t_compute_end = now()
+            compute_time += t_compute_end - t_compute_start
+            tracing.record(f'compute panel {i}', t_compute_start,
+                           t_compute_end, category='compute')
+            continue
+
+        # Last panel: finish C row chunk by row chunk. Staging a chunk
+        # into the shared 'A' block only overwrites rows already done.
+        for chunk in range(row_chunks):
+            a, b, _ = distribute_rows(r1 - r0, row_chunks, chunk)
+            t_compute_start = now()
+            C_tile[a:b] += parallel_matmul_local(A_panel[a:b], B_panel,
+                                                 n_workers, backend)
+            t_compute_end = now()
+            compute_time += t_compute_end - t_compute_start
+            tracing.record(f'compute panel {i} chunk {chunk}',
+                           t_compute_start, t_compute_end, category='compute')
+            on_rows_done(chunk, a, b, C_tile)
+
+    return C_tile, broadcast_time, compute_time
+
+
+def block_striping_matmul(N, n_workers, simulate_failure_rank=None,
+                          panel_width=256, backend='processes',
+                          generation='root', seed=42, stream_chunks=0,
+                          hierarchical=False, a_path=None, b_path=None,
+                          out_path=None, gather_result=True, peak_gflops=None,
+                          save_csv=True, verify=False, verify_trials=2,
+                          verify_tolerance=VERIFY_TOLERANCE):
+    """
+    Perform matrix multiplication using 2D block distribution (SUMMA).
+
+    Creates a 2D process grid (pr × pc), scatters tiles of A and B to
+    their owners and runs SUMMA over row and column sub-communicators.
+    The C tiles are gathered back to rank 0.
+
     Args:
         N: Matrix dimension (N×N)
         n_workers: Number of local multiprocessing workers
         simulate_failure_rank: Rank to simulate failure (optional)
-        
+        panel_width: Width of the SUMMA panels (default: 256)
+        backend: Local compute backend ('processes', 'threads' or 'blas')
+        generation: 'root' creates A and B on rank 0 and scatters them,
+            'local' lets every rank generate its own tiles
+        seed: Random seed of the synthetic matrices
+        stream_chunks: Finish the C tile in this many row chunks and send
+            each to rank 0 as soon as it is final (0 or 1: Gatherv). Rows
+            of C are final only after the last SUMMA panel, so the gather
+            overlaps the compute of that panel only
+        hierarchical: Run the tile scatter and gather in two levels
+            (node leaders across nodes, then shared memory within a node)
+        a_path: .npy file of A; every rank reads its tile with MPI-IO
+            instead of receiving it from rank 0 (N is taken from the file)
+        b_path: .npy file of B, read the same way
+        out_path: Write C collectively to this .npy file instead of
+            gathering it on rank 0
+        gather_result: Gather C on rank 0; if False, C stays distributed
+            and is returned as a DistributedMatrix under 'result'
+        peak_gflops: Peak GFLOP/s of all ranks for the percentage of peak
+            (default: measured with a short dgemm probe)
+        save_csv: Append the results to results/block_results.csv
+        verify: Check C with Freivalds' test on the local tiles after the
+            timed run (see freivalds_check)
+        verify_trials: Number of random vectors of the check
+        verify_tolerance: Safety factor of the check's rounding bound
+
     Returns:
-        Dictionary with timing results
+        Dictionary with timing results ('csv_row', the CSV record of the
+        run, on rank 0, 'result', the distributed C, when gather_result
+        is False, and 'verification', the result of the check, when verify
+        is set)
+
+    Raises:
+        ValueError: if streaming is combined with hierarchical collectives,
+            an output file or a distributed result, the backend is unknown,
+            the panel width is not positive, or the input files are missing
+            or not matching square matrices
     """
     comm = MPI.COMM_WORLD
     rank = comm.Get_rank()
@@ -51,98 +259,247 @@ def block_striping_matmul(N, n_workers, simulate_failure_rank=None):
         comm.Barrier()
         os._exit(1)
     
-    # Calculate process grid
-    pr, pc = calculate_process_grid(size)
+    # Validate the options before any communicator is created, so a
+    # rejected run (e.g. a service job) leaves nothing behind
+    streaming = stream_chunks > 1
+    if streaming and hierarchical:
+        raise ValueError("--stream-gather and --hierarchical cannot be combined")
+    if streaming and out_path is not None:
+        raise ValueError("--stream-gather and --out cannot be combined")
+    if streaming and not gather_result:
+        raise ValueError("--stream-gather and --no-gather cannot be combined")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+    if panel_width < 1:
+        raise ValueError(f"Panel width must be positive, got {panel_width}")
+    
+    if a_path is not None or b_path is not None:
+        if a_path is None or b_path is None:
+            raise ValueError("--A and --B must be given together")
+        a_shape, _ = read_npy_header(comm, a_path)
+        b_shape, _ = read_npy_header(comm, b_path)
+        if a_shape[0] != a_shape[1] or a_shape != b_shape:
+            raise ValueError(f"A {a_shape} and B {b_shape} must be square "
+                             f"matrices of the same size")
+        N = a_shape[0]
+        generation = 'file'
+    
+    # Build the 2D process grid
+    grid = ProcessGrid(comm, N)
+    pr, pc = grid.pr, grid.pc
+    r0, r1, c0, c1 = grid.tile
     
     # Initialize timing variables
+    generation_time = 0.0
     scatter_time = 0.0
     broadcast_time = 0.0
     compute_time = 0.0
     gather_time = 0.0
+    gather_hidden_time = None
+    inter_node_time = 0.0
+    intra_node_time = 0.0
+    topology = NodeTopology(comm) if hierarchical else None
     
     # Start total timing
     t_start = now()
     
-    # Rank 0 creates matrices
+    # Size BLAS threads and start the persistent local pool
+    # (timed separately from compute)
+    pool_startup_time, blas_threads = configure_local_compute(
+        backend, n_workers, ranks_per_node(comm))
+    
     if rank == 0:
-        A, B = create_test_matrices(N)
         print(f"\n[Block Striping] Starting with {size} processes ({pr}×{pc} grid), {n_workers} workers each")
-        print(f"[Block Striping] Matrix size: {N}×{N}")
-    else:
-        A = None
-        B = np.empty((N, N), dtype=np.float64)
+        print(f"[Block Striping] Matrix size: {N}×{N}, panel width: {panel_width}, generation: {generation}")
     
-    # For block distribution, we'll use a row-block approach
-    # More sophisticated 2D block distribution can be added
-    # Calculate block (row) distribution
-    start_row, end_row, local_rows = distribute_rows(N, size, rank)
-    
-    # Prepare send counts and displacements for Scatterv
-    if rank == 0:
-        sendcounts = []
-        displs = []
-        for r in range(size):
-            s, e, count = distribute_rows(N, size, r)
-            sendcounts.append(count * N)
-            displs.append(s * N)
-        sendcounts = np.array(sendcounts, dtype=np.int32)
-        displs = np.array(displs, dtype=np.int32)
+    if rank == 0 or hierarchical:
+        # (the hierarchical collectives need the counts on every rank)
+        sendcounts, displs = tile_counts(N, pr, pc)
     else:
         sendcounts = None
         displs = None
     
-    # Allocate receive buffer for local block
-    A_local = np.empty((local_rows, N), dtype=np.float64)
+    # Allocate receive buffers for local tiles
+    A_tile = np.empty((r1 - r0, c1 - c0), dtype=np.float64)
+    B_tile = np.empty((r1 - r0, c1 - c0), dtype=np.float64)
     
-    # Scatter blocks of A
-    t_scatter_start = now()
-    comm.Scatterv([A, sendcounts, displs, MPI.DOUBLE], A_local, root=0)
-    t_scatter_end = now()
-    scatter_time = t_scatter_end - t_scatter_start
-    
-    # Broadcast matrix B
-    t_bcast_start = now()
-    if rank == 0:
-        comm.Bcast(B, root=0)
+    t_gen_start = now()
+    if generation == 'local':
+        # Every rank generates its own tiles, so there is nothing to scatter
+        philox_block(N, seed, MATRIX_STREAMS['A'], r0, r1, c0, c1, out=A_tile)
+        philox_block(N, seed, MATRIX_STREAMS['B'], r0, r1, c0, c1, out=B_tile)
+    elif rank == 0:
+        # Rank 0 creates matrices and packs them tile by tile
+        A, B = create_test_matrices(N, seed)
+        A_packed, _, _ = pack_tiles(A, pr, pc)
+        B_packed, _, _ = pack_tiles(B, pr, pc)
     else:
-        comm.Bcast(B, root=0)
-    t_bcast_end = now()
-    broadcast_time = t_bcast_end - t_bcast_start
+        # Non-root ranks (and file inputs, read below) have nothing to pack
+        A_packed = None
+        B_packed = None
+    generation_time = now() - t_gen_start
+    tracing.record('generation', t_gen_start, t_gen_start + generation_time)
     
-    # Local computation using multiprocessing
-    t_compute_start = now()
-    C_local = parallel_matmul_local(A_local, B, n_workers)
-    t_compute_end = now()
-    compute_time = t_compute_end - t_compute_start
+    if generation == 'root':
+        # Scatter tiles of A and B
+        t_scatter_start = phase_start(comm)
+        if hierarchical:
+            for packed, tile in ((A_packed, A_tile), (B_packed, B_tile)):
+                inter, intra = topology.scatterv(packed, sendcounts, displs,
+                                                 tile)
+                inter_node_time += inter
+                intra_node_time += intra
+        else:
+            grid.cart.Scatterv([A_packed, sendcounts, displs, MPI.DOUBLE], A_tile, root=0)
+            grid.cart.Scatterv([B_packed, sendcounts, displs, MPI.DOUBLE], B_tile, root=0)
+        t_scatter_end = now()
+        tracing.record('scatter', t_scatter_start, t_scatter_end)
+        scatter_time = t_scatter_end - t_scatter_start
+    elif generation == 'file':
+        # Every rank reads its own tiles; reported as scatter time
+        t_scatter_start = phase_start(comm)
+        read_block(comm, a_path, A_tile, r0, c0)
+        read_block(comm, b_path, B_tile, r0, c0)
+        t_scatter_end = now()
+        tracing.record('read inputs', t_scatter_start, t_scatter_end)
+        scatter_time = t_scatter_end - t_scatter_start
     
-    # Gather results
-    if rank == 0:
-        C = np.empty((N, N), dtype=np.float64)
+    # Gather result tiles
+    if rank == 0 and out_path is None and gather_result:
+        C_packed = np.empty(N * N, dtype=np.float64)
+    else:
+        C_packed = None
+    
+    if streaming:
+        # Rank 0 pre-posts a receive for every row chunk of every tile
+        if rank == 0:
+            recv_views = []
+            for r in range(size):
+                tr0, tr1, tc0, tc1 = distribute_tile(N, pr, pc, r // pc, r % pc)
+                width = tc1 - tc0
+                for chunk in range(stream_chunks):
+                    a, b, _ = distribute_rows(tr1 - tr0, stream_chunks, chunk)
+                    recv_views.append((r, chunk, C_packed[displs[r] + a * width:
+                                                          displs[r] + b * width]))
+        else:
+            recv_views = None
+        gather = StreamingGather(grid.cart, recv_views)
+        
+        def send_rows(chunk, a, b, C_tile):
+            root_view = None
+            if rank == 0:
+                width = C_tile.shape[1]
+                root_view = C_packed[displs[0] + a * width:displs[0] + b * width]
+            gather.send(chunk, C_tile[a:b], root_view)
     else:
-        C = None
+        send_rows = None
+    
+    # SUMMA: panel broadcasts along grid rows/columns + local computation
+    phase_start(comm)
+    C_tile, broadcast_time, compute_time = summa_multiply(
+        grid, A_tile, B_tile, n_workers, panel_width, backend,
+        row_chunks=stream_chunks, on_rows_done=send_rows)
     
-    t_gather_start = now()
-    comm.Gatherv(C_local, [C, sendcounts, displs, MPI.DOUBLE], root=0)
+    t_gather_start = phase_start(comm)
+    if streaming:
+        _, gather_hidden_time = gather.finish()
+    elif out_path is not None:
+        # Each rank writes its tile straight into the output file
+        write_block(comm, out_path, (N, N), C_tile, r0, c0)
+    elif gather_result:
+        if hierarchical:
+            inter, intra = topology.gatherv(C_tile, sendcounts, displs,
+                                            C_packed)
+            inter_node_time += inter
+            intra_node_time += intra
+        else:
+            grid.cart.Gatherv(C_tile, [C_packed, sendcounts, displs, MPI.DOUBLE], root=0)
+    if C_packed is not None:
+        C = unpack_tiles(C_packed, N, pr, pc)
     t_gather_end = now()
+    tracing.record('gather', t_gather_start, t_gather_end)
     gather_time = t_gather_end - t_gather_start
     
     # End total timing
     t_end = now()
     total_time = t_end - t_start
     
+    # Untimed check of C on the local tiles
+    verification = None
+    if verify:
+        row_bounds = [distribute_rows(N, pr, i)[0] for i in range(pr)]
+        verification = freivalds_check(
+            comm, grid.row_comm, grid.col_comm, A_tile, B_tile, C_tile,
+            row_bounds + [N], c0, trials=verify_trials, seed=seed + 1,
+            tolerance=verify_tolerance)
+    
+    grid.free()
+    if topology is not None:
+        topology.free()
+    
+    # Per-rank timings, before they are reduced to the maximum
+    rank_rows, rank_stats = gather_rank_timings(comm, {
+        'generation': generation_time, 'scatter': scatter_time,
+        'broadcast': broadcast_time, 'compute': compute_time,
+        'gather': gather_time, 'total': total_time})
+    
     # Collect timing data from all processes (max values)
+    generation_time = comm.allreduce(generation_time, op=MPI.MAX)
     scatter_time = comm.allreduce(scatter_time, op=MPI.MAX)
     broadcast_time = comm.allreduce(broadcast_time, op=MPI.MAX)
     compute_time = comm.allreduce(compute_time, op=MPI.MAX)
     gather_time = comm.allreduce(gather_time, op=MPI.MAX)
+    pool_startup_time = comm.allreduce(pool_startup_time, op=MPI.MAX)
     total_time = comm.allreduce(total_time, op=MPI.MAX)
+    if gather_hidden_time is not None:
+        gather_hidden_time = comm.allreduce(gather_hidden_time, op=MPI.MAX)
+    inter_node_time = comm.allreduce(inter_node_time, op=MPI.MAX)
+    intra_node_time = comm.allreduce(intra_node_time, op=MPI.MAX)
+    level_times = (inter_node_time, intra_node_time) if hierarchical else None
+    
+    # Bytes moved per communication phase, summed over all ranks: every
+    # element of A reaches the pc - 1 other ranks of its grid row, every
+    # element of B the pr - 1 other ranks of its grid column
+    matrix_bytes = N * N * 8
+    phase_bytes = {'scatter': 0,
+                   'broadcast': matrix_bytes * (grid.pc - 1 + grid.pr - 1),
+                   'gather': 0}
+    if generation in ('root', 'file'):
+        phase_bytes['scatter'] = 2 * matrix_bytes
+    if out_path is not None or gather_result:
+        phase_bytes['gather'] = matrix_bytes
+    if not peak_gflops:
+        peak_gflops = measure_peak_gflops(comm, backend, n_workers,
+                                          blas_threads)
+    throughput = throughput_metrics(N, {
+        'scatter': scatter_time, 'broadcast': broadcast_time,
+        'compute': compute_time, 'gather': gather_time}, phase_bytes,
+        peak_gflops)
     
     # Print summary and save results
     print_timing_summary(rank, "BLOCK", size, n_workers, N,
                         scatter_time, broadcast_time, compute_time,
-                        gather_time, total_time)
+                        gather_time, total_time,
+                        pool_startup_time=pool_startup_time,
+                        backend=backend, blas_threads=blas_threads,
+                        generation_time=generation_time,
+                        gather_hidden_time=gather_hidden_time,
+                        level_times=level_times,
+                        rank_stats=rank_stats, throughput=throughput,
+                        verification=verification)
+    
+    # Keep C distributed instead of gathering it
+    result = None
+    if not gather_result:
+        result = DistributedMatrix(comm, (N, N), C_tile, (r0, r1, c0, c1))
+        checksum = result.checksum()
+        fro_norm = result.norm('fro')
+        if rank == 0:
+            print(f"[Block Striping] C kept distributed: checksum {checksum:.6e}, "
+                  f"Frobenius norm {fro_norm:.6e}")
     
     # Save to CSV
+    results = None
     if rank == 0:
         results = {
             'method': 'Block',
@@ -154,20 +511,52 @@ def block_striping_matmul(N, n_workers, simulate_failure_rank=None):
             'compute_time': compute_time,
             'gather_time': gather_time,
             'communication_time': scatter_time + broadcast_time + gather_time,
-            'total_time': total_time
+            'total_time': total_time,
+            'pool_startup_time': pool_startup_time,
+            'backend': backend,
+            'generation': generation,
+            'generation_time': generation_time,
+            'panel_width': panel_width,
+            'stream_chunks': stream_chunks if streaming else 0,
+            'gather_hidden_time': gather_hidden_time,
+            'hierarchical': int(hierarchical),
+            'inter_node_time': inter_node_time if hierarchical else '',
+            'intra_node_time': intra_node_time if hierarchical else '',
+            'compute_imbalance': rank_stats['compute']['imbalance'],
+            'slowest_rank': rank_stats['total']['slowest_rank']
         }
+        results.update(throughput)
+        if verification is not None:
+            results.update(verification_fields(verification))
         
-        csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
-                                'results', 'block_results.csv')
-        save_results_to_csv(csv_path, results)
-        print(f"[Block Striping] Results saved to {csv_path}")
+        if save_csv:
+            csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
+                                    'results', 'block_results.csv')
+            save_results_to_csv(csv_path, results)
+            print(f"[Block Striping] Results saved to {csv_path}")
+            
+            # Per-rank timings next to it
+            save_rank_results_to_csv(
+                csv_path.replace('_results.csv', '_rank_results.csv'),
+                rank_rows, results)
     
     return {
         'scatter_time': scatter_time,
         'broadcast_time': broadcast_time,
         'compute_time': compute_time,
         'gather_time': gather_time,
-        'total_time': total_time
+        'total_time': total_time,
+        'pool_startup_time': pool_startup_time,
+        'generation_time': generation_time,
+        'gather_hidden_time': gather_hidden_time,
+        'inter_node_time': inter_node_time,
+        'intra_node_time': intra_node_time,
+        'result': result,
+        'verification': verification,
+        'phase_bytes': phase_bytes,
+        'peak_gflops': peak_gflops,
+        'csv_row': results,
+        'rank_rows': rank_rows
     }
 
 
@@ -182,12 +571,75 @@ def main():
                         help='Number of local multiprocessing workers (default: 2)')
     parser.add_argument('--simulate-failure', type=int, default=None,
                         help='Simulate failure at specified rank (optional)')
+    parser.add_argument('--backend', choices=BACKENDS, default='processes',
+                        help='Local compute backend (default: processes)')
+    parser.add_argument('--generate', choices=GENERATION_MODES, default='root',
+                        help='Create inputs on rank 0 and scatter them, or '
+                             'generate them rank-locally (default: root)')
+    parser.add_argument('--panel', type=int, default=256,
+                        help='SUMMA panel width (default: 256)')
+    parser.add_argument('--stream-gather', type=int, default=0,
+                        help='Finish the C tile in this many row chunks and '
+                             'send each to rank 0 when done (default: 0, off)')
+    parser.add_argument('--hierarchical', action='store_true',
+                        help='Two-level tile scatter/gather: across node '
+                             'leaders, then within each node')
+    parser.add_argument('--A', default=None,
+                        help='Read A from this .npy file with MPI-IO '
+                             '(requires --B; overrides --N)')
+    parser.add_argument('--B', default=None,
+                        help='Read B from this .npy file with MPI-IO')
+    parser.add_argument('--out', default=None,
+                        help='Write C to this .npy file with MPI-IO instead '
+                             'of gathering it on rank 0')
+    parser.add_argument('--no-gather', action='store_true',
+                        help='Keep C distributed over the ranks instead of '
+                             'gathering it on rank 0')
+    parser.add_argument('--peak-gflops', type=float, default=None,
+                        help='Peak GFLOP/s of all processes for the %% of '
+                             'peak (default: measured)')
+    parser.add_argument('--verify', action='store_true',
+                        help="Check C with Freivalds' randomized test on the "
+                             'local tiles after the run')
+    parser.add_argument('--verify-trials', type=int, default=2,
+                        help='Random vectors of the check (default: 2)')
+    parser.add_argument('--verify-tolerance', type=float,
+                        default=VERIFY_TOLERANCE,
+                        help='Safety factor c of the per-entry bound '
+                             'c·N·eps·|A|(|B||R|) of the check '
+                             f'(default: {VERIFY_TOLERANCE})')
+    parser.add_argument('--trace', default=None,
+                        help='Write a Chrome/Perfetto timeline of all ranks '
+                             'and workers to this .json file')
+    parser.add_argument('--auto', action='store_true',
+                        help='Choose workers, backend and panel width with '
+                             'the auto-tuner (cached in '
+                             'results/tuning_db.json)')
     
     args = parser.parse_args()
     
     # Run the computation
+    tracing.enable(args.trace is not None)
     try:
-        block_striping_matmul(args.N, args.workers, args.simulate_failure)
+        if args.auto:
+            from autotune import tune_cli_args
+            tune_cli_args(args, 'block')
+        block_striping_matmul(args.N, args.workers, args.simulate_failure,
+                              args.panel, args.backend, args.generate,
+                              stream_chunks=args.stream_gather,
+                              hierarchical=args.hierarchical,
+                              a_path=args.A, b_path=args.B,
+                              out_path=args.out,
+                              gather_result=not args.no_gather,
+                              peak_gflops=args.peak_gflops,
+                              verify=args.verify,
+                              verify_trials=args.verify_trials,
+                              verify_tolerance=args.verify_tolerance)
+        if args.trace:
+            n_events = tracing.write_trace(MPI.COMM_WORLD, args.trace)
+            if n_events is not None:
+                print(f"[Block Striping] Trace of {n_events} events written "
+                      f"to {args.trace}")
     except Exception as e:
         rank = MPI.COMM_WORLD.Get_rank()
         print(f"[ERROR] Rank {rank}: {e}", file=sys.stderr)
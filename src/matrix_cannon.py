@@ -0,0 +1,470 @@
+"""
+Cannon's Algorithm Matrix Multiplication using MPI + Multiprocessing.
+
+This implementation arranges the processes in a square √P × √P periodic
+Cartesian grid (torus). Every process owns one tile of A, B and C; after
+an initial skew the A tiles are shifted left and the B tiles shifted up
+with Sendrecv_replace, so no process ever holds a full matrix.
+Multiprocessing is used for the local tile products.
+
+Usage:
+    mpirun -np <P> python matrix_cannon.py --N 4096 --workers 4
+    mpirun -np <P> python matrix_cannon.py --N 1024 --workers 2 --simulate-failure 1
+    mpirun -np <P> python matrix_cannon.py --N 4096 --workers 4 --verify
+
+P must be a perfect square (1, 4, 9, 16, ...).
+"""
+
+import argparse
+import math
+import os
+import sys
+import numpy as np
+from mpi4py import MPI
+
+# Import utility functions
+sys.path.insert(0, os.path.dirname(__file__))
+from utils import (
+    now, phase_start, parallel_matmul_local, configure_local_compute,
+    ranks_per_node, local_buffer, create_test_matrices, philox_block, BACKENDS,
+    GENERATION_MODES, MATRIX_STREAMS,
+    save_results_to_csv, save_rank_results_to_csv, gather_rank_timings,
+    measure_peak_gflops, throughput_metrics, distribute_tile,
+    print_timing_summary, freivalds_check, verification_fields,
+    VERIFY_TOLERANCE
+)
+import tracing
+
+
+def cannon_grid_size(P):
+    """
+    Return the side q of the q × q torus for P processes.
+
+    Args:
+        P: Total number of processes
+
+    Returns:
+        q such that q * q == P
+
+    Raises:
+        ValueError: if P is not a perfect square
+    """
+    q = math.isqrt(P)
+    if q * q != P:
+        raise ValueError(
+            f"Cannon's algorithm needs a square number of processes "
+            f"(1, 4, 9, 16, ...), got P={P}. "
+            f"Use matrix_block_striping.py for arbitrary P."
+        )
+    return q
+
+
+def pack_padded_tiles(M, q):
+    """
+    Pack a matrix into q × q equally sized, zero-padded tiles.
+
+    Sendrecv_replace needs every tile to have the same shape, so tiles
+    from distribute_tile are padded to ceil(N / q) on both sides. The
+    padding is zero and therefore does not change the product.
+
+    Args:
+        M: Full matrix (N × N)
+        q: Side of the process grid
+
+    Returns:
+        Array of shape (q * q, nb, nb) in rank order
+    """
+    N = M.shape[0]
+    nb = -(-N // q)
+    tiles = np.zeros((q * q, nb, nb), dtype=np.float64)
+    for r in range(q * q):
+        r0, r1, c0, c1 = distribute_tile(N, q, q, r // q, r % q)
+        tiles[r, :r1 - r0, :c1 - c0] = M[r0:r1, c0:c1]
+    return tiles
+
+
+def unpack_padded_tiles(tiles, N, q):
+    """
+    Rebuild a full matrix from padded tiles. Inverse of pack_padded_tiles.
+
+    Args:
+        tiles: Array of shape (q * q, nb, nb) in rank order
+        N: Matrix dimension
+        q: Side of the process grid
+
+    Returns:
+        Full matrix (N × N)
+    """
+    M = np.empty((N, N), dtype=np.float64)
+    for r in range(q * q):
+        r0, r1, c0, c1 = distribute_tile(N, q, q, r // q, r % q)
+        M[r0:r1, c0:c1] = tiles[r, :r1 - r0, :c1 - c0]
+    return M
+
+
+def cannon_multiply(cart, A_tile, B_tile, n_workers, backend='processes'):
+    """
+    Run Cannon's algorithm on a periodic q × q Cartesian communicator.
+
+    The tiles are shifted in place, so on return A_tile and B_tile hold
+    the tiles that ended up on this process, not the original ones.
+
+    Args:
+        cart: Periodic 2D Cartesian communicator
+        A_tile: Local tile of A (nb × nb, modified in place)
+        B_tile: Local tile of B (nb × nb, modified in place)
+        n_workers: Number of local multiprocessing workers
+        backend: Local compute backend
+
+    Returns:
+        tuple of (C_tile, shift_time, compute_time)
+    """
+    q = cart.Get_topo()[0][0]
+    myrow, mycol = cart.Get_coords(cart.Get_rank())
+    C_tile = np.zeros_like(A_tile)
+
+    shift_time = 0.0
+    compute_time = 0.0
+
+    # Initial skew: row i shifts A left by i, column j shifts B up by j
+    t_shift_start = now()
+    if myrow > 0:
+        source, dest = cart.Shift(1, -myrow)
+        cart.Sendrecv_replace(A_tile, dest=dest, source=source)
+    if mycol > 0:
+        source, dest = cart.Shift(0, -mycol)
+        cart.Sendrecv_replace(B_tile, dest=dest, source=source)
+    t_shift_end = now()
+    shift_time += t_shift_end - t_shift_start
+    tracing.record('skew', t_shift_start, t_shift_end, category='mpi')
+
+    left_source, left_dest = cart.Shift(1, -1)
+    up_source, up_dest = cart.Shift(0, -1)
+
+    for step in range(q):
+        t_compute_start = now()
+        C_tile += parallel_matmul_local(A_tile, B_tile, n_workers, backend)
+        t_compute_end = now()
+        compute_time += t_compute_end - t_compute_start
+        tracing.record(f'compute step {step}', t_compute_start,
+                       t_compute_end, category='compute')
+
+        if step < q - 1:
+            t_shift_start = now()
+            cart.Sendrecv_replace(A_tile, dest=left_dest, source=left_source)
+            cart.Sendrecv_replace(B_tile, dest=up_dest, source=up_source)
+            t_shift_end = now()
+            shift_time += t_shift_end - t_shift_start
+            tracing.record(f'shift {step}', t_shift_start, t_shift_end,
+                           category='mpi')
+
+    return C_tile, shift_time, compute_time
+
+
+def cannon_matmul(N, n_workers, simulate_failure_rank=None,
+                  backend='processes', generation='root', seed=42,
+                  peak_gflops=None, save_csv=True, verify=False,
+                  verify_trials=2, verify_tolerance=VERIFY_TOLERANCE):
+    """
+    Perform matrix multiplication using Cannon's algorithm.
+
+    Args:
+        N: Matrix dimension (N×N)
+        n_workers: Number of local multiprocessing workers
+        simulate_failure_rank: Rank to simulate failure (optional)
+        backend: Local compute backend ('processes', 'threads' or 'blas')
+        generation: 'root' creates A and B on rank 0 and scatters them,
+            'local' lets every rank generate its own tiles
+        seed: Random seed of the synthetic matrices
+        peak_gflops: Peak GFLOP/s of all ranks for the percentage of peak
+            (default: measured with a short dgemm probe)
+        save_csv: Append the results to results/cannon_results.csv
+        verify: Check C with Freivalds' test on the local tiles after the
+            timed run (see freivalds_check)
+        verify_trials: Number of random vectors of the check
+        verify_tolerance: Safety factor of the check's rounding bound
+
+    Returns:
+        Dictionary with timing results ('csv_row', the CSV record of the
+        run, on rank 0, and 'verification', the result of the check, when
+        verify is set)
+
+    Raises:
+        ValueError: if the number of processes is not a perfect square
+    """
+    comm = MPI.COMM_WORLD
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+
+    q = cannon_grid_size(size)
+    nb = -(-N // q)
+
+    # Simulate failure if requested
+    if simulate_failure_rank is not None and rank == simulate_failure_rank:
+        if rank == 0:
+            print(f"\n[SIMULATION] Rank {rank} simulating failure...")
+        comm.Barrier()
+        os._exit(1)
+
+    # Build the periodic torus
+    cart = comm.Create_cart([q, q], periods=[True, True], reorder=False)
+
+    # Initialize timing variables
+    generation_time = 0.0
+    scatter_time = 0.0
+    shift_time = 0.0
+    compute_time = 0.0
+    gather_time = 0.0
+
+    # Start total timing
+    t_start = now()
+
+    # Size BLAS threads and start the persistent local pool
+    # (timed separately from compute)
+    pool_startup_time, blas_threads = configure_local_compute(
+        backend, n_workers, ranks_per_node(comm))
+
+    if rank == 0:
+        print(f"\n[Cannon] Starting with {size} processes ({q}×{q} torus), {n_workers} workers each")
+        print(f"[Cannon] Matrix size: {N}×{N}, tile size: {nb}×{nb}, generation: {generation}")
+
+    # Allocate local tiles (shared with local workers, shifted in place)
+    A_tile = local_buffer('A', (nb, nb), n_workers)
+    B_tile = local_buffer('B', (nb, nb), n_workers)
+
+    t_gen_start = now()
+    if generation == 'local':
+        # Every rank generates its own (zero-padded) tiles
+        r0, r1, c0, c1 = distribute_tile(N, q, q, rank // q, rank % q)
+        A_tile[...] = 0.0
+        B_tile[...] = 0.0
+        philox_block(N, seed, MATRIX_STREAMS['A'], r0, r1, c0, c1,
+                     out=A_tile[:r1 - r0, :c1 - c0])
+        philox_block(N, seed, MATRIX_STREAMS['B'], r0, r1, c0, c1,
+                     out=B_tile[:r1 - r0, :c1 - c0])
+    elif rank == 0:
+        # Rank 0 creates matrices and packs them into padded tiles
+        A, B = create_test_matrices(N, seed)
+        A_tiles = pack_padded_tiles(A, q)
+        B_tiles = pack_padded_tiles(B, q)
+    else:
+        A_tiles = None
+        B_tiles = None
+    generation_time = now() - t_gen_start
+    tracing.record('generation', t_gen_start, t_gen_start + generation_time)
+
+    if generation == 'root':
+        # Scatter tiles of A and B
+        t_scatter_start = phase_start(comm)
+        cart.Scatter(A_tiles, A_tile, root=0)
+        cart.Scatter(B_tiles, B_tile, root=0)
+        t_scatter_end = now()
+        tracing.record('scatter', t_scatter_start, t_scatter_end)
+        scatter_time = t_scatter_end - t_scatter_start
+
+    # The shifts move the tiles, keep this rank's own for the check
+    if verify:
+        A_verify, B_verify = A_tile.copy(), B_tile.copy()
+
+    # Skew + q torus shift/compute steps
+    phase_start(comm)
+    C_tile, shift_time, compute_time = cannon_multiply(cart, A_tile, B_tile,
+                                                       n_workers, backend)
+
+    # Gather result tiles
+    if rank == 0:
+        C_tiles = np.empty((size, nb, nb), dtype=np.float64)
+    else:
+        C_tiles = None
+
+    t_gather_start = phase_start(comm)
+    cart.Gather(C_tile, C_tiles, root=0)
+    if rank == 0:
+        C = unpack_padded_tiles(C_tiles, N, q)
+    t_gather_end = now()
+    tracing.record('gather', t_gather_start, t_gather_end)
+    gather_time = t_gather_end - t_gather_start
+
+    # End total timing
+    t_end = now()
+    total_time = t_end - t_start
+
+    # Untimed check of C on the local (zero-padded) tiles
+    verification = None
+    if verify:
+        row_comm = cart.Sub([False, True])
+        col_comm = cart.Sub([True, False])
+        verification = freivalds_check(
+            comm, row_comm, col_comm, A_verify, B_verify, C_tile,
+            [i * nb for i in range(q + 1)], (rank % q) * nb,
+            trials=verify_trials, seed=seed + 1,
+            tolerance=verify_tolerance)
+        row_comm.Free()
+        col_comm.Free()
+
+    cart.Free()
+
+    # Per-rank timings, before they are reduced to the maximum
+    rank_rows, rank_stats = gather_rank_timings(comm, {
+        'generation': generation_time, 'scatter': scatter_time,
+        'broadcast': shift_time, 'compute': compute_time,
+        'gather': gather_time, 'total': total_time})
+
+    # Collect timing data from all processes (max values)
+    generation_time = comm.allreduce(generation_time, op=MPI.MAX)
+    scatter_time = comm.allreduce(scatter_time, op=MPI.MAX)
+    shift_time = comm.allreduce(shift_time, op=MPI.MAX)
+    compute_time = comm.allreduce(compute_time, op=MPI.MAX)
+    gather_time = comm.allreduce(gather_time, op=MPI.MAX)
+    pool_startup_time = comm.allreduce(pool_startup_time, op=MPI.MAX)
+    total_time = comm.allreduce(total_time, op=MPI.MAX)
+
+    # Bytes moved per communication phase, summed over all ranks (padded
+    # tiles): the skew moves the A tiles of q - 1 grid rows and the B
+    # tiles of q - 1 grid columns, each of the q - 1 steps all tiles
+    tile_bytes = nb * nb * 8
+    phase_bytes = {
+        'scatter': 2 * size * tile_bytes if generation == 'root' else 0,
+        'broadcast': tile_bytes * (2 * q * (q - 1) + 2 * size * (q - 1)),
+        'gather': size * tile_bytes,
+    }
+    if not peak_gflops:
+        peak_gflops = measure_peak_gflops(comm, backend, n_workers,
+                                          blas_threads)
+    throughput = throughput_metrics(N, {
+        'scatter': scatter_time, 'broadcast': shift_time,
+        'compute': compute_time, 'gather': gather_time}, phase_bytes,
+        peak_gflops)
+
+    # Print summary and save results (shift time is reported as broadcast)
+    print_timing_summary(rank, "CANNON", size, n_workers, N,
+                        scatter_time, shift_time, compute_time,
+                        gather_time, total_time,
+                        title="CANNON'S ALGORITHM",
+                        broadcast_label="Shift Time",
+                        pool_startup_time=pool_startup_time,
+                        backend=backend, blas_threads=blas_threads,
+                        generation_time=generation_time,
+                        rank_stats=rank_stats, throughput=throughput,
+                        verification=verification)
+
+    # Save to CSV
+    results = None
+    if rank == 0:
+        results = {
+            'method': 'Cannon',
+            'n_processes': size,
+            'n_workers': n_workers,
+            'matrix_size': N,
+            'scatter_time': scatter_time,
+            'broadcast_time': shift_time,
+            'compute_time': compute_time,
+            'gather_time': gather_time,
+            'communication_time': scatter_time + shift_time + gather_time,
+            'total_time': total_time,
+            'pool_startup_time': pool_startup_time,
+            'backend': backend,
+            'generation': generation,
+            'generation_time': generation_time,
+            'compute_imbalance': rank_stats['compute']['imbalance'],
+            'slowest_rank': rank_stats['total']['slowest_rank']
+        }
+        results.update(throughput)
+        if verification is not None:
+            results.update(verification_fields(verification))
+
+        if save_csv:
+            csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                                    'results', 'cannon_results.csv')
+            save_results_to_csv(csv_path, results)
+            print(f"[Cannon] Results saved to {csv_path}")
+
+            # Per-rank timings next to it
+            save_rank_results_to_csv(
+                csv_path.replace('_results.csv', '_rank_results.csv'),
+                rank_rows, results)
+
+    return {
+        'scatter_time': scatter_time,
+        'broadcast_time': shift_time,
+        'compute_time': compute_time,
+        'gather_time': gather_time,
+        'total_time': total_time,
+        'pool_startup_time': pool_startup_time,
+        'generation_time': generation_time,
+        'phase_bytes': phase_bytes,
+        'peak_gflops': peak_gflops,
+        'verification': verification,
+        'csv_row': results,
+        'rank_rows': rank_rows
+    }
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Cannon's Algorithm Matrix Multiplication (MPI + Multiprocessing)"
+    )
+    parser.add_argument('--N', type=int, default=1024,
+                        help='Matrix dimension (default: 1024)')
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Number of local multiprocessing workers (default: 2)')
+    parser.add_argument('--simulate-failure', type=int, default=None,
+                        help='Simulate failure at specified rank (optional)')
+    parser.add_argument('--backend', choices=BACKENDS, default='processes',
+                        help='Local compute backend (default: processes)')
+    parser.add_argument('--generate', choices=GENERATION_MODES, default='root',
+                        help='Create inputs on rank 0 and scatter them, or '
+                             'generate them rank-locally (default: root)')
+    parser.add_argument('--peak-gflops', type=float, default=None,
+                        help='Peak GFLOP/s of all processes for the %% of '
+                             'peak (default: measured)')
+    parser.add_argument('--verify', action='store_true',
+                        help="Check C with Freivalds' randomized test on the "
+                             'local tiles after the run')
+    parser.add_argument('--verify-trials', type=int, default=2,
+                        help='Random vectors of the check (default: 2)')
+    parser.add_argument('--verify-tolerance', type=float,
+                        default=VERIFY_TOLERANCE,
+                        help='Safety factor c of the per-entry bound '
+                             'c·N·eps·|A|(|B||R|) of the check '
+                             f'(default: {VERIFY_TOLERANCE})')
+    parser.add_argument('--trace', default=None,
+                        help='Write a Chrome/Perfetto timeline of all ranks '
+                             'and workers to this .json file')
+    parser.add_argument('--auto', action='store_true',
+                        help='Choose workers and backend with the '
+                             'auto-tuner (cached in '
+                             'results/tuning_db.json)')
+
+    args = parser.parse_args()
+
+    # Run the computation
+    tracing.enable(args.trace is not None)
+    try:
+        if args.auto:
+            from autotune import tune_cli_args
+            tune_cli_args(args, 'cannon')
+        cannon_matmul(args.N, args.workers, args.simulate_failure,
+                      args.backend, args.generate,
+                      peak_gflops=args.peak_gflops, verify=args.verify,
+                      verify_trials=args.verify_trials,
+                      verify_tolerance=args.verify_tolerance)
+        if args.trace:
+            n_events = tracing.write_trace(MPI.COMM_WORLD, args.trace)
+            if n_events is not None:
+                print(f"[Cannon] Trace of {n_events} events written to "
+                      f"{args.trace}")
+    except ValueError as e:
+        # Raised identically on every rank before any communication
+        if MPI.COMM_WORLD.Get_rank() == 0:
+            print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        rank = MPI.COMM_WORLD.Get_rank()
+        print(f"[ERROR] Rank {rank}: {e}", file=sys.stderr)
+        MPI.COMM_WORLD.Abort(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,376 @@
+"""
+Dynamically scheduled Row Striping Matrix Multiplication using MPI + Multiprocessing.
+
+Static row striping gives every rank the same number of rows, so one slow
+or shared node sets the wall time. Here the rows of A are split into many
+small panels that the ranks claim one at a time: a shared counter on
+rank 0 is incremented with MPI one-sided atomics (Win.Fetch_and_op, a
+fetch-and-add in a passive-target epoch), so a rank that finishes early
+simply claims the next panel and rank 0 never has to answer requests.
+
+B is broadcast to all ranks as in row striping. The rows of a claimed
+panel are read from A on rank 0 with Win.Get (or generated in place with
+--generate local) and the finished rows of C are written straight into
+C on rank 0 with Win.Put, so there is no scatter or gather step. The
+number of panels each rank computed is reported in the summary and in
+the per-rank CSV.
+
+Usage:
+    mpirun -np <P> python matrix_dynamic.py --N 4096 --workers 4
+    mpirun -np <P> python matrix_dynamic.py --N 4096 --panels 256 --backend blas
+    mpirun -np <P> python matrix_dynamic.py --N 8192 --generate local
+"""
+
+import argparse
+import os
+import sys
+import numpy as np
+from mpi4py import MPI
+
+# Import utility functions
+sys.path.insert(0, os.path.dirname(__file__))
+from utils import (
+    now, phase_start, parallel_matmul_local, configure_local_compute,
+    ranks_per_node, local_buffer, create_test_matrices, philox_block, BACKENDS,
+    GENERATION_MODES, MATRIX_STREAMS,
+    save_results_to_csv, save_rank_results_to_csv, gather_rank_timings,
+    measure_peak_gflops, throughput_metrics, distribute_rows,
+    print_timing_summary
+)
+import tracing
+
+
+# Default number of panels per process: enough for fast ranks to take
+# over the work of slow ones, few enough to keep the panels BLAS-sized
+PANELS_PER_PROCESS = 8
+
+
+def _window(comm, memory, dtype=np.float64):
+    """Expose memory on rank 0 (and nothing elsewhere) in an RMA window."""
+    if comm.Get_rank() != 0:
+        memory = np.empty(0, dtype=dtype)
+    return MPI.Win.Create(memory, disp_unit=memory.itemsize, comm=comm)
+
+
+def dynamic_row_matmul(N, n_workers, n_panels=None,
+                       simulate_failure_rank=None, backend='processes',
+                       generation='root', seed=42, peak_gflops=None,
+                       save_csv=True):
+    """
+    Perform row striping with dynamically scheduled row panels.
+
+    Args:
+        N: Matrix dimension (N×N)
+        n_workers: Number of local multiprocessing workers
+        n_panels: Number of row panels (default: PANELS_PER_PROCESS per
+            process, at most N)
+        simulate_failure_rank: Rank to simulate failure (optional)
+        backend: Local compute backend ('processes', 'threads' or 'blas')
+        generation: 'root' creates A and B on rank 0, from where the
+            panels of A are fetched; 'local' lets every rank generate all
+            of B and the rows of the panels it claims
+        seed: Random seed of the synthetic matrices
+        peak_gflops: Peak GFLOP/s of all ranks for the percentage of peak
+            (default: measured with a short dgemm probe)
+        save_csv: Append the results to results/dynamic_results.csv
+
+    Returns:
+        Dictionary with timing results and, on rank 0, 'panel_counts'
+        (panels computed per rank), 'result' (C) and 'csv_row' (the CSV
+        record of the run)
+
+    Raises:
+        ValueError: if n_panels is not positive
+    """
+    comm = MPI.COMM_WORLD
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+
+    if n_panels is None:
+        n_panels = PANELS_PER_PROCESS * size
+    if n_panels < 1:
+        raise ValueError(f"Number of panels must be positive, got {n_panels}")
+    n_panels = min(n_panels, N)
+
+    # Simulate failure if requested
+    if simulate_failure_rank is not None and rank == simulate_failure_rank:
+        if rank == 0:
+            print(f"\n[SIMULATION] Rank {rank} simulating failure...")
+        comm.Barrier()
+        os._exit(1)
+
+    # Initialize timing variables
+    generation_time = 0.0
+    scatter_time = 0.0
+    broadcast_time = 0.0
+    compute_time = 0.0
+    gather_time = 0.0
+    schedule_time = 0.0
+
+    # Start total timing
+    t_start = now()
+
+    # Size BLAS threads and start the persistent local pool
+    # (timed separately from compute)
+    pool_startup_time, blas_threads = configure_local_compute(
+        backend, n_workers, ranks_per_node(comm))
+
+    if rank == 0:
+        print(f"\n[Dynamic] Starting with {size} processes, {n_workers} workers each")
+        print(f"[Dynamic] Matrix size: {N}×{N}, {n_panels} row panels, "
+              f"generation: {generation}")
+
+    # Receive buffers of the largest panel and of B (shared with local
+    # workers), so no panel is copied into the workspace again
+    max_rows = distribute_rows(N, n_panels, 0)[2]
+    A_panel = local_buffer('A', (max_rows, N), n_workers)
+    B = local_buffer('B', (N, N), n_workers)
+
+    t_gen_start = now()
+    if generation == 'local':
+        A = None
+        philox_block(N, seed, MATRIX_STREAMS['B'], 0, N, out=B)
+    elif rank == 0:
+        A, B_root = create_test_matrices(N, seed)
+        B[...] = B_root
+    else:
+        A = None
+    generation_time = now() - t_gen_start
+    tracing.record('generation', t_gen_start, t_gen_start + generation_time)
+
+    if generation == 'root':
+        # Broadcast matrix B
+        t_bcast_start = phase_start(comm)
+        comm.Bcast(B, root=0)
+        t_bcast_end = now()
+        tracing.record('broadcast', t_bcast_start, t_bcast_end)
+        broadcast_time = t_bcast_end - t_bcast_start
+
+    # Panel counter, A and C live on rank 0; every rank accesses them
+    # without rank 0's involvement for the rest of the run
+    t_window_start = now()
+    counter = np.zeros(1, dtype=np.int64)
+    C = np.empty((N, N), dtype=np.float64) if rank == 0 else None
+    counter_win = _window(comm, counter, np.int64)
+    c_win = _window(comm, C)
+    a_win = _window(comm, A) if generation == 'root' else None
+    windows = [win for win in (counter_win, c_win, a_win) if win is not None]
+    for win in windows:
+        win.Lock_all()
+    schedule_time += now() - t_window_start
+
+    one = np.ones(1, dtype=np.int64)
+    claimed = np.empty(1, dtype=np.int64)
+    panels_done = 0
+    while True:
+        # Claim the next panel
+        t_claim_start = now()
+        counter_win.Fetch_and_op(one, claimed, 0, op=MPI.SUM)
+        counter_win.Flush(0)
+        t_claim_end = now()
+        schedule_time += t_claim_end - t_claim_start
+        panel = int(claimed[0])
+        if panel >= n_panels:
+            break
+        start, end, count = distribute_rows(N, n_panels, panel)
+        A_rows = A_panel[:count]
+
+        # Its rows of A
+        t_fetch_start = now()
+        if generation == 'root':
+            a_win.Get(A_rows, 0, (start * N, count * N, MPI.DOUBLE))
+            a_win.Flush(0)
+            scatter_time += now() - t_fetch_start
+        else:
+            philox_block(N, seed, MATRIX_STREAMS['A'], start, end,
+                         out=A_rows)
+            generation_time += now() - t_fetch_start
+
+        t_compute_start = now()
+        C_rows = parallel_matmul_local(A_rows, B, n_workers, backend)
+        t_compute_end = now()
+        compute_time += t_compute_end - t_compute_start
+        tracing.record(f'compute panel {panel}', t_compute_start,
+                       t_compute_end, category='compute')
+
+        # Write the rows into C on rank 0 (completed before the next
+        # panel reuses the workspace)
+        c_win.Put(C_rows, 0, (start * N, count * N, MPI.DOUBLE))
+        c_win.Flush(0)
+        t_put_end = now()
+        gather_time += t_put_end - t_compute_end
+        tracing.record(f'panel {panel}', t_claim_start, t_put_end,
+                       category='mpi', track='panels')
+        panels_done += 1
+
+    # C is complete once every rank has closed its epoch
+    t_gather_start = now()
+    for win in windows:
+        win.Unlock_all()
+        win.Free()
+    comm.Barrier()
+    t_gather_end = now()
+    tracing.record('gather', t_gather_start, t_gather_end)
+    gather_time += t_gather_end - t_gather_start
+
+    # End total timing
+    t_end = now()
+    total_time = t_end - t_start
+
+    # Per-rank timings, before they are reduced to the maximum
+    rank_rows, rank_stats = gather_rank_timings(comm, {
+        'generation': generation_time, 'scatter': scatter_time,
+        'broadcast': broadcast_time, 'compute': compute_time,
+        'gather': gather_time, 'total': total_time})
+    panel_counts = comm.gather(panels_done, root=0)
+    if rank == 0:
+        for row, panels in zip(rank_rows, panel_counts):
+            row['panels'] = panels
+
+    # Collect timing data from all processes (max values)
+    generation_time = comm.allreduce(generation_time, op=MPI.MAX)
+    scatter_time = comm.allreduce(scatter_time, op=MPI.MAX)
+    broadcast_time = comm.allreduce(broadcast_time, op=MPI.MAX)
+    compute_time = comm.allreduce(compute_time, op=MPI.MAX)
+    gather_time = comm.allreduce(gather_time, op=MPI.MAX)
+    schedule_time = comm.allreduce(schedule_time, op=MPI.MAX)
+    pool_startup_time = comm.allreduce(pool_startup_time, op=MPI.MAX)
+    total_time = comm.allreduce(total_time, op=MPI.MAX)
+
+    # Bytes moved per communication phase, summed over all ranks (the
+    # panel reads of A are reported as scatter, the writes of C as gather)
+    matrix_bytes = N * N * 8
+    phase_bytes = {'scatter': 0, 'broadcast': 0, 'gather': matrix_bytes}
+    if generation == 'root':
+        phase_bytes['scatter'] = matrix_bytes
+        phase_bytes['broadcast'] = matrix_bytes * (size - 1)
+    if not peak_gflops:
+        peak_gflops = measure_peak_gflops(comm, backend, n_workers,
+                                          blas_threads)
+    throughput = throughput_metrics(N, {
+        'scatter': scatter_time, 'broadcast': broadcast_time,
+        'compute': compute_time, 'gather': gather_time}, phase_bytes,
+        peak_gflops)
+
+    # Print summary and save results
+    print_timing_summary(rank, "DYNAMIC", size, n_workers, N,
+                        scatter_time, broadcast_time, compute_time,
+                        gather_time, total_time,
+                        title="DYNAMIC ROW STRIPING",
+                        pool_startup_time=pool_startup_time,
+                        backend=backend, blas_threads=blas_threads,
+                        generation_time=generation_time,
+                        rank_stats=rank_stats, throughput=throughput,
+                        schedule_time=schedule_time,
+                        panel_counts=panel_counts)
+
+    # Save to CSV
+    results = None
+    if rank == 0:
+        results = {
+            'method': 'Dynamic',
+            'n_processes': size,
+            'n_workers': n_workers,
+            'matrix_size': N,
+            'scatter_time': scatter_time,
+            'broadcast_time': broadcast_time,
+            'compute_time': compute_time,
+            'gather_time': gather_time,
+            'communication_time': scatter_time + broadcast_time + gather_time,
+            'total_time': total_time,
+            'pool_startup_time': pool_startup_time,
+            'backend': backend,
+            'generation': generation,
+            'generation_time': generation_time,
+            'compute_imbalance': rank_stats['compute']['imbalance'],
+            'slowest_rank': rank_stats['total']['slowest_rank'],
+            'n_panels': n_panels,
+            'schedule_time': schedule_time,
+            'panels_min': min(panel_counts),
+            'panels_max': max(panel_counts)
+        }
+        results.update(throughput)
+
+        if save_csv:
+            csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                                    'results', 'dynamic_results.csv')
+            save_results_to_csv(csv_path, results)
+            print(f"[Dynamic] Results saved to {csv_path}")
+
+            # Per-rank timings and panel counts next to it
+            save_rank_results_to_csv(
+                csv_path.replace('_results.csv', '_rank_results.csv'),
+                rank_rows, results)
+
+    return {
+        'scatter_time': scatter_time,
+        'broadcast_time': broadcast_time,
+        'compute_time': compute_time,
+        'gather_time': gather_time,
+        'total_time': total_time,
+        'pool_startup_time': pool_startup_time,
+        'generation_time': generation_time,
+        'schedule_time': schedule_time,
+        'phase_bytes': phase_bytes,
+        'peak_gflops': peak_gflops,
+        'panel_counts': panel_counts,
+        'result': C if rank == 0 else None,
+        'csv_row': results,
+        'rank_rows': rank_rows
+    }
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Dynamically scheduled Row Striping Matrix Multiplication '
+                    '(MPI + Multiprocessing)'
+    )
+    parser.add_argument('--N', type=int, default=1024,
+                        help='Matrix dimension (default: 1024)')
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Number of local multiprocessing workers (default: 2)')
+    parser.add_argument('--panels', type=int, default=None,
+                        help='Number of row panels claimed one at a time '
+                             f'(default: {PANELS_PER_PROCESS} per process)')
+    parser.add_argument('--simulate-failure', type=int, default=None,
+                        help='Simulate failure at specified rank (optional)')
+    parser.add_argument('--backend', choices=BACKENDS, default='processes',
+                        help='Local compute backend (default: processes)')
+    parser.add_argument('--generate', choices=GENERATION_MODES, default='root',
+                        help='Create inputs on rank 0 and fetch panels from '
+                             'it, or generate them rank-locally (default: root)')
+    parser.add_argument('--peak-gflops', type=float, default=None,
+                        help='Peak GFLOP/s of all processes for the %% of '
+                             'peak (default: measured)')
+    parser.add_argument('--trace', default=None,
+                        help='Write a Chrome/Perfetto timeline of all ranks '
+                             'and workers to this .json file')
+
+    args = parser.parse_args()
+
+    # Run the computation
+    tracing.enable(args.trace is not None)
+    try:
+        dynamic_row_matmul(args.N, args.workers, n_panels=args.panels,
+                           simulate_failure_rank=args.simulate_failure,
+                           backend=args.backend, generation=args.generate,
+                           peak_gflops=args.peak_gflops)
+        if args.trace:
+            n_events = tracing.write_trace(MPI.COMM_WORLD, args.trace)
+            if n_events is not None:
+                print(f"[Dynamic] Trace of {n_events} events written to "
+                      f"{args.trace}")
+    except ValueError as e:
+        # Raised identically on every rank before any communication
+        if MPI.COMM_WORLD.Get_rank() == 0:
+            print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        rank = MPI.COMM_WORLD.Get_rank()
+        print(f"[ERROR] Rank {rank}: {e}", file=sys.stderr)
+        MPI.COMM_WORLD.Abort(1)
+
+
+if __name__ == '__main__':
+    main()
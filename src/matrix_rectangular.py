@@ -0,0 +1,467 @@
+"""
+Rectangular M×K by K×N Matrix Multiplication using MPI + Multiprocessing.
+
+The product is split over the processes in one of three ways:
+
+    rows   A is striped over M, B is broadcast, C is gathered by rows
+           (row striping; best for tall-skinny A)
+    cols   B is striped over N, A is broadcast, C is gathered by columns
+           (best for wide B)
+    inner  A and B are striped over K, every process computes a partial
+           M×N product and the partial products are summed with
+           Reduce_scatter (best for a large inner dimension)
+
+With split='auto' the split moving the fewest bytes on the critical path
+(binomial trees, ⌈log2 P⌉ steps, as in perf_model.py) is chosen from the
+shape, so e.g. M=10⁶, K=N=512 broadcasts the small B instead of the
+large A. Column and K slabs of row-major matrices are scattered as rows
+of the transpose.
+
+Usage:
+    mpirun -np <P> python matrix_rectangular.py --M 1000000 --K 512 --N 512
+    mpirun -np <P> python matrix_rectangular.py --M 512 --K 100000 --N 512 --workers 4
+    mpirun -np <P> python matrix_rectangular.py --M 4096 --K 256 --N 8192 --split cols
+"""
+
+import argparse
+import math
+import os
+import sys
+import numpy as np
+from mpi4py import MPI
+
+# Import utility functions
+sys.path.insert(0, os.path.dirname(__file__))
+from utils import (
+    now, phase_start, parallel_matmul_local, configure_local_compute,
+    ranks_per_node, local_buffer, create_test_matrices, philox_block, BACKENDS,
+    GENERATION_MODES, MATRIX_STREAMS,
+    save_results_to_csv, save_rank_results_to_csv, gather_rank_timings,
+    measure_peak_gflops, throughput_metrics, distribute_rows,
+    print_timing_summary
+)
+from distributed import DistributedMatrix
+import tracing
+
+
+# Ways to split the product over the processes (besides 'auto')
+SPLITS = ('rows', 'cols', 'inner')
+
+
+def split_costs(M, K, N, P, gather_result=True):
+    """
+    Estimate the bytes each split moves on the critical path.
+
+    Args:
+        M: Rows of A
+        K: Columns of A and rows of B
+        N: Columns of B
+        P: Number of MPI processes
+        gather_result: Whether C is gathered on rank 0
+
+    Returns:
+        Dictionary mapping each of SPLITS to its byte count
+    """
+    steps = math.ceil(math.log2(P)) if P > 1 else 0
+    spread = (P - 1) / P
+    gather = M * N * spread if gather_result else 0
+    return {
+        'rows': 8 * (M * K * spread + K * N * steps + gather),
+        'cols': 8 * (M * K * steps + K * N * spread + gather),
+        'inner': 8 * (M * K * spread + K * N * spread + M * N * spread
+                      + gather),
+    }
+
+
+def choose_split(M, K, N, P, gather_result=True):
+    """Return the split of SPLITS that moves the fewest bytes."""
+    costs = split_costs(M, K, N, P, gather_result)
+    return min(SPLITS, key=costs.__getitem__)
+
+
+def _counts(total, size, scale=1):
+    """Return Scatterv/Gatherv counts and displacements of a 1D split."""
+    parts = [distribute_rows(total, size, r) for r in range(size)]
+    counts = np.array([count * scale for _, _, count in parts], dtype=np.int64)
+    displs = np.array([start * scale for start, _, _ in parts], dtype=np.int64)
+    return counts, displs
+
+
+def rectangular_matmul(N, n_workers, M=None, K=None, split='auto',
+                       simulate_failure_rank=None, backend='processes',
+                       generation='root', seed=42, gather_result=True,
+                       peak_gflops=None, save_csv=True):
+    """
+    Perform an M×K by K×N matrix multiplication.
+
+    Args:
+        N: Columns of B and C
+        n_workers: Number of local multiprocessing workers
+        M: Rows of A and C (default: N)
+        K: Columns of A and rows of B (default: N)
+        split: 'rows', 'cols', 'inner' or 'auto' (see split_costs)
+        simulate_failure_rank: Rank to simulate failure (optional)
+        backend: Local compute backend ('processes', 'threads' or 'blas')
+        generation: 'root' creates A and B on rank 0 and distributes
+            them, 'local' lets every rank generate its slabs itself
+        seed: Random seed of the synthetic matrices
+        gather_result: Gather C on rank 0; if False, C stays distributed
+            and is returned as a DistributedMatrix under 'result'
+        peak_gflops: Peak GFLOP/s of all ranks for the percentage of peak
+            (default: measured with a short dgemm probe)
+        save_csv: Append the results to results/rectangular_results.csv
+
+    Returns:
+        Dictionary with timing results ('csv_row', the CSV record of the
+        run, on rank 0, and 'result', the distributed C, when gather_result
+        is False)
+
+    Raises:
+        ValueError: if a dimension is not positive or split is unknown
+    """
+    comm = MPI.COMM_WORLD
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+
+    M = N if M is None else M
+    K = N if K is None else K
+    if min(M, K, N) < 1:
+        raise ValueError(f"Dimensions must be positive, got M={M}, K={K}, "
+                         f"N={N}")
+    if split == 'auto':
+        split = choose_split(M, K, N, size, gather_result)
+    elif split not in SPLITS:
+        raise ValueError(f"Unknown split {split!r}, expected one of "
+                         f"{', '.join(SPLITS)} or auto")
+
+    # Simulate failure if requested
+    if simulate_failure_rank is not None and rank == simulate_failure_rank:
+        if rank == 0:
+            print(f"\n[SIMULATION] Rank {rank} simulating failure...")
+        comm.Barrier()
+        os._exit(1)
+
+    # Initialize timing variables
+    generation_time = 0.0
+    scatter_time = 0.0
+    broadcast_time = 0.0
+    compute_time = 0.0
+    gather_time = 0.0
+
+    # Start total timing
+    t_start = now()
+
+    # Size BLAS threads and start the persistent local pool
+    # (timed separately from compute)
+    pool_startup_time, blas_threads = configure_local_compute(
+        backend, n_workers, ranks_per_node(comm))
+
+    if rank == 0:
+        print(f"\n[Rectangular] Starting with {size} processes, {n_workers} workers each")
+        print(f"[Rectangular] {M}×{K} by {K}×{N}, split: {split}, "
+              f"generation: {generation}")
+
+    # This rank's slab of the split dimension
+    extent = {'rows': M, 'cols': N, 'inner': K}[split]
+    start, end, count = distribute_rows(extent, size, rank)
+    root_inputs = generation == 'root' and rank == 0
+
+    t_gen_start = now()
+    if root_inputs:
+        A, B = create_test_matrices(N, seed, 'philox', M=M, K=K)
+    if split == 'rows':
+        A_local = local_buffer('A', (count, K), n_workers)
+        B_local = local_buffer('B', (K, N), n_workers)
+        if generation == 'local':
+            philox_block(K, seed, MATRIX_STREAMS['A'], start, end, out=A_local)
+            philox_block(N, seed, MATRIX_STREAMS['B'], 0, K, out=B_local)
+        elif root_inputs:
+            B_local[...] = B
+    elif split == 'cols':
+        A_local = local_buffer('A', (M, K), n_workers)
+        if generation == 'local':
+            philox_block(K, seed, MATRIX_STREAMS['A'], 0, M, out=A_local)
+            B_local = philox_block(N, seed, MATRIX_STREAMS['B'], 0, K,
+                                   start, end)
+        else:
+            if root_inputs:
+                A_local[...] = A
+            # Columns of B arrive as rows of B^T
+            Bt_local = np.empty((count, K), dtype=np.float64)
+            B_local = Bt_local.T
+    else:
+        if generation == 'local':
+            A_local = philox_block(K, seed, MATRIX_STREAMS['A'], 0, M,
+                                   start, end)
+            B_local = philox_block(N, seed, MATRIX_STREAMS['B'], start, end)
+        else:
+            # Columns of A arrive as rows of A^T
+            At_local = np.empty((count, M), dtype=np.float64)
+            A_local = At_local.T
+            B_local = local_buffer('B', (count, N), n_workers)
+    generation_time = now() - t_gen_start
+    tracing.record('generation', t_gen_start, t_gen_start + generation_time)
+
+    if generation == 'root':
+        t_scatter_start = phase_start(comm)
+        if split == 'rows':
+            counts, displs = _counts(M, size, K)
+            send = [A, counts, displs, MPI.DOUBLE] if rank == 0 else None
+            comm.Scatterv(send, A_local, root=0)
+        elif split == 'cols':
+            counts, displs = _counts(N, size, K)
+            send = ([np.ascontiguousarray(B.T), counts, displs, MPI.DOUBLE]
+                    if rank == 0 else None)
+            comm.Scatterv(send, Bt_local, root=0)
+        else:
+            counts, displs = _counts(K, size, M)
+            send = ([np.ascontiguousarray(A.T), counts, displs, MPI.DOUBLE]
+                    if rank == 0 else None)
+            comm.Scatterv(send, At_local, root=0)
+            counts, displs = _counts(K, size, N)
+            send = [B, counts, displs, MPI.DOUBLE] if rank == 0 else None
+            comm.Scatterv(send, B_local, root=0)
+        t_scatter_end = now()
+        tracing.record('scatter', t_scatter_start, t_scatter_end)
+        scatter_time = t_scatter_end - t_scatter_start
+
+        if split != 'inner':
+            # The operand that is not split goes to everyone
+            t_bcast_start = phase_start(comm)
+            comm.Bcast(B_local if split == 'rows' else A_local, root=0)
+            t_bcast_end = now()
+            tracing.record('broadcast', t_bcast_start, t_bcast_end)
+            broadcast_time = t_bcast_end - t_bcast_start
+
+    # Local computation
+    t_compute_start = phase_start(comm)
+    C_local = parallel_matmul_local(A_local, B_local, n_workers, backend)
+    t_compute_end = now()
+    tracing.record('compute', t_compute_start, t_compute_end,
+                   category='compute')
+    compute_time = t_compute_end - t_compute_start
+
+    if split == 'inner':
+        # Sum the partial products; every rank keeps its rows of C
+        row_start, row_end, row_count = distribute_rows(M, size, rank)
+        C_rows = np.empty((row_count, N), dtype=np.float64)
+        t_reduce_start = phase_start(comm)
+        comm.Reduce_scatter(np.ascontiguousarray(C_local), C_rows,
+                            recvcounts=_counts(M, size, N)[0], op=MPI.SUM)
+        t_reduce_end = now()
+        tracing.record('reduce-scatter', t_reduce_start, t_reduce_end,
+                       track='mpi')
+        broadcast_time = t_reduce_end - t_reduce_start
+        C_local = C_rows
+        start, end = row_start, row_end
+
+    result = None
+    if gather_result:
+        if split == 'cols':
+            # Columns of C travel as rows of C^T
+            counts, displs = _counts(N, size, M)
+            sendbuf = np.ascontiguousarray(C_local.T)
+            C_t = np.empty((N, M), dtype=np.float64) if rank == 0 else None
+            recv = [C_t, counts, displs, MPI.DOUBLE] if rank == 0 else None
+        else:
+            counts, displs = _counts(M, size, N)
+            sendbuf = np.ascontiguousarray(C_local)
+            C = np.empty((M, N), dtype=np.float64) if rank == 0 else None
+            recv = [C, counts, displs, MPI.DOUBLE] if rank == 0 else None
+        t_gather_start = phase_start(comm)
+        comm.Gatherv(sendbuf, recv, root=0)
+        if split == 'cols' and rank == 0:
+            C = np.ascontiguousarray(C_t.T)
+        t_gather_end = now()
+        tracing.record('gather', t_gather_start, t_gather_end)
+        gather_time = t_gather_end - t_gather_start
+
+    # End total timing
+    t_end = now()
+    total_time = t_end - t_start
+
+    # Per-rank timings, before they are reduced to the maximum
+    rank_rows, rank_stats = gather_rank_timings(comm, {
+        'generation': generation_time, 'scatter': scatter_time,
+        'broadcast': broadcast_time, 'compute': compute_time,
+        'gather': gather_time, 'total': total_time})
+
+    # Collect timing data from all processes (max values)
+    generation_time = comm.allreduce(generation_time, op=MPI.MAX)
+    scatter_time = comm.allreduce(scatter_time, op=MPI.MAX)
+    broadcast_time = comm.allreduce(broadcast_time, op=MPI.MAX)
+    compute_time = comm.allreduce(compute_time, op=MPI.MAX)
+    gather_time = comm.allreduce(gather_time, op=MPI.MAX)
+    pool_startup_time = comm.allreduce(pool_startup_time, op=MPI.MAX)
+    total_time = comm.allreduce(total_time, op=MPI.MAX)
+
+    # Bytes moved per communication phase, summed over all ranks (the
+    # reduce-scatter of the inner split is reported as broadcast)
+    a_bytes, b_bytes, c_bytes = 8 * M * K, 8 * K * N, 8 * M * N
+    phase_bytes = {'scatter': 0, 'broadcast': 0,
+                   'gather': c_bytes if gather_result else 0}
+    if split == 'inner':
+        phase_bytes['broadcast'] = c_bytes * (size - 1)
+    if generation == 'root':
+        if split == 'rows':
+            phase_bytes['scatter'] = a_bytes
+            phase_bytes['broadcast'] = b_bytes * (size - 1)
+        elif split == 'cols':
+            phase_bytes['scatter'] = b_bytes
+            phase_bytes['broadcast'] = a_bytes * (size - 1)
+        else:
+            phase_bytes['scatter'] = a_bytes + b_bytes
+    flops = 2.0 * M * K * N
+    if not peak_gflops:
+        peak_gflops = measure_peak_gflops(comm, backend, n_workers,
+                                          blas_threads)
+    throughput = throughput_metrics(N, {
+        'scatter': scatter_time, 'broadcast': broadcast_time,
+        'compute': compute_time, 'gather': gather_time}, phase_bytes,
+        peak_gflops, flops=flops)
+
+    # Print summary and save results
+    print_timing_summary(rank, "RECTANGULAR", size, n_workers, N,
+                        scatter_time, broadcast_time, compute_time,
+                        gather_time, total_time,
+                        title=f"RECTANGULAR ({split.upper()} SPLIT)",
+                        broadcast_label=("Reduce-Scatter Time"
+                                         if split == 'inner'
+                                         else "Broadcast Time"),
+                        pool_startup_time=pool_startup_time,
+                        backend=backend, blas_threads=blas_threads,
+                        generation_time=generation_time,
+                        rank_stats=rank_stats, throughput=throughput,
+                        shape=(M, K, N))
+
+    # Keep C distributed instead of gathering it
+    if not gather_result:
+        if not C_local.flags.owndata:
+            C_local = C_local.copy()
+        if split == 'cols':
+            result = DistributedMatrix(comm, (M, N), C_local,
+                                       (0, M, start, end))
+        else:
+            result = DistributedMatrix.from_rows(comm, C_local, start, N)
+        checksum = result.checksum()
+        if rank == 0:
+            print(f"[Rectangular] C kept distributed: checksum "
+                  f"{checksum:.6e}")
+
+    # Save to CSV
+    results = None
+    if rank == 0:
+        results = {
+            'method': 'Rectangular',
+            'n_processes': size,
+            'n_workers': n_workers,
+            'matrix_size': N,
+            'scatter_time': scatter_time,
+            'broadcast_time': broadcast_time,
+            'compute_time': compute_time,
+            'gather_time': gather_time,
+            'communication_time': scatter_time + broadcast_time + gather_time,
+            'total_time': total_time,
+            'pool_startup_time': pool_startup_time,
+            'backend': backend,
+            'generation': generation,
+            'generation_time': generation_time,
+            'compute_imbalance': rank_stats['compute']['imbalance'],
+            'slowest_rank': rank_stats['total']['slowest_rank'],
+            'matrix_m': M,
+            'matrix_k': K,
+            'split': split
+        }
+        results.update(throughput)
+
+        if save_csv:
+            csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                                    'results', 'rectangular_results.csv')
+            save_results_to_csv(csv_path, results)
+            print(f"[Rectangular] Results saved to {csv_path}")
+
+            # Per-rank timings next to it
+            save_rank_results_to_csv(
+                csv_path.replace('_results.csv', '_rank_results.csv'),
+                rank_rows, results)
+
+    return {
+        'scatter_time': scatter_time,
+        'broadcast_time': broadcast_time,
+        'compute_time': compute_time,
+        'gather_time': gather_time,
+        'total_time': total_time,
+        'pool_startup_time': pool_startup_time,
+        'generation_time': generation_time,
+        'phase_bytes': phase_bytes,
+        'peak_gflops': peak_gflops,
+        'flops': flops,
+        'split': split,
+        'result': result,
+        'csv_row': results,
+        'rank_rows': rank_rows
+    }
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Rectangular Matrix Multiplication (MPI + Multiprocessing)'
+    )
+    parser.add_argument('--M', type=int, default=None,
+                        help='Rows of A (default: N)')
+    parser.add_argument('--K', type=int, default=None,
+                        help='Columns of A and rows of B (default: N)')
+    parser.add_argument('--N', type=int, default=1024,
+                        help='Columns of B (default: 1024)')
+    parser.add_argument('--split', choices=SPLITS + ('auto',), default='auto',
+                        help='Dimension to split over the processes '
+                             '(default: auto, fewest bytes moved)')
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Number of local multiprocessing workers (default: 2)')
+    parser.add_argument('--simulate-failure', type=int, default=None,
+                        help='Simulate failure at specified rank (optional)')
+    parser.add_argument('--backend', choices=BACKENDS, default='processes',
+                        help='Local compute backend (default: processes)')
+    parser.add_argument('--generate', choices=GENERATION_MODES, default='root',
+                        help='Create inputs on rank 0 and distribute them, '
+                             'or generate them rank-locally (default: root)')
+    parser.add_argument('--no-gather', action='store_true',
+                        help='Keep C distributed over the ranks instead of '
+                             'gathering it on rank 0')
+    parser.add_argument('--peak-gflops', type=float, default=None,
+                        help='Peak GFLOP/s of all processes for the %% of '
+                             'peak (default: measured)')
+    parser.add_argument('--trace', default=None,
+                        help='Write a Chrome/Perfetto timeline of all ranks '
+                             'and workers to this .json file')
+
+    args = parser.parse_args()
+
+    # Run the computation
+    tracing.enable(args.trace is not None)
+    try:
+        rectangular_matmul(args.N, args.workers, M=args.M, K=args.K,
+                           split=args.split,
+                           simulate_failure_rank=args.simulate_failure,
+                           backend=args.backend, generation=args.generate,
+                           gather_result=not args.no_gather,
+                           peak_gflops=args.peak_gflops)
+        if args.trace:
+            n_events = tracing.write_trace(MPI.COMM_WORLD, args.trace)
+            if n_events is not None:
+                print(f"[Rectangular] Trace of {n_events} events written "
+                      f"to {args.trace}")
+    except ValueError as e:
+        # Raised identically on every rank before any communication
+        if MPI.COMM_WORLD.Get_rank() == 0:
+            print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        rank = MPI.COMM_WORLD.Get_rank()
+        print(f"[ERROR] Rank {rank}: {e}", file=sys.stderr)
+        MPI.COMM_WORLD.Abort(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,13 @@ broadcasts matrix B to all processes, and uses multiprocessing for local computa
 Usage:
     mpirun -np <P> python matrix_row_striping.py --N 4096 --workers 4
     mpirun -np <P> python matrix_row_striping.py --N 1024 --workers 2 --simulate-failure 1
+    mpirun -np <P> python matrix_row_striping.py --N 4096 --workers 4 --backend threads
+    mpirun -np <P> python matrix_row_striping.py --N 4096 --workers 4 --pipeline-panels 8
+    mpirun -np <P> python matrix_row_striping.py --N 4096 --backend blas --shared-b
+    mpirun -np <P> python matrix_row_striping.py --N 4096 --workers 4 --hierarchical
+    mpirun -np <P> python matrix_row_striping.py --A a.npy --B b.npy --out c.npy
+    mpirun -np <P> python matrix_row_striping.py --N 8192 --no-gather
+    mpirun -np <P> python matrix_row_striping.py --N 4096 --verify
 """
 
 import argparse
@@ -18,12 +25,148 @@ from mpi4py import MPI
 # Import utility functions
 sys.path.insert(0, os.path.dirname(__file__))
 from utils import (
-    now, parallel_matmul_local, create_test_matrices,
-    save_results_to_csv, distribute_rows, print_timing_summary
+    now, phase_start, parallel_matmul_local, configure_local_compute,
+    ranks_per_node, local_buffer, create_test_matrices, philox_block, BACKENDS,
+    GENERATION_MODES, MATRIX_STREAMS,
+    save_results_to_csv, save_rank_results_to_csv, gather_rank_timings,
+    measure_peak_gflops, throughput_metrics,
+    distribute_rows, print_timing_summary,
+    StreamingGather, NodeTopology, freivalds_check,
+    verification_fields, in_shared_workspace, VERIFY_TOLERANCE
 )
+from mpi_io import read_npy_header, read_block, write_block
+from distributed import DistributedMatrix
+import tracing
 
 
-def row_striping_matmul(N, n_workers, simulate_failure_rank=None):
+def pipelined_bcast_matmul(comm, A_local, B, n_workers, backend, n_panels):
+    """
+    Broadcast B in column panels while multiplying the previous panel.
+    
+    B is split into n_panels column panels. The Ibcast of panel i+1 is
+    issued before panel i is multiplied, so the broadcast runs behind the
+    local computation instead of before it.
+    
+    Args:
+        comm: MPI communicator (root of the broadcast is rank 0)
+        A_local: Local rows of A
+        B: Full matrix B on rank 0 (ignored on other ranks)
+        n_workers: Number of local workers
+        backend: Local compute backend
+        n_panels: Number of column panels of B
+        
+    Returns:
+        tuple of (C_local, broadcast_time, compute_time, overlap_efficiency)
+        where broadcast_time is the exposed (not hidden) broadcast time and
+        overlap_efficiency the fraction of the panels' in-flight time that
+        was hidden behind computation
+    """
+    rank = comm.Get_rank()
+    rows, N = A_local.shape
+    n_panels = max(1, min(n_panels, N))
+    
+    # Contiguous panel buffers; rank 0 packs its columns of B into them
+    bounds = [distribute_rows(N, n_panels, i) for i in range(n_panels)]
+    panels = []
+    for start, end, count in bounds:
+        if rank == 0:
+            panels.append(np.ascontiguousarray(B[:, start:end]))
+        else:
+            panels.append(np.empty((N, count), dtype=np.float64))
+    
+    C_local = np.empty((rows, N), dtype=np.float64)
+    requests = [None] * n_panels
+    issued_at = [0.0] * n_panels
+    
+    broadcast_time = 0.0
+    compute_time = 0.0
+    in_flight_time = 0.0
+    
+    def issue(i):
+        issued_at[i] = now()
+        requests[i] = comm.Ibcast(panels[i], root=0)
+        return now() - issued_at[i]
+    
+    broadcast_time += issue(0)
+    for i, (start, end, count) in enumerate(bounds):
+        # Keep the next panel in flight while this one is multiplied
+        if i + 1 < n_panels:
+            broadcast_time += issue(i + 1)
+        
+        t_wait_start = now()
+        requests[i].Wait()
+        t_wait_end = now()
+        broadcast_time += t_wait_end - t_wait_start
+        in_flight_time += t_wait_end - issued_at[i]
+        # At most two panels are in flight, one track each
+        tracing.record(f'B panel {i}', issued_at[i], t_wait_end,
+                       category='mpi', track=f'mpi {i % 2}')
+        tracing.record(f'wait panel {i}', t_wait_start, t_wait_end,
+                       category='mpi')
+        
+        t_compute_start = now()
+        C_local[:, start:end] = parallel_matmul_local(A_local, panels[i],
+                                                      n_workers, backend)
+        t_compute_end = now()
+        compute_time += t_compute_end - t_compute_start
+        tracing.record(f'compute panel {i}', t_compute_start, t_compute_end,
+                       category='compute')
+    
+    if in_flight_time > 0:
+        overlap_efficiency = max(0.0, 1.0 - broadcast_time / in_flight_time)
+    else:
+        overlap_efficiency = 1.0
+    
+    return C_local, broadcast_time, compute_time, overlap_efficiency
+
+
+def streamed_row_matmul(A_local, B, n_workers, backend, n_chunks, gather,
+                        root_rows=None):
+    """
+    Compute the local rows chunk by chunk and stream each chunk to rank 0.
+    
+    Args:
+        A_local: Local rows of A
+        B: Full matrix B
+        n_workers: Number of local workers
+        backend: Local compute backend
+        n_chunks: Number of row chunks
+        gather: StreamingGather the finished chunks are handed to
+        root_rows: On rank 0, its own rows of the full result C
+        
+    Returns:
+        tuple of (C_local, compute_time)
+    """
+    rows = A_local.shape[0]
+    C_local = np.empty((rows, B.shape[1]), dtype=np.float64)
+    compute_time = 0.0
+    
+    for chunk in range(n_chunks):
+        start, end, _ = distribute_rows(rows, n_chunks, chunk)
+        
+        # Staging a chunk into the shared 'A' block only overwrites rows
+        # of chunks that are already done
+        t_compute_start = now()
+        C_local[start:end] = parallel_matmul_local(A_local[start:end], B,
+                                                   n_workers, backend)
+        t_compute_end = now()
+        compute_time += t_compute_end - t_compute_start
+        tracing.record(f'compute chunk {chunk}', t_compute_start,
+                       t_compute_end, category='compute')
+        
+        root_view = root_rows[start:end] if root_rows is not None else None
+        gather.send(chunk, C_local[start:end], root_view)
+    
+    return C_local, compute_time
+
+
+def row_striping_matmul(N, n_workers, simulate_failure_rank=None,
+                        backend='processes', generation='root', seed=42,
+                        pipeline_panels=0, stream_chunks=0, shared_b=False,
+                        hierarchical=False, a_path=None, b_path=None,
+                        out_path=None, gather_result=True, peak_gflops=None,
+                        save_csv=True, verify=False, verify_trials=2,
+                        verify_tolerance=VERIFY_TOLERANCE):
     """
     Perform matrix multiplication using row striping approach.
     
@@ -31,9 +174,46 @@ def row_striping_matmul(N, n_workers, simulate_failure_rank=None):
         N: Matrix dimension (N×N)
         n_workers: Number of local multiprocessing workers
         simulate_failure_rank: Rank to simulate failure (optional)
+        backend: Local compute backend ('processes', 'threads' or 'blas')
+        generation: 'root' creates A and B on rank 0 and scatters them,
+            'local' lets every rank generate its rows of A and B itself
+        seed: Random seed of the synthetic matrices
+        pipeline_panels: Split the broadcast of B into this many column
+            panels overlapped with computation (0 or 1: blocking Bcast)
+        stream_chunks: Compute the local rows in this many chunks and send
+            each to rank 0 as soon as it is done (0 or 1: Gatherv)
+        shared_b: Hold one copy of B per node in an MPI shared-memory
+            window and broadcast it among node leaders only (requires
+            backend 'threads' or 'blas', or a single worker: worker
+            processes cannot read the window and would copy B)
+        hierarchical: Run scatter, broadcast and gather in two levels
+            (node leaders across nodes, then shared memory within a node)
+        a_path: .npy file of A; every rank reads its rows with MPI-IO
+            instead of receiving them from rank 0 (N is taken from the file)
+        b_path: .npy file of B, read the same way
+        out_path: Write C collectively to this .npy file instead of
+            gathering it on rank 0
+        gather_result: Gather C on rank 0; if False, C stays distributed
+            and is returned as a DistributedMatrix under 'result'
+        peak_gflops: Peak GFLOP/s of all ranks for the percentage of peak
+            (default: measured with a short dgemm probe)
+        save_csv: Append the results to results/row_results.csv
+        verify: Check C with Freivalds' test on the local rows after the
+            timed run (see freivalds_check)
+        verify_trials: Number of random vectors of the check
+        verify_tolerance: Safety factor of the check's rounding bound
         
     Returns:
-        Dictionary with timing results
+        Dictionary with timing results ('csv_row', the CSV record of the
+        run, on rank 0, 'result', the distributed C, when gather_result
+        is False, and 'verification', the result of the check, when verify
+        is set)
+    
+    Raises:
+        ValueError: if pipelining is combined with streaming or shared B,
+            shared B with worker processes, streaming with hierarchical
+            collectives, an output file or a distributed result, or
+            the input files are missing or not matching square matrices
     """
     comm = MPI.COMM_WORLD
     rank = comm.Get_rank()
@@ -47,28 +227,110 @@ def row_striping_matmul(N, n_workers, simulate_failure_rank=None):
         os._exit(1)
     
     # Initialize timing variables
+    generation_time = 0.0
     scatter_time = 0.0
     broadcast_time = 0.0
     compute_time = 0.0
     gather_time = 0.0
+    inter_node_time = 0.0
+    intra_node_time = 0.0
+    
+    if a_path is not None or b_path is not None:
+        if a_path is None or b_path is None:
+            raise ValueError("--A and --B must be given together")
+        a_shape, _ = read_npy_header(comm, a_path)
+        b_shape, _ = read_npy_header(comm, b_path)
+        if a_shape[0] != a_shape[1] or a_shape != b_shape:
+            raise ValueError(f"A {a_shape} and B {b_shape} must be square "
+                             f"matrices of the same size")
+        N = a_shape[0]
+        generation = 'file'
+    
+    pipelined = generation == 'root' and pipeline_panels > 1
+    streaming = stream_chunks > 1
+    overlap_efficiency = None
+    gather_hidden_time = None
+    
+    if pipelined and streaming:
+        raise ValueError("--pipeline-panels and --stream-gather cannot be "
+                         "combined: rows are only final after the last panel")
+    if pipelined and shared_b:
+        raise ValueError("--pipeline-panels and --shared-b cannot be combined")
+    if shared_b and backend == 'processes' and n_workers > 1:
+        raise ValueError("--shared-b needs --backend threads or blas: worker "
+                         "processes would copy B out of the shared window")
+    if streaming and hierarchical:
+        raise ValueError("--stream-gather and --hierarchical cannot be combined")
+    if streaming and out_path is not None:
+        raise ValueError("--stream-gather and --out cannot be combined")
+    if streaming and not gather_result:
+        raise ValueError("--stream-gather and --no-gather cannot be combined")
     
     # Start total timing
     t_start = now()
     
-    # Rank 0 creates matrices
+    # Size BLAS threads and start the persistent local pool
+    # (timed separately from compute)
+    local_ranks = ranks_per_node(comm)
+    pool_startup_time, blas_threads = configure_local_compute(
+        backend, n_workers, local_ranks)
+    
+    # One copy of B per node instead of one per rank
+    topology = NodeTopology(comm) if shared_b or hierarchical else None
+    
     if rank == 0:
-        A, B = create_test_matrices(N)
         print(f"\n[Row Striping] Starting with {size} processes, {n_workers} workers each")
-        print(f"[Row Striping] Matrix size: {N}×{N}")
-    else:
-        A = None
-        B = np.empty((N, N), dtype=np.float64)
+        print(f"[Row Striping] Matrix size: {N}×{N}, generation: {generation}")
     
     # Calculate row distribution
     start_row, end_row, local_rows = distribute_rows(N, size, rank)
     
+    # Allocate receive buffer (shared with local workers)
+    A_local = local_buffer('A', (local_rows, N), n_workers)
+    
+    t_gen_start = now()
+    if generation == 'file':
+        # Inputs are read below, in place of the scatter and broadcast
+        A = None
+        if shared_b:
+            B = topology.shared_array((N, N))
+        else:
+            B = local_buffer('B', (N, N), n_workers)
+    elif generation == 'local':
+        # Every rank generates its own rows of A and all of B, so there
+        # is nothing to scatter or broadcast
+        A = None
+        philox_block(N, seed, MATRIX_STREAMS['A'], start_row, end_row,
+                     out=A_local)
+        if shared_b:
+            # Only the node leader fills the node's copy of B
+            B = topology.shared_array((N, N))
+            if topology.is_leader:
+                philox_block(N, seed, MATRIX_STREAMS['B'], 0, N, out=B)
+            topology.node_comm.Barrier()
+        else:
+            B = philox_block(N, seed, MATRIX_STREAMS['B'], 0, N,
+                             out=local_buffer('B', (N, N), n_workers))
+    elif rank == 0:
+        # Rank 0 creates matrices
+        A, B = create_test_matrices(N, seed)
+        if shared_b:
+            B_shared = topology.shared_array((N, N))
+            B_shared[...] = B
+            B = B_shared
+    else:
+        A = None
+        if shared_b:
+            B = topology.shared_array((N, N))
+        else:
+            # Pipelined mode receives B panel by panel instead
+            B = None if pipelined else local_buffer('B', (N, N), n_workers)
+    generation_time = now() - t_gen_start
+    tracing.record('generation', t_gen_start, t_gen_start + generation_time)
+    
     # Prepare send counts and displacements for Scatterv
-    if rank == 0:
+    # (the hierarchical collectives need them on every rank)
+    if rank == 0 or hierarchical:
         sendcounts = []
         displs = []
         for r in range(size):
@@ -81,58 +343,224 @@ def row_striping_matmul(N, n_workers, simulate_failure_rank=None):
         sendcounts = None
         displs = None
     
-    # Allocate receive buffer
-    A_local = np.empty((local_rows, N), dtype=np.float64)
-    
-    # Scatter rows of A
-    t_scatter_start = now()
-    comm.Scatterv([A, sendcounts, displs, MPI.DOUBLE], A_local, root=0)
-    t_scatter_end = now()
-    scatter_time = t_scatter_end - t_scatter_start
+    if generation == 'root':
+        # Scatter rows of A
+        t_scatter_start = phase_start(comm)
+        if hierarchical:
+            inter, intra = topology.scatterv(A, sendcounts, displs, A_local)
+            inter_node_time += inter
+            intra_node_time += intra
+        else:
+            comm.Scatterv([A, sendcounts, displs, MPI.DOUBLE], A_local, root=0)
+        t_scatter_end = now()
+        tracing.record('scatter', t_scatter_start, t_scatter_end)
+        scatter_time = t_scatter_end - t_scatter_start
+    elif generation == 'file':
+        # Every rank reads its own rows of A and all of B (with shared B,
+        # only node leaders read it); the read time is reported as scatter
+        t_scatter_start = phase_start(comm)
+        read_block(comm, a_path, A_local, start_row)
+        if shared_b and not topology.is_leader:
+            read_block(comm, b_path, B[:0])
+        else:
+            read_block(comm, b_path, B)
+        if shared_b:
+            topology.node_comm.Barrier()
+        t_scatter_end = now()
+        tracing.record('read inputs', t_scatter_start, t_scatter_end)
+        scatter_time = t_scatter_end - t_scatter_start
+        
+    # Streaming stages the chunks of A in place, keep the rows for the check
+    A_verify = A_local.copy() if verify and streaming else A_local
     
-    # Broadcast matrix B
-    t_bcast_start = now()
-    if rank == 0:
-        comm.Bcast(B, root=0)
+    if pipelined:
+        # Broadcast of B overlapped with local computation
+        C_local, broadcast_time, compute_time, overlap_efficiency = \
+            pipelined_bcast_matmul(comm, A_local, B, n_workers, backend,
+                                   pipeline_panels)
     else:
-        comm.Bcast(B, root=0)
-    t_bcast_end = now()
-    broadcast_time = t_bcast_end - t_bcast_start
-    
-    # Local computation using multiprocessing
-    t_compute_start = now()
-    C_local = parallel_matmul_local(A_local, B, n_workers)
-    t_compute_end = now()
-    compute_time = t_compute_end - t_compute_start
-    
+        if generation == 'root':
+            # Broadcast matrix B
+            t_bcast_start = phase_start(comm)
+            if shared_b:
+                topology.bcast_shared(B)
+                inter_node_time += now() - t_bcast_start
+            elif hierarchical:
+                inter, intra = topology.bcast(B)
+                inter_node_time += inter
+                intra_node_time += intra
+            else:
+                comm.Bcast(B, root=0)
+            t_bcast_end = now()
+            tracing.record('broadcast', t_bcast_start, t_bcast_end)
+            broadcast_time = t_bcast_end - t_bcast_start
+        
     # Gather results
-    if rank == 0:
+    if rank == 0 and out_path is None and gather_result:
         C = np.empty((N, N), dtype=np.float64)
     else:
         C = None
     
-    t_gather_start = now()
-    comm.Gatherv(C_local, [C, sendcounts, displs, MPI.DOUBLE], root=0)
-    t_gather_end = now()
-    gather_time = t_gather_end - t_gather_start
+    if streaming:
+        # Rank 0 pre-posts a receive for every chunk of every rank
+        if rank == 0:
+            recv_views = []
+            for r in range(size):
+                s, e, count = distribute_rows(N, size, r)
+                for chunk in range(stream_chunks):
+                    a, b, _ = distribute_rows(count, stream_chunks, chunk)
+                    recv_views.append((r, chunk, C[s + a:s + b]))
+            root_rows = C[start_row:end_row]
+        else:
+            recv_views = None
+            root_rows = None
+        gather = StreamingGather(comm, recv_views)
+        
+        # Local computation, each finished chunk is sent right away
+        C_local, compute_time = streamed_row_matmul(
+            A_local, B, n_workers, backend, stream_chunks, gather, root_rows)
+        
+        gather_time, gather_hidden_time = gather.finish()
+    else:
+        if not pipelined:
+            # Local computation using multiprocessing
+            t_compute_start = phase_start(comm)
+            C_local = parallel_matmul_local(A_local, B, n_workers, backend)
+            t_compute_end = now()
+            tracing.record('compute', t_compute_start, t_compute_end)
+            compute_time = t_compute_end - t_compute_start
+        
+        t_gather_start = phase_start(comm)
+        if out_path is not None:
+            # Each rank writes its rows straight into the output file
+            write_block(comm, out_path, (N, N), C_local, start_row)
+        elif gather_result:
+            if hierarchical:
+                inter, intra = topology.gatherv(C_local, sendcounts, displs, C)
+                inter_node_time += inter
+                intra_node_time += intra
+            else:
+                comm.Gatherv(C_local, [C, sendcounts, displs, MPI.DOUBLE],
+                             root=0)
+        t_gather_end = now()
+        tracing.record('gather', t_gather_start, t_gather_end)
+        gather_time = t_gather_end - t_gather_start
     
     # End total timing
     t_end = now()
     total_time = t_end - t_start
     
+    # Untimed check of C on the local rows (B is not held by every rank
+    # in pipelined mode, rank 0 forms B R then)
+    verification = None
+    if verify:
+        row_bounds = [distribute_rows(N, size, r)[0] for r in range(size)]
+        B_tile = None if pipelined else B[start_row:end_row]
+        verification = freivalds_check(
+            comm, MPI.COMM_SELF, comm, A_verify, B_tile, C_local,
+            row_bounds + [N], 0, trials=verify_trials, seed=seed + 1,
+            tolerance=verify_tolerance, B_root=B)
+    
+    # Copies of B in place after the input phases (one per node with
+    # shared B)
+    b_copies = size
+    if shared_b:
+        b_copies = comm.allreduce(int(topology.is_leader), op=MPI.SUM)
+    
+    if topology is not None:
+        topology.free()
+    
+    # Copies of B held by this rank: its own (with shared B, the node's
+    # window on the leader only), B and its packed panels on the root of
+    # the pipelined broadcast, the node's staging window of the
+    # hierarchical broadcast on the leader, and the workspace copy worker
+    # processes read when B is not already their shared block
+    rank_b_copies = int(topology.is_leader) if shared_b else 1
+    if pipelined and rank == 0:
+        rank_b_copies += 1
+    if (hierarchical and not shared_b and not pipelined
+            and generation == 'root' and topology.is_leader):
+        rank_b_copies += 1
+    if (backend == 'processes' and n_workers > 1
+            and (pipelined or not in_shared_workspace('B', B))):
+        rank_b_copies += 1
+    
+    # Memory held for B on this node
+    node_comm = comm.Split_type(MPI.COMM_TYPE_SHARED)
+    b_node_mib = (node_comm.allreduce(rank_b_copies, op=MPI.SUM)
+                  * N * N * 8 / 2**20)
+    node_comm.Free()
+    
+    # Per-rank timings, before they are reduced to the maximum
+    rank_rows, rank_stats = gather_rank_timings(comm, {
+        'generation': generation_time, 'scatter': scatter_time,
+        'broadcast': broadcast_time, 'compute': compute_time,
+        'gather': gather_time, 'total': total_time})
+    
     # Collect timing data from all processes (max values)
+    generation_time = comm.allreduce(generation_time, op=MPI.MAX)
     scatter_time = comm.allreduce(scatter_time, op=MPI.MAX)
     broadcast_time = comm.allreduce(broadcast_time, op=MPI.MAX)
     compute_time = comm.allreduce(compute_time, op=MPI.MAX)
     gather_time = comm.allreduce(gather_time, op=MPI.MAX)
+    pool_startup_time = comm.allreduce(pool_startup_time, op=MPI.MAX)
     total_time = comm.allreduce(total_time, op=MPI.MAX)
+    if overlap_efficiency is not None:
+        overlap_efficiency = comm.allreduce(overlap_efficiency, op=MPI.MIN)
+    if gather_hidden_time is not None:
+        gather_hidden_time = comm.allreduce(gather_hidden_time, op=MPI.MAX)
+    b_node_mib = comm.allreduce(b_node_mib, op=MPI.MAX)
+    inter_node_time = comm.allreduce(inter_node_time, op=MPI.MAX)
+    intra_node_time = comm.allreduce(intra_node_time, op=MPI.MAX)
+    level_times = (inter_node_time, intra_node_time) if hierarchical else None
+    
+    # Bytes moved per communication phase, summed over all ranks
+    matrix_bytes = N * N * 8
+    phase_bytes = {'scatter': 0, 'broadcast': 0, 'gather': 0}
+    if generation == 'root':
+        phase_bytes['scatter'] = matrix_bytes
+        phase_bytes['broadcast'] = matrix_bytes * (b_copies - 1)
+    elif generation == 'file':
+        # A once, B once per copy
+        phase_bytes['scatter'] = matrix_bytes * (1 + b_copies)
+    if out_path is not None or gather_result:
+        phase_bytes['gather'] = matrix_bytes
+    if not peak_gflops:
+        peak_gflops = measure_peak_gflops(comm, backend, n_workers,
+                                          blas_threads)
+    throughput = throughput_metrics(N, {
+        'scatter': scatter_time, 'broadcast': broadcast_time,
+        'compute': compute_time, 'gather': gather_time}, phase_bytes,
+        peak_gflops)
     
     # Print summary and save results
     print_timing_summary(rank, "ROW", size, n_workers, N,
                         scatter_time, broadcast_time, compute_time,
-                        gather_time, total_time)
+                        gather_time, total_time,
+                        pool_startup_time=pool_startup_time,
+                        backend=backend, blas_threads=blas_threads,
+                        generation_time=generation_time,
+                        overlap_efficiency=overlap_efficiency,
+                        gather_hidden_time=gather_hidden_time,
+                        b_node_mib=b_node_mib, level_times=level_times,
+                        rank_stats=rank_stats, throughput=throughput,
+                        verification=verification)
+    
+    # Keep C distributed instead of gathering it
+    result = None
+    if not gather_result:
+        # The processes backend returns a view of its reused workspace
+        if not C_local.flags.owndata:
+            C_local = C_local.copy()
+        result = DistributedMatrix.from_rows(comm, C_local, start_row, N)
+        checksum = result.checksum()
+        fro_norm = result.norm('fro')
+        if rank == 0:
+            print(f"[Row Striping] C kept distributed: checksum {checksum:.6e}, "
+                  f"Frobenius norm {fro_norm:.6e}")
     
     # Save to CSV
+    results = None
     if rank == 0:
         results = {
             'method': 'Row',
@@ -144,20 +572,57 @@ def row_striping_matmul(N, n_workers, simulate_failure_rank=None):
             'compute_time': compute_time,
             'gather_time': gather_time,
             'communication_time': scatter_time + broadcast_time + gather_time,
-            'total_time': total_time
+            'total_time': total_time,
+            'pool_startup_time': pool_startup_time,
+            'backend': backend,
+            'generation': generation,
+            'generation_time': generation_time,
+            'pipeline_panels': pipeline_panels if pipelined else 0,
+            'overlap_efficiency': overlap_efficiency,
+            'stream_chunks': stream_chunks if streaming else 0,
+            'gather_hidden_time': gather_hidden_time,
+            'shared_b': int(shared_b),
+            'b_node_mib': b_node_mib,
+            'hierarchical': int(hierarchical),
+            'inter_node_time': inter_node_time if hierarchical else '',
+            'intra_node_time': intra_node_time if hierarchical else '',
+            'compute_imbalance': rank_stats['compute']['imbalance'],
+            'slowest_rank': rank_stats['total']['slowest_rank']
         }
+        results.update(throughput)
+        if verification is not None:
+            results.update(verification_fields(verification))
         
-        csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
-                                'results', 'row_results.csv')
-        save_results_to_csv(csv_path, results)
-        print(f"[Row Striping] Results saved to {csv_path}")
+        if save_csv:
+            csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
+                                    'results', 'row_results.csv')
+            save_results_to_csv(csv_path, results)
+            print(f"[Row Striping] Results saved to {csv_path}")
+            
+            # Per-rank timings next to it
+            save_rank_results_to_csv(
+                csv_path.replace('_results.csv', '_rank_results.csv'),
+                rank_rows, results)
     
     return {
         'scatter_time': scatter_time,
         'broadcast_time': broadcast_time,
         'compute_time': compute_time,
         'gather_time': gather_time,
-        'total_time': total_time
+        'total_time': total_time,
+        'pool_startup_time': pool_startup_time,
+        'generation_time': generation_time,
+        'overlap_efficiency': overlap_efficiency,
+        'gather_hidden_time': gather_hidden_time,
+        'b_node_mib': b_node_mib,
+        'inter_node_time': inter_node_time,
+        'intra_node_time': intra_node_time,
+        'phase_bytes': phase_bytes,
+        'peak_gflops': peak_gflops,
+        'result': result,
+        'verification': verification,
+        'csv_row': results,
+        'rank_rows': rank_rows
     }
 
 
@@ -172,12 +637,80 @@ def main():
                         help='Number of local multiprocessing workers (default: 2)')
     parser.add_argument('--simulate-failure', type=int, default=None,
                         help='Simulate failure at specified rank (optional)')
+    parser.add_argument('--backend', choices=BACKENDS, default='processes',
+                        help='Local compute backend (default: processes)')
+    parser.add_argument('--generate', choices=GENERATION_MODES, default='root',
+                        help='Create inputs on rank 0 and scatter them, or '
+                             'generate them rank-locally (default: root)')
+    parser.add_argument('--pipeline-panels', type=int, default=0,
+                        help='Broadcast B in this many column panels with '
+                             'Ibcast overlapped with compute (default: 0, off)')
+    parser.add_argument('--stream-gather', type=int, default=0,
+                        help='Compute local rows in this many chunks and send '
+                             'each to rank 0 when done (default: 0, off)')
+    parser.add_argument('--A', default=None,
+                        help='Read A from this .npy file with MPI-IO '
+                             '(requires --B; overrides --N)')
+    parser.add_argument('--B', default=None,
+                        help='Read B from this .npy file with MPI-IO')
+    parser.add_argument('--out', default=None,
+                        help='Write C to this .npy file with MPI-IO instead '
+                             'of gathering it on rank 0')
+    parser.add_argument('--no-gather', action='store_true',
+                        help='Keep C distributed over the ranks instead of '
+                             'gathering it on rank 0')
+    parser.add_argument('--shared-b', action='store_true',
+                        help='Keep one copy of B per node in MPI shared '
+                             'memory, broadcast among node leaders only')
+    parser.add_argument('--hierarchical', action='store_true',
+                        help='Two-level scatter/broadcast/gather: across node '
+                             'leaders, then within each node')
+    parser.add_argument('--peak-gflops', type=float, default=None,
+                        help='Peak GFLOP/s of all processes for the %% of '
+                             'peak (default: measured)')
+    parser.add_argument('--verify', action='store_true',
+                        help="Check C with Freivalds' randomized test on the "
+                             'local rows after the run')
+    parser.add_argument('--verify-trials', type=int, default=2,
+                        help='Random vectors of the check (default: 2)')
+    parser.add_argument('--verify-tolerance', type=float,
+                        default=VERIFY_TOLERANCE,
+                        help='Safety factor c of the per-entry bound '
+                             'c·N·eps·|A|(|B||R|) of the check '
+                             f'(default: {VERIFY_TOLERANCE})')
+    parser.add_argument('--trace', default=None,
+                        help='Write a Chrome/Perfetto timeline of all ranks '
+                             'and workers to this .json file')
+    parser.add_argument('--auto', action='store_true',
+                        help='Choose workers and backend with the '
+                             'auto-tuner (cached in '
+                             'results/tuning_db.json)')
     
     args = parser.parse_args()
     
     # Run the computation
+    tracing.enable(args.trace is not None)
     try:
-        row_striping_matmul(args.N, args.workers, args.simulate_failure)
+        if args.auto:
+            from autotune import tune_cli_args
+            tune_cli_args(args, 'row')
+        row_striping_matmul(args.N, args.workers, args.simulate_failure,
+                            args.backend, args.generate,
+                            pipeline_panels=args.pipeline_panels,
+                            stream_chunks=args.stream_gather,
+                            shared_b=args.shared_b,
+                            hierarchical=args.hierarchical,
+                            a_path=args.A, b_path=args.B, out_path=args.out,
+                            gather_result=not args.no_gather,
+                            peak_gflops=args.peak_gflops,
+                            verify=args.verify,
+                            verify_trials=args.verify_trials,
+                            verify_tolerance=args.verify_tolerance)
+        if args.trace:
+            n_events = tracing.write_trace(MPI.COMM_WORLD, args.trace)
+            if n_events is not None:
+                print(f"[Row Striping] Trace of {n_events} events written "
+                      f"to {args.trace}")
     except Exception as e:
         rank = MPI.COMM_WORLD.Get_rank()
         print(f"[ERROR] Rank {rank}: {e}", file=sys.stderr)
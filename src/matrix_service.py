@@ -0,0 +1,235 @@
+"""
+Batch/service mode: many matrix multiplications per MPI launch.
+
+Rank 0 reads a job list (a file or stdin, one JSON object per line) and
+broadcasts the jobs one by one; all ranks then run them back to back in
+the same process, so MPI start-up, imports, the local worker pool and the
+shared-memory buffers are paid for once instead of once per job. Every
+run appends its timings to the usual results CSV of its strategy.
+
+Job format (one per line, blank lines and lines starting with # are
+skipped):
+    {"strategy": "row", "N": 2048, "workers": 4, "repetitions": 3}
+    {"strategy": "block", "N": 4096, "workers": 2, "panel_width": 128}
+    {"strategy": "cannon", "N": 4096, "backend": "blas"}
+    {"strategy": "sparse", "N": 8192, "density": 0.01}
+    {"strategy": "dynamic", "N": 8192, "n_panels": 256}
+    {"strategy": "rectangular", "N": 512, "M": 1000000, "K": 512}
+
+Any further keys are passed as keyword arguments to the strategy's
+function (e.g. backend, generation, seed, pipeline_panels, shared_b).
+
+With "strategy": "auto" the strategy, workers, backend and panel width
+come from the auto-tuner (an optional "strategies" list limits the
+candidates); keys given in the job still take precedence.
+
+Usage:
+    mpirun -np <P> python matrix_service.py --jobs jobs.jsonl
+    cat jobs.jsonl | mpirun -np <P> python matrix_service.py
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+from mpi4py import MPI
+
+# Import the strategies
+sys.path.insert(0, os.path.dirname(__file__))
+from utils import now
+import tracing
+from autotune import tune, strategy_options, tuned_split
+from matrix_row_striping import row_striping_matmul
+from matrix_block_striping import block_striping_matmul
+from matrix_cannon import cannon_matmul
+from matrix_sparse import sparse_striping_matmul
+from matrix_rectangular import rectangular_matmul
+from matrix_dynamic import dynamic_row_matmul
+
+
+# Job strategy -> function(N, n_workers, **options)
+STRATEGIES = {
+    'row': row_striping_matmul,
+    'block': block_striping_matmul,
+    'cannon': cannon_matmul,
+    'sparse': sparse_striping_matmul,
+    'rectangular': rectangular_matmul,
+    'dynamic': dynamic_row_matmul,
+}
+
+
+def parse_job(line):
+    """
+    Parse one line of the job list.
+
+    Args:
+        line: Line of text
+
+    Returns:
+        Job dictionary, None for blank/comment lines
+
+    Raises:
+        ValueError: if the line is not a valid job
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    try:
+        job = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON ({e})")
+    if not isinstance(job, dict):
+        raise ValueError("a job must be a JSON object")
+    if job.get('strategy') not in STRATEGIES and job.get('strategy') != 'auto':
+        raise ValueError(f"unknown strategy {job.get('strategy')!r}, "
+                         f"expected one of {sorted(STRATEGIES) + ['auto']}")
+    if 'N' not in job and 'a_path' not in job:
+        raise ValueError("a job needs N (or a_path/b_path)")
+    return job
+
+
+def read_jobs(stream):
+    """
+    Yield (line_number, job or error message) for every job in a stream.
+
+    Args:
+        stream: Open text file (or sys.stdin)
+    """
+    for line_number, line in enumerate(stream, start=1):
+        try:
+            job = parse_job(line)
+        except ValueError as e:
+            yield line_number, str(e)
+            continue
+        if job is not None:
+            yield line_number, job
+
+
+def run_job(job):
+    """
+    Run one job on all ranks.
+
+    Args:
+        job: Job dictionary from parse_job
+
+    Returns:
+        List of the timing dictionaries of all repetitions
+    """
+    options = dict(job)
+    strategy = options.pop('strategy')
+    N = options.pop('N', 0)
+    split = contextlib.nullcontext()
+    if strategy == 'auto':
+        decision = tune(MPI.COMM_WORLD, N, options.pop('strategies', None))
+        strategy = decision['strategy']
+        options = dict(strategy_options(decision), **options)
+        options.setdefault('workers', decision['n_workers'])
+        # Tuned work split for this job only
+        split = tuned_split(decision)
+    func = STRATEGIES[strategy]
+    n_workers = options.pop('workers', 2)
+    repetitions = options.pop('repetitions', 1)
+    with split:
+        return [func(N, n_workers, **options) for _ in range(repetitions)]
+
+
+def run_service(jobs_path=None):
+    """
+    Read and run jobs until the job list is exhausted.
+
+    Rank 0 reads the list and broadcasts one job at a time, so jobs can
+    be fed incrementally through stdin. Invalid jobs and jobs rejected
+    with a ValueError (raised identically on every rank before any
+    communication) are reported and skipped.
+
+    Args:
+        jobs_path: Job list file (default: stdin)
+
+    Returns:
+        Tuple of (jobs run, jobs failed)
+    """
+    comm = MPI.COMM_WORLD
+    rank = comm.Get_rank()
+
+    jobs = None
+    if rank == 0:
+        stream = open(jobs_path) if jobs_path else sys.stdin
+        jobs = read_jobs(stream)
+
+    n_done = 0
+    n_failed = 0
+    t_start = now()
+    while True:
+        item = next(jobs, None) if rank == 0 else None
+        item = comm.bcast(item, root=0)
+        if item is None:
+            break
+        line_number, job = item
+
+        if isinstance(job, str):
+            if rank == 0:
+                print(f"[Service] Job on line {line_number} skipped: {job}",
+                      file=sys.stderr)
+            n_failed += 1
+            continue
+
+        if rank == 0:
+            print(f"\n[Service] Job on line {line_number}: {json.dumps(job)}")
+        try:
+            t_job_start = now()
+            runs = run_job(job)
+            tracing.record(f'job line {line_number}', t_job_start,
+                           category='service', track='jobs',
+                           job=json.dumps(job))
+        except (ValueError, TypeError) as e:
+            if rank == 0:
+                print(f"[Service] Job on line {line_number} failed: {e}",
+                      file=sys.stderr)
+            n_failed += 1
+            continue
+        n_done += 1
+
+        if rank == 0:
+            totals = ', '.join(f"{r['total_time']:.6f}" for r in runs)
+            print(f"[Service] Job on line {line_number} done, total time "
+                  f"per repetition: {totals} s")
+
+    if rank == 0:
+        if jobs_path:
+            stream.close()
+        print(f"\n[Service] {n_done} jobs run, {n_failed} failed, "
+              f"{now() - t_start:.3f} s elapsed")
+    return n_done, n_failed
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Run many matrix multiplication jobs in one MPI launch'
+    )
+    parser.add_argument('--jobs', default=None,
+                        help='JSON-lines job list (default: read from stdin)')
+    parser.add_argument('--trace', default=None,
+                        help='Write a Chrome/Perfetto timeline of all jobs '
+                             'to this .json file')
+
+    args = parser.parse_args()
+    tracing.enable(args.trace is not None)
+
+    try:
+        _, n_failed = run_service(args.jobs)
+        if args.trace:
+            n_events = tracing.write_trace(MPI.COMM_WORLD, args.trace)
+            if n_events is not None:
+                print(f"[Service] Trace of {n_events} events written to "
+                      f"{args.trace}")
+    except Exception as e:
+        rank = MPI.COMM_WORLD.Get_rank()
+        print(f"[ERROR] Rank {rank}: {e}", file=sys.stderr)
+        MPI.COMM_WORLD.Abort(1)
+    sys.exit(1 if n_failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,395 @@
+"""
+Sparse (CSR) × Dense Matrix Multiplication using MPI + Multiprocessing.
+
+A is kept in CSR form and partitioned by rows so that every process gets
+about the same number of nonzeros (distribute_nnz) instead of the same
+number of rows. Only the indptr, indices and data arrays of each part
+are scattered, so distributing A and computing the product scale with
+nnz rather than N². B is dense and broadcast (or generated rank-locally);
+the local rows are multiplied with scipy.sparse on the worker pool.
+
+Usage:
+    mpirun -np <P> python matrix_sparse.py --N 8192 --density 0.01 --workers 4
+    mpirun -np <P> python matrix_sparse.py --A a.npz --generate local
+    mpirun -np <P> python matrix_sparse.py --N 8192 --no-gather
+
+Requires scipy.
+"""
+
+import argparse
+import os
+import sys
+import numpy as np
+from mpi4py import MPI
+
+# Import utility functions
+sys.path.insert(0, os.path.dirname(__file__))
+from utils import (
+    now, phase_start, sparse_matmul_local, configure_local_compute,
+    ranks_per_node, local_buffer, philox_block, BACKENDS, GENERATION_MODES,
+    MATRIX_STREAMS,
+    save_results_to_csv, save_rank_results_to_csv, gather_rank_timings,
+    measure_peak_gflops, throughput_metrics, distribute_nnz,
+    print_timing_summary
+)
+from distributed import DistributedMatrix
+import tracing
+
+try:
+    import scipy.sparse as sparse
+except ImportError:
+    sparse = None
+
+
+def sparse_test_matrix(N, density, seed=42):
+    """
+    Create a random sparse N×N test matrix in CSR form.
+
+    Args:
+        N: Matrix dimension
+        density: Fraction of nonzero elements
+        seed: Random seed
+
+    Returns:
+        scipy.sparse CSR matrix with float64 values in [0, 1)
+    """
+    rng = np.random.default_rng(seed)
+    return sparse.random(N, N, density=density, format='csr',
+                         dtype=np.float64, random_state=rng)
+
+
+def sparse_striping_matmul(N, n_workers, simulate_failure_rank=None,
+                           backend='processes', generation='root', seed=42,
+                           density=0.05, a_path=None, gather_result=True,
+                           peak_gflops=None, save_csv=True):
+    """
+    Perform sparse × dense matrix multiplication with nnz-balanced rows.
+
+    Args:
+        N: Matrix dimension (N×N)
+        n_workers: Number of local multiprocessing workers
+        simulate_failure_rank: Rank to simulate failure (optional)
+        backend: Local compute backend ('processes', 'threads' or 'blas')
+        generation: 'root' creates B on rank 0 and broadcasts it, 'local'
+            lets every rank generate B itself (A is always scattered)
+        seed: Random seed of the synthetic matrices
+        density: Fraction of nonzeros of the synthetic A
+        a_path: .npz file of a scipy.sparse matrix to use as A (read on
+            rank 0; N is taken from the file)
+        gather_result: Gather C on rank 0; if False, C stays distributed
+            and is returned as a DistributedMatrix under 'result'
+        peak_gflops: Peak GFLOP/s of all ranks for the percentage of peak
+            (default: measured with a short dgemm probe)
+        save_csv: Append the results to results/sparse_results.csv
+
+    Returns:
+        Dictionary with timing results ('csv_row', the CSV record of the
+        run, on rank 0, and 'result', the distributed C, when gather_result
+        is False)
+
+    Raises:
+        ValueError: if scipy is not installed or A is not square
+    """
+    comm = MPI.COMM_WORLD
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+
+    if sparse is None:
+        raise ValueError("The sparse strategy needs scipy "
+                         "(pip install scipy)")
+
+    # Simulate failure if requested
+    if simulate_failure_rank is not None and rank == simulate_failure_rank:
+        if rank == 0:
+            print(f"\n[SIMULATION] Rank {rank} simulating failure...")
+        comm.Barrier()
+        os._exit(1)
+
+    # Initialize timing variables
+    generation_time = 0.0
+    scatter_time = 0.0
+    broadcast_time = 0.0
+    compute_time = 0.0
+    gather_time = 0.0
+
+    # Start total timing
+    t_start = now()
+
+    # Size BLAS threads and start the persistent local pool
+    # (timed separately from compute)
+    pool_startup_time, blas_threads = configure_local_compute(
+        backend, n_workers, ranks_per_node(comm))
+
+    t_gen_start = now()
+    A = None
+    shape = None
+    if rank == 0:
+        try:
+            if a_path is not None:
+                A = sparse.load_npz(a_path).tocsr()
+            else:
+                A = sparse_test_matrix(N, density, seed)
+            A.sum_duplicates()
+            shape = A.shape
+        except (OSError, ValueError) as e:
+            shape = str(e)
+    shape = comm.bcast(shape, root=0)
+    if isinstance(shape, str):
+        raise ValueError(f"Cannot create A: {shape}")
+    if shape[0] != shape[1]:
+        raise ValueError(f"A {shape} must be a square matrix")
+    N = shape[0]
+
+    if generation == 'local' or rank == 0:
+        B = philox_block(N, seed, MATRIX_STREAMS['B'], 0, N,
+                         out=local_buffer('B', (N, N), n_workers))
+    else:
+        B = local_buffer('B', (N, N), n_workers)
+    generation_time = now() - t_gen_start
+    tracing.record('generation', t_gen_start, t_gen_start + generation_time)
+
+    # nnz-balanced row bounds, known to every rank
+    layout = None
+    if rank == 0:
+        bounds = distribute_nnz(A.indptr, size)
+        layout = (bounds, A.indptr[bounds].astype(np.int64))
+    bounds, nnz_bounds = comm.bcast(layout, root=0)
+    start_row, end_row = int(bounds[rank]), int(bounds[rank + 1])
+    local_rows = end_row - start_row
+    nnz_counts = np.diff(nnz_bounds)
+    local_nnz = int(nnz_counts[rank])
+    nnz = int(nnz_bounds[-1])
+
+    if rank == 0:
+        print(f"\n[Sparse] Starting with {size} processes, {n_workers} workers each")
+        print(f"[Sparse] Matrix size: {N}×{N}, nnz: {nnz} "
+              f"({nnz / (N * N):.2%}), generation: {generation}")
+
+    # Scatter the CSR arrays of A; every rank receives the pointers of
+    # its own rows and appends the end pointer from nnz_bounds
+    indptr = np.empty(local_rows + 1, dtype=np.int64)
+    indices = np.empty(local_nnz, dtype=np.int32)
+    data = np.empty(local_nnz, dtype=np.float64)
+    if rank == 0:
+        indptr_send = [A.indptr.astype(np.int64), bounds[1:] - bounds[:-1],
+                       bounds[:-1], MPI.INT64_T]
+        indices_send = [A.indices.astype(np.int32), nnz_counts,
+                        nnz_bounds[:-1], MPI.INT32_T]
+        data_send = [A.data, nnz_counts, nnz_bounds[:-1], MPI.DOUBLE]
+    else:
+        indptr_send = indices_send = data_send = None
+
+    t_scatter_start = phase_start(comm)
+    comm.Scatterv(indptr_send, indptr[:local_rows], root=0)
+    comm.Scatterv(indices_send, indices, root=0)
+    comm.Scatterv(data_send, data, root=0)
+    indptr[-1] = nnz_bounds[rank + 1]
+    indptr -= nnz_bounds[rank]
+    A_local = sparse.csr_matrix((data, indices, indptr),
+                                shape=(local_rows, N))
+    t_scatter_end = now()
+    tracing.record('scatter', t_scatter_start, t_scatter_end, nnz=local_nnz)
+    scatter_time = t_scatter_end - t_scatter_start
+
+    if generation == 'root':
+        t_bcast_start = phase_start(comm)
+        comm.Bcast(B, root=0)
+        t_bcast_end = now()
+        tracing.record('broadcast', t_bcast_start, t_bcast_end)
+        broadcast_time = t_bcast_end - t_bcast_start
+
+    # Local computation
+    t_compute_start = phase_start(comm)
+    C_local = sparse_matmul_local(A_local, B, n_workers, backend)
+    t_compute_end = now()
+    tracing.record('compute', t_compute_start, t_compute_end,
+                   category='compute', nnz=local_nnz)
+    compute_time = t_compute_end - t_compute_start
+
+    result = None
+    if gather_result:
+        if rank == 0:
+            C = np.empty((N, N), dtype=np.float64)
+            counts = (bounds[1:] - bounds[:-1]) * N
+            recv = [C, counts, bounds[:-1] * N, MPI.DOUBLE]
+        else:
+            recv = None
+        t_gather_start = phase_start(comm)
+        comm.Gatherv(np.ascontiguousarray(C_local), recv, root=0)
+        t_gather_end = now()
+        tracing.record('gather', t_gather_start, t_gather_end)
+        gather_time = t_gather_end - t_gather_start
+
+    # End total timing
+    t_end = now()
+    total_time = t_end - t_start
+
+    # Per-rank timings, before they are reduced to the maximum
+    rank_rows, rank_stats = gather_rank_timings(comm, {
+        'generation': generation_time, 'scatter': scatter_time,
+        'broadcast': broadcast_time, 'compute': compute_time,
+        'gather': gather_time, 'total': total_time})
+
+    # Collect timing data from all processes (max values)
+    generation_time = comm.allreduce(generation_time, op=MPI.MAX)
+    scatter_time = comm.allreduce(scatter_time, op=MPI.MAX)
+    broadcast_time = comm.allreduce(broadcast_time, op=MPI.MAX)
+    compute_time = comm.allreduce(compute_time, op=MPI.MAX)
+    gather_time = comm.allreduce(gather_time, op=MPI.MAX)
+    pool_startup_time = comm.allreduce(pool_startup_time, op=MPI.MAX)
+    total_time = comm.allreduce(total_time, op=MPI.MAX)
+
+    # Bytes moved per communication phase, summed over all ranks: the
+    # CSR arrays of A (8-byte row pointers, 4-byte indices, 8-byte values)
+    matrix_bytes = N * N * 8
+    phase_bytes = {
+        'scatter': (N + size) * 8 + nnz * 12,
+        'broadcast': matrix_bytes * (size - 1) if generation == 'root' else 0,
+        'gather': matrix_bytes if gather_result else 0,
+    }
+    flops = 2.0 * nnz * N
+    if not peak_gflops:
+        peak_gflops = measure_peak_gflops(comm, backend, n_workers,
+                                          blas_threads)
+    throughput = throughput_metrics(N, {
+        'scatter': scatter_time, 'broadcast': broadcast_time,
+        'compute': compute_time, 'gather': gather_time}, phase_bytes,
+        peak_gflops, flops=flops)
+
+    # Print summary and save results
+    print_timing_summary(rank, "SPARSE", size, n_workers, N,
+                        scatter_time, broadcast_time, compute_time,
+                        gather_time, total_time,
+                        title="SPARSE (CSR) STRIPING",
+                        pool_startup_time=pool_startup_time,
+                        backend=backend, blas_threads=blas_threads,
+                        generation_time=generation_time,
+                        rank_stats=rank_stats, throughput=throughput)
+    if rank == 0:
+        print(f"[Sparse] nnz per rank: min {nnz_counts.min()}, "
+              f"max {nnz_counts.max()} (imbalance "
+              f"{nnz_counts.max() / max(nnz_counts.mean(), 1):.3f})")
+
+    # Keep C distributed instead of gathering it
+    if not gather_result:
+        if not C_local.flags.owndata:
+            C_local = C_local.copy()
+        result = DistributedMatrix.from_rows(comm, C_local, start_row, N)
+        checksum = result.checksum()
+        if rank == 0:
+            print(f"[Sparse] C kept distributed: checksum {checksum:.6e}")
+
+    # Save to CSV
+    results = None
+    if rank == 0:
+        results = {
+            'method': 'Sparse',
+            'n_processes': size,
+            'n_workers': n_workers,
+            'matrix_size': N,
+            'scatter_time': scatter_time,
+            'broadcast_time': broadcast_time,
+            'compute_time': compute_time,
+            'gather_time': gather_time,
+            'communication_time': scatter_time + broadcast_time + gather_time,
+            'total_time': total_time,
+            'pool_startup_time': pool_startup_time,
+            'backend': backend,
+            'generation': generation,
+            'generation_time': generation_time,
+            'compute_imbalance': rank_stats['compute']['imbalance'],
+            'slowest_rank': rank_stats['total']['slowest_rank'],
+            'density': nnz / (N * N),
+            'nnz': nnz
+        }
+        results.update(throughput)
+
+        if save_csv:
+            csv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                                    'results', 'sparse_results.csv')
+            save_results_to_csv(csv_path, results)
+            print(f"[Sparse] Results saved to {csv_path}")
+
+            # Per-rank timings next to it
+            save_rank_results_to_csv(
+                csv_path.replace('_results.csv', '_rank_results.csv'),
+                rank_rows, results)
+
+    return {
+        'scatter_time': scatter_time,
+        'broadcast_time': broadcast_time,
+        'compute_time': compute_time,
+        'gather_time': gather_time,
+        'total_time': total_time,
+        'pool_startup_time': pool_startup_time,
+        'generation_time': generation_time,
+        'phase_bytes': phase_bytes,
+        'peak_gflops': peak_gflops,
+        'flops': flops,
+        'result': result,
+        'csv_row': results,
+        'rank_rows': rank_rows
+    }
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Sparse (CSR) × Dense Matrix Multiplication '
+                    '(MPI + Multiprocessing)'
+    )
+    parser.add_argument('--N', type=int, default=1024,
+                        help='Matrix dimension (default: 1024)')
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Number of local multiprocessing workers (default: 2)')
+    parser.add_argument('--density', type=float, default=0.05,
+                        help='Fraction of nonzeros of the synthetic A '
+                             '(default: 0.05)')
+    parser.add_argument('--simulate-failure', type=int, default=None,
+                        help='Simulate failure at specified rank (optional)')
+    parser.add_argument('--backend', choices=BACKENDS, default='processes',
+                        help='Local compute backend (default: processes)')
+    parser.add_argument('--generate', choices=GENERATION_MODES, default='root',
+                        help='Create B on rank 0 and broadcast it, or '
+                             'generate it rank-locally (default: root)')
+    parser.add_argument('--A', default=None,
+                        help='Read A from this scipy.sparse .npz file '
+                             '(overrides --N and --density)')
+    parser.add_argument('--no-gather', action='store_true',
+                        help='Keep C distributed over the ranks instead of '
+                             'gathering it on rank 0')
+    parser.add_argument('--peak-gflops', type=float, default=None,
+                        help='Peak GFLOP/s of all processes for the %% of '
+                             'peak (default: measured)')
+    parser.add_argument('--trace', default=None,
+                        help='Write a Chrome/Perfetto timeline of all ranks '
+                             'and workers to this .json file')
+
+    args = parser.parse_args()
+
+    # Run the computation
+    tracing.enable(args.trace is not None)
+    try:
+        sparse_striping_matmul(args.N, args.workers, args.simulate_failure,
+                               args.backend, args.generate,
+                               density=args.density, a_path=args.A,
+                               gather_result=not args.no_gather,
+                               peak_gflops=args.peak_gflops)
+        if args.trace:
+            n_events = tracing.write_trace(MPI.COMM_WORLD, args.trace)
+            if n_events is not None:
+                print(f"[Sparse] Trace of {n_events} events written to "
+                      f"{args.trace}")
+    except ValueError as e:
+        # Raised identically on every rank
+        if MPI.COMM_WORLD.Get_rank() == 0:
+            print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        rank = MPI.COMM_WORLD.Get_rank()
+        print(f"[ERROR] Rank {rank}: {e}", file=sys.stderr)
+        MPI.COMM_WORLD.Abort(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Parallel .npy input/output with collective MPI-IO.
+
+Every rank reads (or writes) only its own row slab or tile of a matrix
+stored as a float64, C-ordered .npy file, so real inputs and results
+never have to pass through rank 0.
+"""
+
+import numpy as np
+from mpi4py import MPI
+
+
+def read_npy_header(comm, path):
+    """
+    Read the header of a .npy matrix on rank 0 and share it.
+
+    Args:
+        comm: MPI communicator
+        path: Path of the .npy file
+
+    Returns:
+        tuple of (shape, data_offset) where data_offset is the byte offset
+        of the first element
+
+    Raises:
+        ValueError: if the file is not a 2D float64 C-ordered array
+    """
+    header = None
+    if comm.Get_rank() == 0:
+        try:
+            with open(path, 'rb') as f:
+                version = np.lib.format.read_magic(f)
+                if version == (1, 0):
+                    read_header = np.lib.format.read_array_header_1_0
+                else:
+                    read_header = np.lib.format.read_array_header_2_0
+                shape, fortran_order, dtype = read_header(f)
+                offset = f.tell()
+            if len(shape) != 2 or fortran_order or dtype != np.dtype('<f8'):
+                header = ValueError(f"{path}: expected a 2D float64 C-ordered "
+                                    f"array, got shape {shape}, dtype {dtype}, "
+                                    f"fortran_order={fortran_order}")
+            else:
+                header = (tuple(shape), offset)
+        except (OSError, ValueError) as e:
+            header = ValueError(f"{path}: {e}")
+    header = comm.bcast(header, root=0)
+    if isinstance(header, Exception):
+        raise header
+    return header
+
+
+def write_npy_header(comm, path, shape):
+    """
+    Create a .npy file for a float64 matrix and return its data offset.
+
+    Rank 0 writes the header (truncating an existing file); the data is
+    then written collectively with write_block.
+
+    Args:
+        comm: MPI communicator
+        path: Path of the .npy file
+        shape: Matrix shape
+
+    Returns:
+        Byte offset of the first element
+    """
+    offset = None
+    if comm.Get_rank() == 0:
+        with open(path, 'wb') as f:
+            np.lib.format.write_array_header_1_0(
+                f, {'descr': '<f8', 'fortran_order': False,
+                    'shape': tuple(shape)})
+            offset = f.tell()
+    return comm.bcast(offset, root=0)
+
+
+def _block_view(fh, offset, shape, block_shape, row_start, col_start):
+    """
+    Set a file view selecting one block of a row-major matrix.
+
+    Returns the filetype to free afterwards (None for full-width slabs,
+    which are addressed by offset instead).
+    """
+    rows, cols = block_shape
+    if cols == shape[1] or rows * cols == 0:
+        fh.Set_view(offset + row_start * shape[1] * 8, MPI.DOUBLE, MPI.DOUBLE)
+        return None
+    filetype = MPI.DOUBLE.Create_subarray(list(shape), [rows, cols],
+                                          [row_start, col_start])
+    filetype.Commit()
+    fh.Set_view(offset, MPI.DOUBLE, filetype)
+    return filetype
+
+
+def read_block(comm, path, out, row_start=0, col_start=0):
+    """
+    Collectively read one block of a .npy matrix on every rank.
+
+    Full-width row slabs are contiguous in the file; narrower tiles are
+    described by a subarray file view, so each rank issues one collective
+    read either way.
+
+    Args:
+        comm: MPI communicator (all ranks must call)
+        path: Path of the .npy file
+        out: Contiguous float64 buffer shaped like the block
+        row_start: First matrix row of the block
+        col_start: First matrix column of the block
+
+    Returns:
+        out, filled with the block
+    """
+    shape, offset = read_npy_header(comm, path)
+    fh = MPI.File.Open(comm, path, MPI.MODE_RDONLY)
+    filetype = _block_view(fh, offset, shape, out.shape, row_start, col_start)
+    fh.Read_all(out)
+    fh.Close()
+    if filetype is not None:
+        filetype.Free()
+    return out
+
+
+def write_block(comm, path, shape, block, row_start=0, col_start=0):
+    """
+    Collectively write one block per rank into a new .npy matrix.
+
+    Args:
+        comm: MPI communicator (all ranks must call)
+        path: Path of the .npy file
+        shape: Shape of the full matrix
+        block: Contiguous float64 block of this rank
+        row_start: First matrix row of the block
+        col_start: First matrix column of the block
+    """
+    offset = write_npy_header(comm, path, shape)
+    fh = MPI.File.Open(comm, path, MPI.MODE_WRONLY | MPI.MODE_CREATE)
+    filetype = _block_view(fh, offset, shape, block.shape, row_start,
+                           col_start)
+    fh.Write_all(block)
+    fh.Close()
+    if filetype is not None:
+        filetype.Free()
@@ -0,0 +1,322 @@
+"""
+Microbenchmark of the MPI collectives used by the strategies.
+
+Times Scatterv, Bcast, Gatherv, Sendrecv and Allreduce on their own for
+message sizes from 8 B to 1 GB, with the buffer layouts of the striping
+modules: Scatterv/Gatherv split the float64 buffer into contiguous row
+blocks with distribute_rows (as row striping does), Bcast sends the whole
+buffer from rank 0, Sendrecv shifts it one rank around a ring with
+Sendrecv_replace (as Cannon's skew and steps do) and Allreduce sums it.
+Every sample is taken after a barrier and is the maximum over all ranks.
+
+One CSV row per (operation, P, size) records median, min, standard
+deviation and 95% confidence interval together with the MPI library and
+host fingerprint, so a slower collective can be told apart from a slower
+algorithm. perf_model.py --microbench fits its latency and bandwidth to
+this file. With --sweep, one launch also times sub-communicators of the
+first 2, 4, 8, ... ranks (comm.Split), so the fit sees several P.
+
+Usage:
+    mpirun -np <P> python mpi_microbench.py
+    mpirun -np <P> python mpi_microbench.py --max-bytes 64M --operations bcast,scatterv
+    mpirun -np <P> python mpi_microbench.py --sweep
+    mpirun -np <P> python mpi_microbench.py --sweep 2,6,12
+"""
+
+import argparse
+import os
+import sys
+import numpy as np
+from mpi4py import MPI
+
+sys.path.insert(0, os.path.dirname(__file__))
+from utils import (
+    now, distribute_rows, host_fingerprint, summarize_timings,
+    save_results_to_csv
+)
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Default output file
+DEFAULT_CSV_PATH = os.path.join(PROJECT_ROOT, 'results',
+                                'mpi_microbench.csv')
+
+OPERATIONS = ('scatterv', 'bcast', 'gatherv', 'sendrecv', 'allreduce')
+
+MICROBENCH_FIELDNAMES = ['operation', 'n_processes', 'message_bytes',
+                         'repetitions', 'time_median', 'time_min', 'time_std',
+                         'time_ci95', 'bandwidth', 'mpi_library', 'host']
+
+# Bytes moved per size before the repetitions are cut down (at least
+# MIN_REPETITIONS samples are always taken)
+REPETITION_BUDGET = 256 << 20
+MIN_REPETITIONS = 3
+
+_UNITS = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+
+
+def parse_bytes(text):
+    """
+    Parse a byte count with an optional K, M or G suffix (powers of 1024).
+
+    Raises:
+        ValueError: if text is not a byte count
+    """
+    text = text.strip().upper().rstrip('B')
+    unit = text[-1:] if text[-1:] in _UNITS else ''
+    try:
+        value = int(text[:len(text) - len(unit)])
+    except ValueError:
+        raise ValueError(f"Invalid byte count {text!r}") from None
+    return value * _UNITS[unit]
+
+
+def message_sizes(min_bytes, max_bytes, factor):
+    """Return the geometric series of message sizes from min to max bytes."""
+    if min_bytes < 8 or max_bytes < min_bytes or factor < 2:
+        raise ValueError("Need 8 <= min-bytes <= max-bytes and factor >= 2")
+    sizes = []
+    size = min_bytes
+    while size <= max_bytes:
+        sizes.append(size)
+        size *= factor
+    return sizes
+
+
+def sweep_counts(size, text='pow2'):
+    """
+    Return the process counts of a sweep over sub-communicators.
+
+    Args:
+        size: Number of processes of the launch
+        text: 'pow2' for 2, 4, 8, ... below size followed by size, or
+            comma-separated counts
+
+    Returns:
+        Sorted list of distinct process counts
+
+    Raises:
+        ValueError: if a count is not between 1 and size
+    """
+    if text == 'pow2':
+        counts = [1 << k for k in range(1, size.bit_length())] + [size]
+    else:
+        try:
+            counts = [int(c) for c in text.split(',')]
+        except ValueError:
+            raise ValueError(f"Invalid process counts {text!r}") from None
+    for count in counts:
+        if not 1 <= count <= size:
+            raise ValueError(f"Process count {count} outside 1..{size}")
+    return sorted(set(counts))
+
+
+def _collective(comm, operation, n_elements):
+    """
+    Allocate the buffers of one operation and return a callable running it.
+
+    Args:
+        comm: MPI communicator
+        operation: One of OPERATIONS
+        n_elements: Number of float64 elements of the full buffer
+
+    Returns:
+        Zero-argument function performing the operation once
+    """
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+    counts = [distribute_rows(n_elements, size, r)[2] for r in range(size)]
+    displs = [distribute_rows(n_elements, size, r)[0] for r in range(size)]
+    root_only = operation in ('scatterv', 'gatherv')
+    full = np.ones(n_elements) if rank == 0 or not root_only else None
+
+    if operation == 'scatterv':
+        local = np.empty(counts[rank])
+        return lambda: comm.Scatterv([full, counts, displs, MPI.DOUBLE],
+                                     local, root=0)
+    if operation == 'gatherv':
+        local = np.ones(counts[rank])
+        return lambda: comm.Gatherv(local, [full, counts, displs, MPI.DOUBLE],
+                                    root=0)
+    if operation == 'bcast':
+        return lambda: comm.Bcast(full, root=0)
+    if operation == 'sendrecv':
+        dest, source = (rank + 1) % size, (rank - 1) % size
+        return lambda: comm.Sendrecv_replace(full, dest=dest, source=source)
+    if operation == 'allreduce':
+        result = np.empty_like(full)
+        return lambda: comm.Allreduce(full, result, op=MPI.SUM)
+    raise ValueError(f"Unknown operation {operation!r}, expected one of "
+                     f"{', '.join(OPERATIONS)}")
+
+
+def time_collective(comm, operation, message_bytes, repetitions, warmup=2):
+    """
+    Time one operation at one message size (collective).
+
+    Args:
+        comm: MPI communicator
+        operation: One of OPERATIONS
+        message_bytes: Size of the full buffer in bytes
+        repetitions: Maximum number of measured samples
+        warmup: Number of unmeasured calls
+
+    Returns:
+        tuple of (statistics from summarize_timings, number of samples)
+    """
+    run = _collective(comm, operation, max(1, message_bytes // 8))
+    for _ in range(warmup):
+        run()
+    repetitions = max(MIN_REPETITIONS,
+                      min(repetitions, REPETITION_BUDGET // message_bytes))
+    samples = np.empty(repetitions)
+    for i in range(repetitions):
+        comm.Barrier()
+        t_start = now()
+        run()
+        samples[i] = now() - t_start
+    comm.Allreduce(MPI.IN_PLACE, samples, op=MPI.MAX)
+    return summarize_timings(samples.tolist()), repetitions
+
+
+def run_microbench(comm, operations, sizes, repetitions):
+    """
+    Time all operations at all message sizes (collective).
+
+    Args:
+        comm: MPI communicator
+        operations: Operations to time (from OPERATIONS)
+        sizes: Message sizes in bytes
+        repetitions: Maximum number of samples per point
+
+    Returns:
+        List of CSV records (the same on every rank)
+    """
+    size = comm.Get_size()
+    library = MPI.Get_library_version().splitlines()[0].strip()
+    host = host_fingerprint(comm)
+    records = []
+    for operation in operations:
+        for message_bytes in sizes:
+            stats, samples = time_collective(comm, operation, message_bytes,
+                                             repetitions)
+            median = stats['median']
+            records.append({
+                'operation': operation,
+                'n_processes': size,
+                'message_bytes': message_bytes,
+                'repetitions': samples,
+                'time_median': median,
+                'time_min': stats['min'],
+                'time_std': stats['std'],
+                'time_ci95': stats['ci95'],
+                'bandwidth': message_bytes / median / 1e9 if median > 0 else '',
+                'mpi_library': library,
+                'host': host,
+            })
+            if comm.Get_rank() == 0:
+                print(f"  {operation:<10}{message_bytes:>14} B"
+                      f"{median * 1e6:>14.2f} us"
+                      f"{records[-1]['bandwidth'] or 0:>12.3f} GB/s")
+    return records
+
+
+def run_sweep(comm, operations, sizes, repetitions, counts):
+    """
+    Run the microbenchmark on sub-communicators of growing size (collective).
+
+    For every count P the first P ranks of comm are split off and time
+    all operations; the other ranks wait in the next comm.Split. Many MPI
+    libraries poll while waiting, so launch at most one rank per core.
+
+    Args:
+        comm: MPI communicator
+        operations: Operations to time (from OPERATIONS)
+        sizes: Message sizes in bytes
+        repetitions: Maximum number of samples per point
+        counts: Process counts from sweep_counts
+
+    Returns:
+        List of CSV records of all counts on rank 0 (the records of the
+        counts a rank took part in on the other ranks)
+    """
+    rank = comm.Get_rank()
+    records = []
+    for count in counts:
+        sub = comm.Split(0 if rank < count else MPI.UNDEFINED, rank)
+        if sub == MPI.COMM_NULL:
+            continue
+        if rank == 0:
+            print(f"[Microbench] P={count}")
+        records.extend(run_microbench(sub, operations, sizes, repetitions))
+        sub.Free()
+    return records
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Time the MPI collectives across message sizes'
+    )
+    parser.add_argument('--operations', default=','.join(OPERATIONS),
+                        help='Comma-separated operations '
+                             f'(default: {",".join(OPERATIONS)})')
+    parser.add_argument('--min-bytes', default='8',
+                        help='Smallest message, K/M/G suffixes allowed '
+                             '(default: 8)')
+    parser.add_argument('--max-bytes', default='1G',
+                        help='Largest message (default: 1G)')
+    parser.add_argument('--factor', type=int, default=4,
+                        help='Ratio of consecutive sizes (default: 4)')
+    parser.add_argument('--repetitions', type=int, default=50,
+                        help='Maximum samples per point, fewer for large '
+                             'messages (default: 50)')
+    parser.add_argument('--sweep', nargs='?', const='pow2', default=None,
+                        help='Also time sub-communicators of the first '
+                             '2, 4, 8, ... ranks, or of the given '
+                             'comma-separated counts (default: only P)')
+    parser.add_argument('--output', default=DEFAULT_CSV_PATH,
+                        help='CSV file (default: results/mpi_microbench.csv)')
+
+    args = parser.parse_args()
+    comm = MPI.COMM_WORLD
+    rank = comm.Get_rank()
+
+    try:
+        operations = args.operations.split(',')
+        for operation in operations:
+            if operation not in OPERATIONS:
+                raise ValueError(f"Unknown operation {operation!r}, expected "
+                                 f"one of {', '.join(OPERATIONS)}")
+        sizes = message_sizes(parse_bytes(args.min_bytes),
+                              parse_bytes(args.max_bytes), args.factor)
+        counts = (sweep_counts(comm.Get_size(), args.sweep) if args.sweep
+                  else [comm.Get_size()])
+        if rank == 0:
+            print(f"\n[Microbench] P={','.join(map(str, counts))}, "
+                  f"{len(sizes)} sizes from {sizes[0]} B to {sizes[-1]} B")
+        if args.sweep:
+            records = run_sweep(comm, operations, sizes, args.repetitions,
+                                counts)
+        else:
+            records = run_microbench(comm, operations, sizes,
+                                     args.repetitions)
+        if rank == 0:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)),
+                        exist_ok=True)
+            save_results_to_csv(args.output, records,
+                                fieldnames=MICROBENCH_FIELDNAMES)
+            print(f"[Microbench] Results saved to {args.output}")
+    except ValueError as e:
+        # Raised identically on every rank
+        if rank == 0:
+            print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"[ERROR] Rank {rank}: {e}", file=sys.stderr)
+        comm.Abort(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,447 @@
+"""
+Analytical alpha-beta-gamma performance model of the strategies.
+
+Every phase is modelled as
+
+    time = alpha * messages + beta * bytes + gamma * flops
+
+where messages and bytes are those on the critical path of the collective
+(binomial trees, ⌈log2 P⌉ steps) and flops those of the busiest rank.
+alpha (latency) and beta (inverse bandwidth) are fitted over the
+scatter, broadcast and gather timings of all plain runs in the results
+CSV files; gamma (time per flop) is fitted from the compute timings per
+strategy, local backend and worker count, as these set the rate of the
+local multiply. With --microbench, alpha and beta come from the
+collective timings of mpi_microbench.py instead. The fitted model
+predicts the phase times for P and N that have not been run. Matrix
+generation and pool start-up are not modelled, so predictions compare
+with the sum of the modelled phases (measured_phases), not total_time.
+
+Usage:
+    python perf_model.py
+    python perf_model.py --N 8192,16384 --P 16,64,256
+    python perf_model.py --microbench results/mpi_microbench.csv
+"""
+
+import argparse
+import csv
+import glob
+import math
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+from utils import calculate_process_grid
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modelled phases (the total is their sum)
+MODEL_PHASES = ('scatter', 'broadcast', 'compute', 'gather')
+
+# Results CSV method column -> strategy name
+METHOD_NAMES = {'Row': 'row', 'Block': 'block', 'Cannon': 'cannon'}
+
+# SUMMA panel width assumed when a run did not record one
+DEFAULT_PANEL_WIDTH = 256
+
+
+def _log2(P):
+    """Return the number of steps of a binomial tree over P processes."""
+    return math.ceil(math.log2(P)) if P > 1 else 0
+
+
+def phase_terms(method, N, P, panel_width=DEFAULT_PANEL_WIDTH):
+    """
+    Return the cost terms of every phase of one run.
+
+    Args:
+        method: 'row', 'block' or 'cannon'
+        N: Matrix dimension
+        P: Number of MPI processes
+        panel_width: SUMMA panel width (block only)
+
+    Returns:
+        Dictionary mapping each of MODEL_PHASES to (messages, bytes, flops)
+
+    Raises:
+        ValueError: if method is unknown
+    """
+    steps = _log2(P)
+    matrix_bytes = 8.0 * N * N
+    # Root-based Scatterv/Gatherv: ⌈log2 P⌉ steps, (P-1)/P of the data
+    spread = matrix_bytes * (P - 1) / P
+
+    if method == 'row':
+        rows = -(-N // P)
+        return {
+            'scatter': (steps, spread, 0.0),
+            'broadcast': (steps, steps * matrix_bytes, 0.0),
+            'compute': (0, 0.0, 2.0 * rows * N * N),
+            'gather': (steps, spread, 0.0),
+        }
+    if method == 'block':
+        pr, pc = calculate_process_grid(P)
+        width = max(1, min(panel_width, N))
+        n_panels = -(-N // width)
+        row_steps, col_steps = _log2(pc), _log2(pr)
+        return {
+            'scatter': (steps, 2 * spread, 0.0),
+            'broadcast': (n_panels * (row_steps + col_steps),
+                          matrix_bytes * (row_steps / pr + col_steps / pc),
+                          0.0),
+            'compute': (0, 0.0, 2.0 * -(-N // pr) * -(-N // pc) * N),
+            'gather': (steps, spread, 0.0),
+        }
+    if method == 'cannon':
+        q = math.isqrt(P)
+        nb = -(-N // q)
+        tile_bytes = 8.0 * nb * nb
+        # Skew plus q - 1 steps, each shifting an A and a B tile
+        shifts = 2 * q if q > 1 else 0
+        return {
+            'scatter': (steps, 2 * spread, 0.0),
+            'broadcast': (shifts, shifts * tile_bytes, 0.0),
+            'compute': (0, 0.0, 2.0 * q * nb ** 3),
+            'gather': (steps, spread, 0.0),
+        }
+    raise ValueError(f"Unknown method {method!r}, expected row, block or "
+                     f"cannon")
+
+
+def collective_terms(operation, message_bytes, P):
+    """
+    Return the critical-path cost terms of one microbenchmarked collective.
+
+    The terms are counted as in phase_terms, so alpha and beta fitted to
+    them carry over to the strategy phases.
+
+    Args:
+        operation: 'scatterv', 'bcast', 'gatherv', 'sendrecv' or
+            'allreduce' (see mpi_microbench.py)
+        message_bytes: Size of the full buffer in bytes
+        P: Number of MPI processes
+
+    Returns:
+        tuple of (messages, bytes)
+
+    Raises:
+        ValueError: if operation is unknown
+    """
+    steps = _log2(P)
+    if operation in ('scatterv', 'gatherv'):
+        return steps, message_bytes * (P - 1) / P
+    if operation == 'bcast':
+        return steps, steps * message_bytes
+    if operation == 'sendrecv':
+        return (1, message_bytes) if P > 1 else (0, 0.0)
+    if operation == 'allreduce':
+        # Reduce then broadcast along the same tree
+        return 2 * steps, 2 * steps * message_bytes
+    raise ValueError(f"Unknown operation {operation!r}")
+
+
+def _number(value):
+    """Return value as a float, None if it is empty or not a number."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def load_runs(results_dir=None):
+    """
+    Read all runs from the results CSV files.
+
+    Args:
+        results_dir: Directory of the CSV files (default: results/)
+
+    Returns:
+        List of row dictionaries
+    """
+    results_dir = results_dir or os.path.join(PROJECT_ROOT, 'results')
+    runs = []
+    for path in sorted(glob.glob(os.path.join(results_dir, '*_results.csv'))):
+        if path.endswith('_rank_results.csv'):
+            continue
+        with open(path, newline='') as f:
+            runs.extend(csv.DictReader(f))
+    return runs
+
+
+def load_microbench(path):
+    """Read the records of an mpi_microbench.py CSV file."""
+    with open(path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def fit_microbench(records):
+    """
+    Fit alpha and beta to the collective timings of mpi_microbench.py.
+
+    Scatterv, Bcast, Gatherv and Sendrecv are used (Allreduce also adds
+    reduction work). Sizes span several orders of magnitude, so the
+    relative error is minimised; otherwise the largest messages alone
+    would decide the fit and the latency would be lost.
+
+    Args:
+        records: Row dictionaries from load_microbench
+
+    Returns:
+        tuple of (alpha in s, beta in s/byte)
+
+    Raises:
+        ValueError: if there are no usable records
+    """
+    rows, times = [], []
+    for record in records:
+        P = _number(record.get('n_processes'))
+        nbytes = _number(record.get('message_bytes'))
+        t = _number(record.get('time_median'))
+        if (record.get('operation') == 'allreduce' or not P or not nbytes
+                or not t):
+            continue
+        messages, moved = collective_terms(record['operation'], nbytes,
+                                           int(P))
+        if messages or moved:
+            rows.append((messages / t, moved / t))
+            times.append(1.0)
+    if not times:
+        raise ValueError("No microbenchmark timings with P > 1 to fit "
+                         "alpha and beta to")
+    return _fit_alpha_beta(np.array(rows), np.array(times))
+
+
+def compute_config(run):
+    """
+    Return the (method, backend, n_workers) key of a run's gamma.
+
+    Args:
+        run: Row dictionary from load_runs (or a DataFrame record)
+
+    Returns:
+        tuple of (strategy name, local backend, worker count), or None
+        for methods outside the model
+    """
+    method = METHOD_NAMES.get(run.get('method'))
+    if method is None:
+        return None
+    backend = run.get('backend')
+    if not isinstance(backend, str) or not backend:
+        backend = 'processes'
+    n_workers = int(_number(run.get('n_workers')) or 1)
+    return method, backend, n_workers
+
+
+def measured_phases(run):
+    """
+    Return the measured time of the modelled phases of one run.
+
+    Args:
+        run: Row dictionary from load_runs (or a DataFrame record)
+
+    Returns:
+        Sum of the MODEL_PHASES timings in seconds, None if one is missing
+    """
+    times = [_number(run.get(f'{phase}_time')) for phase in MODEL_PHASES]
+    return None if None in times else sum(times)
+
+
+def _is_plain(run):
+    """Return True for runs without pipelining, streaming or shared B."""
+    for key in ('pipeline_panels', 'stream_chunks', 'shared_b',
+                'hierarchical'):
+        if _number(run.get(key)) not in (None, 0.0):
+            return False
+    return run.get('generation') in (None, '', 'root')
+
+
+def fit_model(runs, microbench=None):
+    """
+    Fit alpha, beta and gamma to measured runs.
+
+    gamma is fitted separately for every (method, backend, n_workers)
+    configuration (see compute_config), so runs with a different local
+    backend or worker count do not blend into one rate.
+
+    Args:
+        runs: Row dictionaries from load_runs (or DataFrame records)
+        microbench: Records from load_microbench to fit alpha and beta to
+            instead of the runs' communication phases
+
+    Returns:
+        Dictionary with alpha (s), beta (s/byte), gamma
+        ((method, backend, n_workers) -> s/flop) and n_samples (number of timings used)
+
+    Raises:
+        ValueError: if there are no usable runs
+    """
+    comm_rows, comm_times = [], []
+    flops, compute_times = {}, {}
+    for run in runs:
+        config = compute_config(run)
+        N = _number(run.get('matrix_size'))
+        P = _number(run.get('n_processes'))
+        if config is None or not N or not P:
+            continue
+        method = config[0]
+        if method == 'cannon' and math.isqrt(int(P)) ** 2 != int(P):
+            continue
+        width = _number(run.get('panel_width')) or DEFAULT_PANEL_WIDTH
+        terms = phase_terms(method, int(N), int(P), int(width))
+
+        compute_time = _number(run.get('compute_time'))
+        if compute_time is not None:
+            flops.setdefault(config, []).append(terms['compute'][2])
+            compute_times.setdefault(config, []).append(compute_time)
+
+        if not _is_plain(run):
+            continue
+        for phase in ('scatter', 'broadcast', 'gather'):
+            t = _number(run.get(f'{phase}_time'))
+            messages, nbytes, _ = terms[phase]
+            if t is not None and (messages or nbytes):
+                comm_rows.append((messages, nbytes))
+                comm_times.append(t)
+
+    if not compute_times:
+        raise ValueError("No runs with compute timings to fit the model to")
+
+    if microbench is not None:
+        alpha, beta = fit_microbench(microbench)
+        n_comm = len(microbench)
+    else:
+        X = np.array(comm_rows, dtype=float).reshape(-1, 2)
+        alpha, beta = _fit_alpha_beta(X, np.array(comm_times, dtype=float))
+        n_comm = len(comm_times)
+    gamma = {}
+    for config, x in flops.items():
+        x = np.array(x)
+        y = np.array(compute_times[config])
+        gamma[config] = float(x @ y / (x @ x)) if x @ x > 0 else 0.0
+    return {'alpha': alpha, 'beta': beta, 'gamma': gamma,
+            'n_samples': n_comm + sum(map(len, flops.values()))}
+
+
+def _fit_alpha_beta(X, y):
+    """Fit y = alpha * messages + beta * bytes with alpha, beta >= 0."""
+    if len(y) == 0:
+        return 0.0, 0.0
+    # Scale the columns so the solve is well conditioned
+    scale = np.where(X.max(axis=0) > 0, X.max(axis=0), 1.0)
+    coef, *_ = np.linalg.lstsq(X / scale, y, rcond=None)
+    alpha, beta = coef / scale
+    if alpha >= 0 and beta >= 0:
+        return float(alpha), float(beta)
+    # One term alone (through the origin) when the joint fit is negative
+    fits = []
+    for column in range(2):
+        x = X[:, column]
+        if x @ x > 0:
+            c = max(0.0, float(x @ y / (x @ x)))
+            fits.append((np.sum((y - c * x) ** 2), column, c))
+    if not fits:
+        return 0.0, 0.0
+    _, column, c = min(fits)
+    return (c, 0.0) if column == 0 else (0.0, c)
+
+
+def predict(model, method, N, P, panel_width=DEFAULT_PANEL_WIDTH,
+            backend='processes', n_workers=1):
+    """
+    Predict the phase times of one run.
+
+    Args:
+        model: Fitted model from fit_model
+        method: 'row', 'block' or 'cannon'
+        N: Matrix dimension
+        P: Number of MPI processes
+        panel_width: SUMMA panel width (block only)
+        backend: Local backend whose gamma to use
+        n_workers: Local worker count whose gamma to use
+
+    Returns:
+        Dictionary with the time of each of MODEL_PHASES and 'total'
+        (None for configurations without compute data)
+    """
+    gamma = model['gamma'].get((method, backend, n_workers))
+    if gamma is None:
+        return None
+    times = {}
+    for phase, (messages, nbytes, flops) in phase_terms(method, N, P,
+                                                        panel_width).items():
+        times[phase] = (model['alpha'] * messages + model['beta'] * nbytes
+                        + gamma * flops)
+    times['total'] = sum(times.values())
+    return times
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='Fit the alpha-beta-gamma model to the results and '
+                    'predict other (N, P)'
+    )
+    parser.add_argument('--results-dir', default=None,
+                        help='Directory of the results CSV files '
+                             '(default: results/)')
+    parser.add_argument('--N', default=None,
+                        help='Comma-separated matrix sizes to predict '
+                             '(default: the measured ones)')
+    parser.add_argument('--P', default=None,
+                        help='Comma-separated process counts to predict '
+                             '(default: the measured ones)')
+    parser.add_argument('--panel', type=int, default=DEFAULT_PANEL_WIDTH,
+                        help='SUMMA panel width for block predictions '
+                             f'(default: {DEFAULT_PANEL_WIDTH})')
+    parser.add_argument('--microbench', default=None,
+                        help='Fit alpha and beta to this mpi_microbench.py '
+                             'CSV instead of the runs')
+
+    args = parser.parse_args()
+
+    try:
+        runs = load_runs(args.results_dir)
+        microbench = load_microbench(args.microbench) if args.microbench else None
+        model = fit_model(runs, microbench)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+
+    sizes = ([int(n) for n in args.N.split(',')] if args.N else
+             sorted({int(_number(r['matrix_size'])) for r in runs}))
+    counts = ([int(p) for p in args.P.split(',')] if args.P else
+              sorted({int(_number(r['n_processes'])) for r in runs}))
+
+    print(f"\n{'='*92}")
+    print("  ALPHA-BETA-GAMMA MODEL")
+    print(f"{'='*92}")
+    print(f"  {'Latency (alpha):':<34}{model['alpha']*1e6:.2f} us")
+    bandwidth = 1 / model['beta'] / 1e9 if model['beta'] > 0 else float('inf')
+    print(f"  {'Bandwidth (1/beta):':<34}{bandwidth:.3f} GB/s")
+    for (method, backend, n_workers), gamma in sorted(model['gamma'].items()):
+        rate = 1 / gamma / 1e9 if gamma > 0 else float('inf')
+        label = f"Compute ({method}, {backend} x{n_workers}):"
+        print(f"  {label:<34}{rate:.2f} GFLOP/s per rank")
+    print(f"  {'Samples:':<34}{model['n_samples']}")
+    print(f"{'-'*92}")
+    print(f"  {'Method':<22}{'N':>8}{'P':>6}{'Scatter':>11}{'Bcast':>11}"
+          f"{'Compute':>11}{'Gather':>11}{'Total':>11}")
+    for method, backend, n_workers in sorted(model['gamma']):
+        label = f"{method}, {backend} x{n_workers}"
+        for N in sizes:
+            for P in counts:
+                if method == 'cannon' and math.isqrt(P) ** 2 != P:
+                    continue
+                t = predict(model, method, N, P, args.panel, backend,
+                            n_workers)
+                print(f"  {label:<22}{N:>8}{P:>6}{t['scatter']:>11.4f}"
+                      f"{t['broadcast']:>11.4f}{t['compute']:>11.4f}"
+                      f"{t['gather']:>11.4f}{t['total']:>11.4f}")
+    print(f"{'='*92}\n")
+
+
+if __name__ == '__main__':
+    main()
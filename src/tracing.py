@@ -0,0 +1,155 @@
+"""
+Timeline tracing of phase events in the Chrome trace format.
+
+Phases are timed with utils.now() anyway; when tracing is enabled, the
+begin/end timestamps are also kept as events on this rank (local worker
+chunks on one track per worker). write_trace aligns the clocks of all
+ranks, gathers the events on rank 0 and writes a trace.json that can be
+opened in chrome://tracing or https://ui.perfetto.dev, with one process
+per rank and one thread per track.
+
+When tracing is disabled, record() returns immediately, so the call
+sites cost one function call per phase.
+"""
+
+import json
+
+from utils import now
+
+
+# Events of this rank: (name, category, track, start, end, args)
+_events = []
+_enabled = False
+
+
+def enable(enabled=True):
+    """
+    Turn event recording on or off (off by default).
+
+    Args:
+        enabled: True to record events
+    """
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_enabled():
+    """Return True if events are being recorded."""
+    return _enabled
+
+
+def clear():
+    """Drop all events recorded so far."""
+    del _events[:]
+
+
+def record(name, start, end=None, category='phase', track='main', **args):
+    """
+    Record one complete event (no-op while tracing is disabled).
+
+    Args:
+        name: Event name shown in the timeline
+        start: Begin timestamp from utils.now()
+        end: End timestamp (default: now)
+        category: Event category ('phase', 'mpi', 'compute', 'worker',
+            'pool', ...)
+        track: Timeline row within the rank ('main', 'mpi', 'worker 3', ...)
+        **args: Extra values shown with the event
+    """
+    if not _enabled:
+        return
+    _events.append((name, category, track, start,
+                    now() if end is None else end, args))
+
+
+def record_workers(spans, category='worker'):
+    """
+    Record the chunks computed by local workers, one track per worker.
+
+    Args:
+        spans: Iterable of (worker_id, start, end, rows) returned by the
+            worker tasks; timestamps of worker processes come from the same
+            monotonic clock as the rank's
+    """
+    if not _enabled:
+        return
+    for worker, start, end, rows in spans:
+        _events.append((f'rows {rows[0]}-{rows[1]}', category,
+                        f'worker {worker}', start, end,
+                        {'rows': rows[1] - rows[0]}))
+
+
+def clock_offset(comm, rounds=5):
+    """
+    Estimate this rank's clock offset relative to rank 0 (collective).
+
+    All ranks leave a barrier at nearly the same moment; the difference
+    between rank 0's and this rank's timestamp right after it is taken
+    over a few rounds, and the median is used.
+
+    Args:
+        comm: MPI communicator
+        rounds: Number of barrier rounds
+
+    Returns:
+        Seconds to add to this rank's timestamps
+    """
+    offsets = []
+    for _ in range(rounds):
+        comm.Barrier()
+        t = now()
+        t_root = comm.bcast(t, root=0)
+        offsets.append(t_root - t)
+    offsets.sort()
+    return offsets[len(offsets) // 2]
+
+
+def write_trace(comm, path):
+    """
+    Gather the events of all ranks and write them as a Chrome trace.
+
+    Collective: every rank must call it, also with tracing disabled (an
+    empty trace is written then).
+
+    Args:
+        comm: MPI communicator
+        path: Output .json file, written by rank 0
+
+    Returns:
+        Number of events written (on rank 0, None elsewhere)
+    """
+    from mpi4py import MPI
+
+    offset = clock_offset(comm)
+    local = [(name, category, track, start + offset, end + offset, args)
+             for name, category, track, start, end, args in _events]
+    host = MPI.Get_processor_name()
+    gathered = comm.gather((host, local), root=0)
+    if gathered is None:
+        return None
+
+    starts = [event[3] for _, events in gathered for event in events]
+    t0 = min(starts) if starts else 0.0
+
+    trace = []
+    for rank, (host, events) in enumerate(gathered):
+        trace.append({'name': 'process_name', 'ph': 'M', 'pid': rank,
+                      'args': {'name': f'Rank {rank} ({host})'}})
+        trace.append({'name': 'process_sort_index', 'ph': 'M', 'pid': rank,
+                      'args': {'sort_index': rank}})
+        tracks = {'main': 0, 'mpi': 1}
+        for event in events:
+            tracks.setdefault(event[2], len(tracks))
+        for track, tid in tracks.items():
+            trace.append({'name': 'thread_name', 'ph': 'M', 'pid': rank,
+                          'tid': tid, 'args': {'name': track}})
+        for name, category, track, start, end, args in events:
+            trace.append({'name': name, 'cat': category, 'ph': 'X',
+                          'pid': rank, 'tid': tracks[track],
+                          'ts': (start - t0) * 1e6,
+                          'dur': max(0.0, end - start) * 1e6,
+                          'args': args})
+
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+    return sum(len(events) for _, events in gathered)
@@ -1,126 +1,1189 @@
 """
 Utility functions for hybrid parallel matrix multiplication.
-Provides timing helpers and multiprocessing-based local computation.
+Provides timing helpers and process/thread/BLAS-based local computation.
 """
 
+import atexit
+import contextlib
+import hashlib
+import os
+import platform
 import time
 import numpy as np
-from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool, resource_tracker, shared_memory
 from functools import partial
 
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+
+# Local compute backends (--backend)
+BACKENDS = ('processes', 'threads', 'blas')
+
+# Environment variables read by the common BLAS/OpenMP runtimes
+_BLAS_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                  'BLIS_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS')
+
+# Persistent per-rank worker pool, see start_worker_pool
+_worker_pool = None
+_worker_pool_key = None
+
+# Persistent per-rank thread pool, see start_thread_pool
+_thread_pool = None
+_thread_pool_size = 0
+
+# Per-rank shared-memory workspace, see shared_buffer
+_shared_workspace = {}
+_retired_blocks = []
+
+# Blocks attached inside worker processes, keyed by role
+_attached_blocks = {}
+
+# Barrier before every timed phase, see set_phase_barriers
+_phase_barriers = False
+
+# Measured dgemm rates, see measure_peak_gflops
+_peak_gflops_cache = {}
+
+# Local work split of parallel_matmul_local, see set_local_tuning
+_min_rows_per_worker = 10
+_chunks_per_worker = 1
+
 
 def now():
     """Return high-resolution timestamp for timing measurements."""
     return time.perf_counter()
 
 
+def set_phase_barriers(enabled):
+    """
+    Enable or disable a barrier before every timed phase.
+
+    With barriers, each phase starts on all ranks at the same time, so
+    its timing does not include waiting for stragglers of the previous
+    phase. Used by the benchmark harness; off by default.
+
+    Args:
+        enabled: True to synchronise ranks before each phase
+    """
+    global _phase_barriers
+    _phase_barriers = bool(enabled)
+
+
+def set_local_tuning(min_rows_per_worker=10, chunks_per_worker=1):
+    """
+    Set how parallel_matmul_local splits work between local workers.
+
+    The defaults are the built-in values; the auto-tuner replaces them
+    with measured ones (see autotune.py).
+
+    Args:
+        min_rows_per_worker: Below this many rows per worker the product
+            is computed directly, without the workers
+        chunks_per_worker: Number of row chunks handed to each worker
+    """
+    global _min_rows_per_worker, _chunks_per_worker
+    _min_rows_per_worker = max(0, int(min_rows_per_worker))
+    _chunks_per_worker = max(1, int(chunks_per_worker))
+
+
+@contextlib.contextmanager
+def local_tuning(min_rows_per_worker=10, chunks_per_worker=1):
+    """
+    Apply a local work split for the duration of a with block.
+
+    The previous split is restored on exit, so a tuned job does not
+    change the split of the jobs that follow it in the same process.
+
+    Args:
+        min_rows_per_worker: See set_local_tuning
+        chunks_per_worker: See set_local_tuning
+    """
+    previous = (_min_rows_per_worker, _chunks_per_worker)
+    set_local_tuning(min_rows_per_worker, chunks_per_worker)
+    try:
+        yield
+    finally:
+        set_local_tuning(*previous)
+
+
+def phase_start(comm):
+    """
+    Return the start timestamp of a timed phase.
+
+    Args:
+        comm: Communicator taking part in the phase
+
+    Returns:
+        now(), taken after a barrier if phase barriers are enabled
+    """
+    if _phase_barriers:
+        comm.Barrier()
+    return now()
+
+
+def ranks_per_node(comm):
+    """
+    Return the number of MPI ranks sharing this rank's node.
+
+    Args:
+        comm: MPI communicator
+
+    Returns:
+        Size of the node-local (COMM_TYPE_SHARED) communicator
+    """
+    from mpi4py import MPI
+
+    node_comm = comm.Split_type(MPI.COMM_TYPE_SHARED)
+    size = node_comm.Get_size()
+    node_comm.Free()
+    return size
+
+
+def _cpu_model():
+    """Return the CPU model name of this host."""
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def host_fingerprint(comm):
+    """
+    Identify the machines the job runs on (collective).
+
+    Args:
+        comm: MPI communicator
+
+    Returns:
+        Short hex digest of the sorted (host, CPU model, core count) of
+        all nodes, identical on every rank
+    """
+    from mpi4py import MPI
+
+    entry = (MPI.Get_processor_name(), _cpu_model(), os.cpu_count() or 1)
+    hosts = sorted(set(comm.allgather(entry)))
+    return hashlib.sha1(repr(hosts).encode()).hexdigest()[:12]
+
+
+def cores_per_rank(local_ranks):
+    """
+    Return the number of cores this rank may use.
+
+    If the launcher bound the rank to a subset of cores, that subset is
+    used as is; otherwise the node's cores are split evenly between the
+    ranks on the node.
+
+    Args:
+        local_ranks: Number of MPI ranks on this node
+
+    Returns:
+        Number of cores (at least 1)
+    """
+    total = os.cpu_count() or 1
+    try:
+        allowed = len(os.sched_getaffinity(0))
+    except AttributeError:
+        allowed = total
+    if allowed < total:
+        return max(1, allowed)
+    return max(1, total // max(1, local_ranks))
+
+
+def set_blas_threads(n_threads):
+    """
+    Limit the BLAS thread pool of this process to n_threads.
+
+    Uses threadpoolctl when it is installed. The environment variables
+    are set as well so that BLAS libraries loaded later (for example in
+    spawned worker processes) pick the limit up.
+
+    Args:
+        n_threads: Number of BLAS threads
+
+    Returns:
+        True if the limit was applied to the already loaded BLAS, False
+        without threadpoolctl (numpy's BLAS has read its thread count
+        by then, so the environment variables alone have no effect)
+    """
+    for var in _BLAS_ENV_VARS:
+        os.environ[var] = str(n_threads)
+    if threadpool_limits is None:
+        return False
+    threadpool_limits(limits=n_threads, user_api='blas')
+    return True
+
+
+def _worker_ready(_):
+    """No-op task used to make sure pool workers are up."""
+    return None
+
+
+def start_worker_pool(n_workers, blas_threads=None):
+    """
+    Start the persistent worker pool of this rank if it is not running.
+
+    The pool is created once and reused by every later call of
+    parallel_matmul_local, so its start-up cost is paid only once and
+    can be reported separately from compute time. A pool of a different
+    size or BLAS thread count is replaced.
+
+    Args:
+        n_workers: Number of worker processes
+        blas_threads: BLAS threads per worker (None leaves the default)
+
+    Returns:
+        Start-up time in seconds (0.0 if the pool was already running)
+    """
+    from tracing import record
+
+    global _worker_pool, _worker_pool_key
+
+    if n_workers <= 1:
+        return 0.0
+    if _worker_pool is not None and _worker_pool_key == (n_workers, blas_threads):
+        return 0.0
+
+    shutdown_worker_pool()
+
+    t_start = now()
+    if os.name == 'posix':
+        # Workers must share this rank's tracker for the shared-memory
+        # workspace, otherwise each one reports the segments as leaked
+        resource_tracker.ensure_running()
+    if blas_threads is None:
+        _worker_pool = Pool(processes=n_workers)
+    else:
+        # Set before the pool starts so spawned workers inherit it
+        set_blas_threads(blas_threads)
+        _worker_pool = Pool(processes=n_workers, initializer=set_blas_threads,
+                            initargs=(blas_threads,))
+    _worker_pool_key = (n_workers, blas_threads)
+    # Wait until the workers can actually run tasks
+    _worker_pool.map(_worker_ready, range(n_workers))
+    t_end = now()
+    record('pool start-up', t_start, t_end, category='pool',
+           workers=n_workers)
+    return t_end - t_start
+
+
+def get_worker_pool(n_workers):
+    """
+    Return the persistent worker pool, starting it if needed.
+
+    Args:
+        n_workers: Number of worker processes
+
+    Returns:
+        multiprocessing.Pool instance
+    """
+    if _worker_pool is None or _worker_pool_key[0] != n_workers:
+        start_worker_pool(n_workers)
+    return _worker_pool
+
+
+def shutdown_worker_pool():
+    """Terminate the persistent worker pool (registered with atexit)."""
+    global _worker_pool, _worker_pool_key
+
+    if _worker_pool is not None:
+        _worker_pool.terminate()
+        _worker_pool.join()
+        _worker_pool = None
+        _worker_pool_key = None
+
+
+atexit.register(shutdown_worker_pool)
+
+
+def start_thread_pool(n_workers):
+    """
+    Start the persistent thread pool of this rank if it is not running.
+
+    Args:
+        n_workers: Number of threads
+
+    Returns:
+        Start-up time in seconds (0.0 if the pool was already running)
+    """
+    from tracing import record
+
+    global _thread_pool, _thread_pool_size
+
+    if n_workers <= 1:
+        return 0.0
+    if _thread_pool is not None and _thread_pool_size == n_workers:
+        return 0.0
+
+    shutdown_thread_pool()
+
+    t_start = now()
+    _thread_pool = ThreadPoolExecutor(max_workers=n_workers)
+    _thread_pool_size = n_workers
+    list(_thread_pool.map(_worker_ready, range(n_workers)))
+    t_end = now()
+    record('pool start-up', t_start, t_end, category='pool',
+           workers=n_workers)
+    return t_end - t_start
+
+
+def shutdown_thread_pool():
+    """Shut the persistent thread pool down (registered with atexit)."""
+    global _thread_pool, _thread_pool_size
+
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=True)
+        _thread_pool = None
+        _thread_pool_size = 0
+
+
+atexit.register(shutdown_thread_pool)
+
+
+def configure_local_compute(backend, n_workers, local_ranks=1):
+    """
+    Prepare the local compute backend of this rank.
+
+    The BLAS thread pool is sized from the cores available to the rank so
+    that ranks × workers × BLAS threads does not oversubscribe the node:
+    'processes' and 'threads' give each worker cores/n_workers BLAS
+    threads, 'blas' gives a single np.dot all cores of the rank.
+
+    Args:
+        backend: One of BACKENDS
+        n_workers: Number of local workers (ignored by 'blas')
+        local_ranks: Number of MPI ranks on this node
+
+    Returns:
+        tuple of (pool_startup_time, blas_threads); blas_threads is None
+        when the limit could not be applied (see set_blas_threads)
+
+    Raises:
+        ValueError: if backend is unknown
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+
+    cores = cores_per_rank(local_ranks)
+    if backend == 'blas':
+        applied = set_blas_threads(cores)
+        return 0.0, cores if applied else None
+
+    blas_threads = max(1, cores // max(1, n_workers))
+    applied = set_blas_threads(blas_threads)
+    if backend == 'threads':
+        startup_time = start_thread_pool(n_workers)
+    else:
+        startup_time = start_worker_pool(n_workers, blas_threads)
+    return startup_time, blas_threads if applied else None
+
+
+class SharedBlock:
+    """
+    Flat float64 buffer in a multiprocessing.shared_memory segment.
+
+    The creating process owns the segment and unlinks it on close;
+    worker processes attach to it by name.
+    """
+
+    def __init__(self, size, name=None):
+        create = name is None
+        nbytes = max(1, size) * 8 if create else 0
+        self.shm = shared_memory.SharedMemory(name=name, create=create,
+                                              size=nbytes)
+        self.owner = create
+        self.size = size
+        self.flat = np.ndarray((size,), dtype=np.float64, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        """Name other processes use to attach to the segment."""
+        return self.shm.name
+
+    def view(self, shape):
+        """Return the leading part of the block as an array of shape."""
+        count = int(np.prod(shape))
+        return self.flat[:count].reshape(shape)
+
+    def close(self):
+        """
+        Detach from (and, for the owner, unlink) the segment.
+
+        Returns:
+            True if the mapping was released, False if views handed out
+            earlier are still alive and the close has to be retried
+        """
+        self.flat = None
+        if self.owner and self.shm is not None:
+            self.shm.unlink()
+            self.owner = False
+        try:
+            self.shm.close()
+        except BufferError:
+            return False
+        return True
+
+
+def shared_buffer(role, shape):
+    """
+    Return a view of this rank's persistent shared-memory buffer for a role.
+
+    There is one block per role ('A', 'B' or 'C'). It grows when a larger
+    shape is requested and is otherwise reused, so MPI receives can land
+    directly in memory the local workers read from. A view stays valid
+    until the same role is requested with a larger shape.
+
+    Args:
+        role: Buffer role, 'A', 'B' or 'C'
+        shape: Shape of the returned float64 array
+
+    Returns:
+        numpy array backed by shared memory
+    """
+    count = int(np.prod(shape))
+    block = _shared_workspace.get(role)
+    if block is None or block.size < count:
+        if block is not None and not block.close():
+            _retired_blocks.append(block)
+        block = SharedBlock(count)
+        _shared_workspace[role] = block
+    return block.view(shape)
+
+
+def local_buffer(role, shape, n_workers):
+    """
+    Allocate a receive buffer for local computation.
+
+    Uses the shared workspace when local workers will read it, and a
+    plain numpy array otherwise.
+
+    Args:
+        role: Buffer role, 'A', 'B' or 'C'
+        shape: Shape of the buffer
+        n_workers: Number of local worker processes
+
+    Returns:
+        numpy array of float64
+    """
+    if n_workers <= 1:
+        return np.empty(shape, dtype=np.float64)
+    return shared_buffer(role, shape)
+
+
+def release_shared_buffers():
+    """Unlink and close the shared workspace (registered with atexit)."""
+    for block in list(_shared_workspace.values()) + _retired_blocks:
+        block.close()
+    _shared_workspace.clear()
+    del _retired_blocks[:]
+
+
+atexit.register(release_shared_buffers)
+
+
+def in_shared_workspace(role, array):
+    """
+    Return whether an array is the start of the shared block of a role.
+
+    Such arrays (for example receive buffers from local_buffer) are read
+    by the worker processes in place; any other array is copied into the
+    block on every parallel_matmul_local call.
+    """
+    block = _shared_workspace.get(role)
+    return (block is not None and array.dtype == np.float64
+            and array.flags.c_contiguous and array.size <= block.size
+            and array.__array_interface__['data'][0]
+            == block.flat.__array_interface__['data'][0])
+
+
+def _stage_shared(role, array):
+    """
+    Place an array in the shared block of a role.
+
+    Arrays that already are the start of that block are used as they
+    are; anything else is copied once (see in_shared_workspace).
+    """
+    if in_shared_workspace(role, array):
+        return _shared_workspace[role]
+    shared_buffer(role, array.shape)[...] = array
+    return _shared_workspace[role]
+
+
+def _attach_block(role, name, size):
+    """Attach a worker process to a shared block, reusing the last one."""
+    block = _attached_blocks.get(role)
+    if block is None or block.name != name:
+        if block is not None:
+            block.close()
+        block = SharedBlock(size, name=name)
+        _attached_blocks[role] = block
+    return block
+
+
 def multiply_row_chunk(args):
     """
-    Multiply a chunk of rows from matrix A with full matrix B.
-    
+    Multiply a chunk of rows of A with B inside a worker process.
+
+    A, B and C live in shared memory; the worker attaches to them by name
+    and writes its rows of the product straight into C.
+
     Args:
-        args: tuple of (A_chunk, B, start_row, end_row)
-        
+        args: tuple of (a_spec, b_spec, c_spec, a_shape, b_shape,
+              start_row, end_row), each spec being (name, size)
+
     Returns:
-        Result matrix chunk
+        tuple of (worker pid, start, end, (start_row, end_row)) for tracing
     """
-    A_chunk, B = args
-    return np.dot(A_chunk, B)
+    a_spec, b_spec, c_spec, a_shape, b_shape, start, end = args
+    t_start = now()
+    A = _attach_block('A', *a_spec).view(a_shape)
+    B = _attach_block('B', *b_spec).view(b_shape)
+    C = _attach_block('C', *c_spec).view((a_shape[0], b_shape[1]))
+    np.dot(A[start:end], B, out=C[start:end])
+    return os.getpid(), t_start, now(), (start, end)
+
+
+def _dot_rows(args):
+    """Compute one row panel of the product in a worker thread."""
+    import threading
+
+    A_local, B, C_local, start, end = args
+    t_start = now()
+    np.dot(A_local[start:end], B, out=C_local[start:end])
+    return threading.current_thread().name, t_start, now(), (start, end)
 
 
-def parallel_matmul_local(A_local, B, n_workers):
+def parallel_matmul_local(A_local, B, n_workers, backend='processes'):
     """
-    Perform parallel matrix multiplication using multiprocessing.
+    Perform parallel matrix multiplication on the local backend.
     
-    Splits A_local into chunks and distributes to worker processes.
-    Each worker computes its chunk @ B.
+    With backend='blas' this is a single np.dot using the BLAS threads
+    set by configure_local_compute; with 'threads' row panels run on the
+    persistent thread pool (numpy releases the GIL inside dot). The
+    default 'processes' backend uses multiprocessing as described below.
+    
+    Splits A_local into chunks and distributes to the persistent worker
+    pool (see start_worker_pool). A_local, B and the result live in the
+    rank's shared-memory workspace, so workers attach to them by name
+    instead of receiving pickled copies, and each worker writes its
+    chunk @ B directly into the shared result.
+    
+    A_local and B are used in place when they were allocated with
+    local_buffer('A', ...) and local_buffer('B', ...); otherwise they
+    are copied into the workspace once.
     
     Args:
         A_local: Local portion of matrix A (rows × N)
         B: Full matrix B (N × N)
         n_workers: Number of worker processes
+        backend: Local compute backend, one of BACKENDS
         
     Returns:
-        Result matrix (rows × N)
+        Result matrix (rows × N). When worker processes were used this is a view
+        of the shared 'C' buffer, which the next call overwrites.
     """
-    if n_workers <= 1:
-        # No parallelism, just compute directly
+    from tracing import record_workers
+
+    if n_workers <= 1 or backend == 'blas':
+        # No worker parallelism, just compute directly
         return np.dot(A_local, B)
     
     rows = A_local.shape[0]
     if rows == 0:
         return A_local @ B
     
-    # For small workloads, don't use multiprocessing to avoid overhead
-    if rows < n_workers * 10:
+    # For small workloads, don't use workers to avoid overhead
+    if rows < n_workers * _min_rows_per_worker:
         return np.dot(A_local, B)
     
-    # Split rows among workers
-    chunk_size = max(1, rows // n_workers)
-    chunks = []
+    chunk_size = max(1, rows // (n_workers * _chunks_per_worker))
     
-    for i in range(0, rows, chunk_size):
-        end = min(i + chunk_size, rows)
-        chunks.append((A_local[i:end], B))
+    if backend == 'threads':
+        start_thread_pool(n_workers)
+        C_local = np.empty((rows, B.shape[1]), dtype=np.float64)
+        panels = [(A_local, B, C_local, i, min(i + chunk_size, rows))
+                  for i in range(0, rows, chunk_size)]
+        spans = list(_thread_pool.map(_dot_rows, panels))
+        record_workers(spans)
+        return C_local
     
     try:
-        # Use multiprocessing pool with error handling
-        with Pool(processes=n_workers) as pool:
-            results = pool.map(multiply_row_chunk, chunks)
+        # Stage operands and output in shared memory
+        a_block = _stage_shared('A', A_local)
+        b_block = _stage_shared('B', B)
+        C_local = shared_buffer('C', (rows, B.shape[1]))
+        c_block = _shared_workspace['C']
+        
+        # Split rows among workers
+        chunks = []
+        
+        for i in range(0, rows, chunk_size):
+            end = min(i + chunk_size, rows)
+            chunks.append(((a_block.name, a_block.size),
+                           (b_block.name, b_block.size),
+                           (c_block.name, c_block.size),
+                           A_local.shape, B.shape, i, end))
+        
+        # Use the persistent multiprocessing pool; rows land in C_local
+        pool = get_worker_pool(n_workers)
+        spans = pool.map(multiply_row_chunk, chunks)
+        record_workers(spans)
         
-        # Concatenate results
-        return np.vstack(results)
+        return C_local
     except Exception as e:
         # Fallback to serial computation if multiprocessing fails
         import warnings
         warnings.warn(f"Multiprocessing failed: {e}. Falling back to serial computation.")
+        shutdown_worker_pool()
         return np.dot(A_local, B)
 
 
-def create_test_matrices(N, seed=42):
+def _csr_rows(A, start, end):
+    """Return the indptr, indices and data of rows start:end of a CSR matrix."""
+    lo, hi = A.indptr[start], A.indptr[end]
+    return A.indptr[start:end + 1] - lo, A.indices[lo:hi], A.data[lo:hi]
+
+
+def multiply_sparse_chunk(args):
     """
-    Create test matrices A and B of size N×N.
+    Multiply a chunk of CSR rows of A with B inside a worker process.
+
+    The chunk's indptr, indices and data are passed with the task (their
+    size follows its nonzeros); B and C live in shared memory as in
+    multiply_row_chunk.
+
+    Args:
+        args: tuple of (indptr, indices, data, b_spec, c_spec, b_shape,
+              c_rows, start_row, end_row), each spec being (name, size)
+
+    Returns:
+        tuple of (worker pid, start, end, (start_row, end_row)) for tracing
+    """
+    from scipy.sparse import csr_matrix
+
+    indptr, indices, data, b_spec, c_spec, b_shape, c_rows, start, end = args
+    t_start = now()
+    B = _attach_block('B', *b_spec).view(b_shape)
+    C = _attach_block('C', *c_spec).view((c_rows, b_shape[1]))
+    A = csr_matrix((data, indices, indptr), shape=(end - start, b_shape[0]))
+    C[start:end] = A @ B
+    return os.getpid(), t_start, now(), (start, end)
+
+
+def _sparse_dot_rows(args):
+    """Compute one CSR row panel of the product in a worker thread."""
+    import threading
+
+    A_local, B, C_local, start, end = args
+    t_start = now()
+    C_local[start:end] = A_local[start:end] @ B
+    return threading.current_thread().name, t_start, now(), (start, end)
+
+
+def sparse_matmul_local(A_local, B, n_workers, backend='processes'):
+    """
+    Multiply local CSR rows of A with dense B on the local backend.
+
+    Like parallel_matmul_local, but the rows are split into chunks of
+    about equal nonzeros (distribute_nnz) rather than equal row counts.
+    Worker processes receive only their chunk's CSR arrays; B and the
+    result are staged in the shared-memory workspace.
+
+    Args:
+        A_local: Local rows of A as a scipy.sparse CSR matrix
+        B: Dense matrix B (N × N)
+        n_workers: Number of local workers
+        backend: Local compute backend, one of BACKENDS
+
+    Returns:
+        Dense result (rows × N). When worker processes were used this is
+        a view of the shared 'C' buffer, which the next call overwrites.
+    """
+    from tracing import record_workers
+
+    rows = A_local.shape[0]
+    if (n_workers <= 1 or backend == 'blas'
+            or rows < n_workers * _min_rows_per_worker):
+        return np.asarray(A_local @ B)
+
+    bounds = distribute_nnz(A_local.indptr, n_workers * _chunks_per_worker)
+    spans = [(int(start), int(end)) for start, end
+             in zip(bounds[:-1], bounds[1:]) if end > start]
+
+    if backend == 'threads':
+        start_thread_pool(n_workers)
+        C_local = np.empty((rows, B.shape[1]), dtype=np.float64)
+        panels = [(A_local, B, C_local, start, end) for start, end in spans]
+        record_workers(list(_thread_pool.map(_sparse_dot_rows, panels)))
+        return C_local
+
+    try:
+        b_block = _stage_shared('B', B)
+        C_local = shared_buffer('C', (rows, B.shape[1]))
+        c_block = _shared_workspace['C']
+        chunks = [_csr_rows(A_local, start, end)
+                  + ((b_block.name, b_block.size),
+                     (c_block.name, c_block.size), B.shape, rows, start, end)
+                  for start, end in spans]
+        pool = get_worker_pool(n_workers)
+        record_workers(pool.map(multiply_sparse_chunk, chunks))
+        return C_local
+    except Exception as e:
+        # Fallback to serial computation if multiprocessing fails
+        import warnings
+        warnings.warn(f"Multiprocessing failed: {e}. Falling back to serial computation.")
+        shutdown_worker_pool()
+        return np.asarray(A_local @ B)
+
+
+# Where the synthetic operands are generated (--generate)
+GENERATION_MODES = ('root', 'local')
+
+# Philox stream of each synthetic operand, see philox_block
+MATRIX_STREAMS = {'A': 0, 'B': 1}
+
+
+def _philox_fill(seed, stream, offset, out):
+    """Fill a contiguous 1D array with doubles offset.. of a Philox stream."""
+    bit_gen = np.random.Philox(key=[seed, stream])
+    # Every counter step yields four 64-bit words, one per double
+    bit_gen.advance(offset // 4)
+    gen = np.random.Generator(bit_gen)
+    if offset % 4:
+        gen.random(offset % 4)
+    gen.random(out=out)
+
+
+def philox_block(N, seed, stream, row_start, row_end, col_start=0,
+                 col_end=None, out=None):
+    """
+    Generate a block of a synthetic N×N matrix from a counter-based stream.
+
+    Element (i, j) is double number i*N + j of the Philox stream keyed by
+    (seed, stream), so any rank can generate any rows or tile on its own
+    and the result is bit-identical to generating the whole matrix at
+    once, for every process count. Only N, the row length, enters the
+    stream position, so rectangular matrices with N columns and any
+    number of rows are generated the same way.
+
+    Args:
+        N: Matrix dimension (number of columns)
+        seed: Random seed
+        stream: Stream id of the matrix (see MATRIX_STREAMS)
+        row_start: First row of the block
+        row_end: End row (exclusive)
+        col_start: First column of the block (default: 0)
+        col_end: End column, exclusive (default: N)
+        out: Optional float64 array of the block's shape to fill
+
+    Returns:
+        Block of shape (row_end - row_start, col_end - col_start)
+    """
+    if col_end is None:
+        col_end = N
+    shape = (row_end - row_start, col_end - col_start)
+    if out is None:
+        out = np.empty(shape, dtype=np.float64)
+
+    if col_start == 0 and col_end == N and out.flags.c_contiguous:
+        # Full rows are one contiguous run of the stream
+        _philox_fill(seed, stream, row_start * N, out.reshape(-1))
+    else:
+        for i in range(shape[0]):
+            _philox_fill(seed, stream, (row_start + i) * N + col_start, out[i])
+    return out
+
+
+def create_test_matrices(N, seed=42, generator='legacy', M=None, K=None):
+    """
+    Create test matrices A and B of size N×N (or M×K and K×N).
     
     Args:
-        N: Matrix dimension
+        N: Matrix dimension (columns of B)
         seed: Random seed for reproducibility
+        generator: 'legacy' (global np.random.seed) or 'philox', the
+            serial reference of the rank-local generation in philox_block
+        M: Rows of A (default: N)
+        K: Columns of A and rows of B (default: N)
         
     Returns:
         tuple of (A, B) matrices
     """
+    M = N if M is None else M
+    K = N if K is None else K
+    if generator == 'philox':
+        # philox_block only uses its N as the row length
+        A = philox_block(K, seed, MATRIX_STREAMS['A'], 0, M)
+        B = philox_block(N, seed, MATRIX_STREAMS['B'], 0, K)
+        return A, B
+    
     np.random.seed(seed)
-    A = np.random.rand(N, N).astype(np.float64)
-    B = np.random.rand(N, N).astype(np.float64)
+    A = np.random.rand(M, K).astype(np.float64)
+    B = np.random.rand(K, N).astype(np.float64)
     return A, B
 
 
-def save_results_to_csv(filepath, results):
+# Column order of the results CSV files
+CSV_FIELDNAMES = ['method', 'n_processes', 'n_workers', 'matrix_size', 
+                  'scatter_time', 'broadcast_time', 'compute_time', 
+                  'gather_time', 'communication_time', 'total_time',
+                  'pool_startup_time', 'backend', 'generation',
+                  'generation_time', 'pipeline_panels', 'overlap_efficiency',
+                  'stream_chunks', 'gather_hidden_time', 'shared_b',
+                  'b_node_mib', 'hierarchical', 'inter_node_time',
+                  'intra_node_time', 'warmup_runs', 'repetitions',
+                  'compute_imbalance', 'slowest_rank', 'panel_width',
+                  'density', 'nnz', 'matrix_m', 'matrix_k', 'split',
+                  'verified', 'verify_residual', 'verify_ratio',
+                  'verify_trials', 'verify_time', 'n_panels',
+                  'schedule_time', 'panels_min', 'panels_max']
+
+# Phases summarized by the benchmark harness, see summarize_timings
+BENCHMARK_PHASES = ('scatter', 'broadcast', 'compute', 'gather', 'total')
+BENCHMARK_STATS = ('median', 'min', 'std', 'ci95')
+CSV_FIELDNAMES += [f'{phase}_{stat}' for phase in BENCHMARK_PHASES
+                   for stat in BENCHMARK_STATS]
+
+# Derived throughput columns, see throughput_metrics
+THROUGHPUT_FIELDNAMES = ['gflops', 'peak_gflops', 'peak_percent',
+                         'scatter_bandwidth', 'broadcast_bandwidth',
+                         'gather_bandwidth', 'comm_bandwidth',
+                         'arithmetic_intensity']
+CSV_FIELDNAMES += THROUGHPUT_FIELDNAMES
+
+# Two-sided 95% Student t quantiles for 1..30 degrees of freedom
+_T95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262,
+        2.228, 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101,
+        2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052,
+        2.048, 2.045, 2.042)
+
+
+def summarize_timings(samples):
+    """
+    Summarize repeated measurements of one phase.
+
+    Args:
+        samples: List of timings in seconds
+
+    Returns:
+        Dictionary with median, min, std (sample standard deviation) and
+        ci95 (half-width of the 95% confidence interval of the mean)
+    """
+    import math
+    import statistics
+
+    n = len(samples)
+    std = statistics.stdev(samples) if n > 1 else 0.0
+    t = _T95[n - 2] if 1 < n <= len(_T95) + 1 else 1.960
+    return {
+        'median': statistics.median(samples),
+        'min': min(samples),
+        'std': std,
+        'ci95': t * std / math.sqrt(n) if n > 1 else 0.0,
+    }
+
+
+def measure_peak_gflops(comm, backend, n_workers, blas_threads, n=512,
+                        repeats=5):
+    """
+    Measure the attainable dgemm rate of all ranks together (collective).
+
+    Every rank times a few n×n np.dot calls with its BLAS thread setting
+    and scales the best rate by the number of workers running at once
+    ('processes' and 'threads'); the per-rank rates are summed. The result
+    is cached per configuration, so repeated runs measure only once.
+
+    Args:
+        comm: MPI communicator
+        backend: Local compute backend
+        n_workers: Number of local workers
+        blas_threads: BLAS threads per worker (already applied)
+        n: Matrix dimension of the probe
+        repeats: Number of timed probes (the fastest counts)
+
+    Returns:
+        Peak GFLOP/s of the communicator
+    """
+    from mpi4py import MPI
+
+    key = (comm.Get_size(), backend, n_workers, n)
+    if key not in _peak_gflops_cache:
+        rng = np.random.default_rng(0)
+        a = rng.random((n, n))
+        b = rng.random((n, n))
+        np.dot(a, b)
+        best = float('inf')
+        for _ in range(repeats):
+            t0 = now()
+            np.dot(a, b)
+            best = min(best, now() - t0)
+        concurrent = 1 if backend == 'blas' else n_workers
+        local = 2.0 * n ** 3 / max(best, 1e-9) / 1e9 * concurrent
+        _peak_gflops_cache[key] = comm.allreduce(local, op=MPI.SUM)
+    return _peak_gflops_cache[key]
+
+
+def throughput_metrics(N, times, phase_bytes, peak_gflops=None, flops=None):
+    """
+    Derive throughput metrics from the phase timings of one run.
+
+    Args:
+        N: Matrix dimension (the product costs 2N³ floating point operations)
+        times: Time per phase ('scatter', 'broadcast', 'compute', 'gather')
+        phase_bytes: Bytes moved per communication phase ('scatter',
+            'broadcast', 'gather'), summed over all ranks
+        peak_gflops: Attainable GFLOP/s of all ranks (optional)
+        flops: Floating point operations of the run, if not 2N³
+            (for example 2·nnz·N of a sparse product)
+
+    Returns:
+        Dictionary with the THROUGHPUT_FIELDNAMES; rates of phases that
+        moved no data or took no time are ''
+    """
+    def rate(amount, seconds):
+        return amount / seconds / 1e9 if amount and seconds > 0 else ''
+
+    if flops is None:
+        flops = 2.0 * N ** 3
+    metrics = {'gflops': rate(flops, times['compute'])}
+    metrics['peak_gflops'] = peak_gflops or ''
+    metrics['peak_percent'] = (100.0 * metrics['gflops'] / peak_gflops
+                               if metrics['gflops'] and peak_gflops else '')
+    for phase, nbytes in phase_bytes.items():
+        metrics[f'{phase}_bandwidth'] = rate(nbytes, times[phase])
+    comm_bytes = sum(phase_bytes.values())
+    metrics['comm_bandwidth'] = rate(comm_bytes, sum(times[phase] for phase
+                                                     in phase_bytes))
+    metrics['arithmetic_intensity'] = flops / comm_bytes if comm_bytes else ''
+    return metrics
+
+
+# Safety factor c of the rounding bound c · N · eps · |A| (|B| |R|) that
+# every entry of A (B R) - C R must stay within in freivalds_check
+VERIFY_TOLERANCE = 4.0
+
+
+def freivalds_check(comm, row_comm, col_comm, A_tile, B_tile, C_tile,
+                    row_bounds, col_start, trials=2, seed=0,
+                    tolerance=VERIFY_TOLERANCE, B_root=None):
+    """
+    Verify a distributed product C = A @ B with Freivalds' test (collective).
+
+    With R a random N × trials matrix (the same on every rank), A (B R)
+    is compared with C R entry by entry: each difference must stay within
+    tolerance · N · eps · (|A| (|B| |R|)), the rounding error that forming
+    C, B R and C R in floating point can explain. A global norm would
+    dilute a single wrong element as N grows; this bound does not. A, B
+    and C share one tile layout over a grid: row_comm links the ranks
+    holding the same rows, col_comm the ranks holding the same columns
+    (its rank being the grid row). B R and |B| |R| are assembled from the
+    B tiles, so every rank only multiplies its own tiles with thin
+    matrices: O(N²/P · trials) work per rank and O(N · trials)
+    communication. Row striping is the grid with one column
+    (row_comm = COMM_SELF, col_comm = comm).
+
+    Args:
+        comm: Communicator of all ranks
+        row_comm: Communicator of the ranks in this rank's grid row
+        col_comm: Communicator of the ranks in this rank's grid column
+        A_tile: Local tile of A
+        B_tile: Local tile of B, or None on every rank when the ranks do
+            not hold B in this layout (B R is then computed from B_root)
+        C_tile: Local tile of C
+        row_bounds: First row of every grid row, followed by N
+        col_start: First column of the local tiles
+        trials: Number of random vectors
+        seed: Random seed of R
+        tolerance: Safety factor c of the rounding bound
+        B_root: Full B on rank 0 when B_tile is None
+
+    Returns:
+        Dictionary with passed, residual (‖A B R - C R‖_F / ‖C R‖_F),
+        ratio (largest difference relative to its bound, at most 1 when
+        passed), trials and time (maximum over all ranks)
+    """
+    from mpi4py import MPI
+
+    t_start = now()
+    n = row_bounds[-1]
+    col_end = col_start + A_tile.shape[1]
+    R = np.random.default_rng(seed).standard_normal((n, trials))
+    R_local = R[col_start:col_end]
+
+    # [B R, |B| |R|] on every rank
+    BR = np.empty((n, 2 * trials), dtype=np.float64)
+    if B_tile is None:
+        if comm.Get_rank() == 0:
+            BR[:] = np.hstack([B_root @ R, np.abs(B_root) @ np.abs(R)])
+        comm.Bcast(BR, root=0)
+    else:
+        BR_partial = np.hstack([B_tile @ R_local,
+                                np.abs(B_tile) @ np.abs(R_local)])
+        BR_rows = np.empty_like(BR_partial)
+        row_comm.Allreduce(BR_partial, BR_rows, op=MPI.SUM)
+        bounds = np.asarray(row_bounds, dtype=np.int64)
+        col_comm.Allgatherv(BR_rows, [BR, np.diff(bounds) * 2 * trials,
+                                      bounds[:-1] * 2 * trials, MPI.DOUBLE])
+    BR_local = BR[col_start:col_end]
+
+    # Rows of A (B R) - C R, C R and |A| (|B| |R|), summed over the grid row
+    CR = C_tile @ R_local
+    sums_partial = np.hstack([A_tile @ BR_local[:, :trials] - CR, CR,
+                              np.abs(A_tile) @ BR_local[:, trials:]])
+    sums = np.empty_like(sums_partial)
+    row_comm.Allreduce(sums_partial, sums, op=MPI.SUM)
+    squares = np.zeros(2)
+    ratio = np.zeros(1)
+    if row_comm.Get_rank() == 0:
+        diff = np.abs(sums[:, :trials])
+        CR_rows = sums[:, trials:2 * trials]
+        bound = (tolerance * n * np.finfo(np.float64).eps
+                 * sums[:, 2 * trials:])
+        squares[:] = (np.sum(diff ** 2), np.sum(CR_rows ** 2))
+        if diff.size:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratios = np.where(diff > 0, diff / bound, 0.0)
+            # NaN or inf in the operands is never within the bound
+            ratios[np.isnan(diff) | np.isnan(ratios)] = np.inf
+            ratio[0] = np.max(ratios)
+    comm.Allreduce(MPI.IN_PLACE, squares, op=MPI.SUM)
+    comm.Allreduce(MPI.IN_PLACE, ratio, op=MPI.MAX)
+
+    residual = float(np.sqrt(squares[0]))
+    if squares[1] > 0:
+        residual /= float(np.sqrt(squares[1]))
+    return {
+        'passed': bool(ratio[0] <= 1.0),
+        'residual': residual,
+        'ratio': float(ratio[0]),
+        'trials': trials,
+        'time': comm.allreduce(now() - t_start, op=MPI.MAX),
+    }
+
+
+def verification_fields(verification):
+    """Return the CSV columns of a freivalds_check result."""
+    return {
+        'verified': int(verification['passed']),
+        'verify_residual': verification['residual'],
+        'verify_ratio': verification['ratio'],
+        'verify_trials': verification['trials'],
+        'verify_time': verification['time'],
+    }
+
+
+# Phases recorded for every rank, see gather_rank_timings
+RANK_PHASES = ('generation', 'scatter', 'broadcast', 'compute', 'gather',
+               'total')
+
+# Column order of the per-rank results CSV files (panels: row panels
+# claimed by the rank under dynamic scheduling)
+RANK_CSV_FIELDNAMES = (['method', 'n_processes', 'n_workers', 'matrix_size',
+                        'run_id', 'rank', 'host']
+                       + [f'{phase}_time' for phase in RANK_PHASES]
+                       + ['panels'])
+
+
+def gather_rank_timings(comm, timings):
+    """
+    Gather every rank's phase timings to rank 0 and summarize them.
+
+    Args:
+        comm: MPI communicator
+        timings: Dictionary of this rank's time per phase (RANK_PHASES)
+
+    Returns:
+        tuple of (rows, stats) on rank 0, (None, None) on other ranks.
+        rows holds one dictionary per rank (rank, host, <phase>_time);
+        stats maps every phase to its min, mean, max, imbalance (max/mean)
+        and slowest_rank.
+    """
+    from mpi4py import MPI
+
+    entry = {'rank': comm.Get_rank(), 'host': MPI.Get_processor_name()}
+    entry.update({f'{phase}_time': t for phase, t in timings.items()})
+    rows = comm.gather(entry, root=0)
+    if rows is None:
+        return None, None
+
+    stats = {}
+    for phase in timings:
+        values = [row[f'{phase}_time'] for row in rows]
+        mean = sum(values) / len(values)
+        slowest = max(range(len(values)), key=values.__getitem__)
+        stats[phase] = {
+            'min': min(values),
+            'mean': mean,
+            'max': values[slowest],
+            'imbalance': values[slowest] / mean if mean > 0 else 1.0,
+            'slowest_rank': slowest,
+        }
+    return rows, stats
+
+
+def save_rank_results_to_csv(filepath, rows, results):
+    """
+    Save the per-rank timings of one run to a CSV file.
+
+    Args:
+        filepath: Output CSV file path
+        rows: Per-rank rows from gather_rank_timings
+        results: The run's results record (method, sizes, ...)
+    """
+    run_id = time.strftime('%Y%m%d-%H%M%S-') + f'{time.time_ns() % 10**9:09d}'
+    common = {key: results[key] for key in ('method', 'n_processes',
+                                            'n_workers', 'matrix_size')}
+    save_results_to_csv(filepath, [dict(common, run_id=run_id, **row)
+                                   for row in rows],
+                        fieldnames=RANK_CSV_FIELDNAMES)
+
+
+def save_results_to_csv(filepath, results, fieldnames=None):
     """
     Save timing results to CSV file.
     
     Args:
         filepath: Output CSV file path
-        results: Dictionary containing timing metrics
+        results: Dictionary containing timing metrics, or a list of them
+        fieldnames: Column order (default: CSV_FIELDNAMES)
     """
     import csv
     
+    fieldnames = fieldnames or CSV_FIELDNAMES
+    rows = results if isinstance(results, list) else [results]
+    
     # Check if file exists to determine if we need headers
     try:
-        with open(filepath, 'r') as f:
-            file_exists = True
+        with open(filepath, 'r', newline='') as f:
+            reader = csv.DictReader(f)
+            existing_fields = reader.fieldnames
+            existing_rows = list(reader)
+        file_exists = True
     except FileNotFoundError:
         file_exists = False
     
+    # Rewrite files written with an older schema so columns stay aligned
+    if file_exists and existing_fields != fieldnames:
+        with open(filepath, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, restval='',
+                                    extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(existing_rows)
+    
     with open(filepath, 'a', newline='') as f:
-        fieldnames = ['method', 'n_processes', 'n_workers', 'matrix_size', 
-                      'scatter_time', 'broadcast_time', 'compute_time', 
-                      'gather_time', 'communication_time', 'total_time']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer = csv.DictWriter(f, fieldnames=fieldnames, restval='')
         
         if not file_exists:
             writer.writeheader()
         
-        writer.writerow(results)
+        writer.writerows(rows)
 
 
 def calculate_process_grid(P):
@@ -176,9 +1239,450 @@ def distribute_rows(N, P, rank):
     return start, end, count
 
 
+def distribute_nnz(indptr, P):
+    """
+    Calculate a row distribution with about equal nonzeros per part.
+
+    Used for sparse matrices instead of distribute_rows: each part ends at
+    the first row boundary where the running nonzero count reaches its
+    share. Without nonzeros the rows are split evenly.
+
+    Args:
+        indptr: CSR row pointer (length rows + 1)
+        P: Number of parts
+
+    Returns:
+        numpy int64 array of P + 1 row bounds; part r holds rows
+        bounds[r]:bounds[r + 1]
+    """
+    indptr = np.asarray(indptr)
+    rows = len(indptr) - 1
+    if indptr[-1] == 0:
+        return np.array([distribute_rows(rows, P, r)[0] for r in range(P)]
+                        + [rows], dtype=np.int64)
+    targets = indptr[-1] * np.arange(1, P) / P
+    inner = np.searchsorted(indptr, targets, side='left')
+    return np.concatenate(([0], inner, [rows])).astype(np.int64)
+
+
+def distribute_tile(N, pr, pc, row, col):
+    """
+    Calculate the tile owned by a process in a pr × pc grid.
+
+    Rows are split over the grid rows and columns over the grid columns,
+    both with the same rule as distribute_rows.
+
+    Args:
+        N: Matrix dimension
+        pr: Number of rows in the process grid
+        pc: Number of columns in the process grid
+        row: Grid row of the process
+        col: Grid column of the process
+
+    Returns:
+        tuple of (row_start, row_end, col_start, col_end)
+    """
+    r0, r1, _ = distribute_rows(N, pr, row)
+    c0, c1, _ = distribute_rows(N, pc, col)
+    return r0, r1, c0, c1
+
+
+def tile_counts(N, pr, pc):
+    """
+    Calculate Scatterv/Gatherv counts and displacements for packed tiles.
+
+    Args:
+        N: Matrix dimension
+        pr: Number of rows in the process grid
+        pc: Number of columns in the process grid
+
+    Returns:
+        tuple of (counts, displs) as int32 arrays in rank order
+    """
+    counts = np.empty(pr * pc, dtype=np.int32)
+    for r in range(pr * pc):
+        r0, r1, c0, c1 = distribute_tile(N, pr, pc, r // pc, r % pc)
+        counts[r] = (r1 - r0) * (c1 - c0)
+    displs = np.zeros(pr * pc, dtype=np.int32)
+    displs[1:] = np.cumsum(counts)[:-1]
+    return counts, displs
+
+
+def pack_tiles(M, pr, pc):
+    """
+    Pack the tiles of a matrix into one contiguous buffer for Scatterv.
+
+    Tiles are laid out in rank order of a row-major pr × pc grid
+    (rank = row * pc + col), each tile stored row-major.
+
+    Args:
+        M: Full matrix (N × N)
+        pr: Number of rows in the process grid
+        pc: Number of columns in the process grid
+
+    Returns:
+        tuple of (buffer, sendcounts, displs)
+    """
+    N = M.shape[0]
+    buffer = np.empty(M.size, dtype=np.float64)
+    sendcounts, displs = tile_counts(N, pr, pc)
+
+    for r in range(pr * pc):
+        r0, r1, c0, c1 = distribute_tile(N, pr, pc, r // pc, r % pc)
+        buffer[displs[r]:displs[r] + sendcounts[r]] = M[r0:r1, c0:c1].ravel()
+
+    return buffer, sendcounts, displs
+
+
+def unpack_tiles(buffer, N, pr, pc):
+    """
+    Rebuild a full matrix from a buffer produced by Gatherv of tiles.
+
+    Inverse of pack_tiles.
+
+    Args:
+        buffer: Packed tiles in rank order
+        N: Matrix dimension
+        pr: Number of rows in the process grid
+        pc: Number of columns in the process grid
+
+    Returns:
+        Full matrix (N × N)
+    """
+    M = np.empty((N, N), dtype=np.float64)
+
+    offset = 0
+    for r in range(pr * pc):
+        r0, r1, c0, c1 = distribute_tile(N, pr, pc, r // pc, r % pc)
+        count = (r1 - r0) * (c1 - c0)
+        M[r0:r1, c0:c1] = buffer[offset:offset + count].reshape(r1 - r0, c1 - c0)
+        offset += count
+
+    return M
+
+
+class StreamingGather:
+    """
+    Gather result chunks to rank 0 while they are still being computed.
+
+    Rank 0 posts one Irecv per (source rank, chunk) straight into the
+    chunk's final place in the result. Every rank sends a chunk with
+    Isend as soon as it is final, so the gather overlaps the remaining
+    computation; finish() waits for whatever is still outstanding. The
+    hidden time is measured on the sending ranks only: rank 0 posts its
+    receives before its own compute, so its in-flight time is mostly
+    that compute rather than overlapped transfer.
+    """
+
+    def __init__(self, comm, recv_views=None):
+        """
+        Args:
+            comm: MPI communicator (results are gathered to rank 0)
+            recv_views: On rank 0, list of (source, chunk, view) giving the
+                contiguous destination of every remote chunk
+        """
+        self.comm = comm
+        self.rank = comm.Get_rank()
+        self.requests = []
+        # Receives posted (root, for the trace) and first send (senders)
+        self.t_posted = now() if recv_views else None
+        self.t_first = None
+        for source, chunk, view in recv_views or []:
+            if source != self.rank:
+                self.requests.append(comm.Irecv(view, source=source, tag=chunk))
+
+    def send(self, chunk, data, root_view=None):
+        """
+        Hand a finished chunk over to rank 0.
+
+        Args:
+            chunk: Chunk index (used as message tag)
+            data: Contiguous chunk data; must stay unchanged until finish()
+            root_view: On rank 0, destination of its own chunk
+        """
+        if self.rank == 0:
+            root_view[...] = data.reshape(root_view.shape)
+        else:
+            if self.t_first is None:
+                self.t_first = now()
+            self.requests.append(self.comm.Isend(data, dest=0, tag=chunk))
+
+    def finish(self):
+        """
+        Wait for all outstanding chunks.
+
+        Returns:
+            tuple of (exposed_time, hidden_time): time spent waiting here,
+            and how much of the time since this rank's first send
+            overlapped compute (0 on rank 0)
+        """
+        from mpi4py import MPI
+
+        from tracing import record
+
+        t_wait_start = now()
+        MPI.Request.Waitall(self.requests)
+        t_wait_end = now()
+        self.requests = []
+        t_in_flight = self.t_first if self.t_first is not None else self.t_posted
+        if t_in_flight is not None:
+            record('gather in flight', t_in_flight, t_wait_end,
+                   category='mpi', track='mpi')
+
+        exposed_time = t_wait_end - t_wait_start
+        if self.t_first is None:
+            return exposed_time, 0.0
+        hidden_time = max(0.0, (t_wait_end - self.t_first) - exposed_time)
+        return exposed_time, hidden_time
+
+
+class NodeTopology:
+    """
+    Node-level view of a communicator.
+
+    node_comm links the ranks sharing one node (COMM_TYPE_SHARED), and
+    leader_comm links the first rank of every node (MPI.COMM_NULL on all
+    other ranks). Ranks keep their relative order in both, so rank 0 of
+    the parent communicator is rank 0 of its node and of the leaders.
+
+    scatterv, bcast and gatherv run in two stages rooted at rank 0: the
+    leaders exchange whole node slices across nodes, then the data fans
+    out (or in) over the node's shared memory. Each returns the time of
+    both levels as (inter_node_time, intra_node_time).
+    """
+
+    def __init__(self, comm):
+        from mpi4py import MPI
+
+        rank = comm.Get_rank()
+        self.comm = comm
+        self.node_comm = comm.Split_type(MPI.COMM_TYPE_SHARED, key=rank)
+        self.node_rank = self.node_comm.Get_rank()
+        self.node_size = self.node_comm.Get_size()
+        self.is_leader = self.node_rank == 0
+        self.leader_comm = comm.Split(0 if self.is_leader else MPI.UNDEFINED,
+                                      key=rank)
+        self.windows = []
+        # Node-shared staging arrays of the collectives, see _scratch
+        self.scratch = {}
+
+        # Parent ranks of this node and, on leaders, of every node
+        self.members = self.node_comm.allgather(rank)
+        if self.is_leader:
+            self.nodes = self.leader_comm.allgather(self.members)
+        else:
+            self.nodes = None
+
+    def _node_layout(self, counts):
+        """Return (node_counts, my_offset, node_totals, node_displs)."""
+        node_counts = [counts[r] for r in self.members]
+        offset = sum(node_counts[:self.node_rank])
+        if not self.is_leader:
+            return node_counts, offset, None, None
+        totals = [sum(counts[r] for r in node) for node in self.nodes]
+        displs = [sum(totals[:i]) for i in range(len(totals))]
+        return node_counts, offset, totals, displs
+
+    def _node_order(self, counts, displs):
+        """
+        Return the (offset, count) runs of a rank-ordered buffer in node
+        order, or None when the buffer already is in node order.
+        """
+        order = [r for node in self.nodes for r in node]
+        expected = 0
+        for r in order:
+            if displs[r] != expected:
+                return [(displs[r], counts[r]) for r in order]
+            expected += counts[r]
+        return None
+
+    def _scratch(self, name, shape):
+        """
+        Return the node-shared staging array of a collective.
+
+        The array is allocated on first use and reused by later calls of
+        the same collective and shape, so repeated calls do not pile up
+        shared windows. On reuse the node synchronises first, as ranks
+        may still be copying out the previous call's data.
+        """
+        key = (name, tuple(shape))
+        array = self.scratch.get(key)
+        if array is None:
+            array = self.shared_array(shape)
+            self.scratch[key] = array
+        else:
+            self.node_comm.Barrier()
+        return array
+
+    def scatterv(self, sendbuf, counts, displs, recvbuf):
+        """
+        Two-level Scatterv of a float64 buffer from rank 0.
+
+        Args:
+            sendbuf: Buffer to scatter (rank 0 only)
+            counts: Number of elements of every rank (all ranks)
+            displs: Offset of every rank's elements in sendbuf (all ranks)
+            recvbuf: Contiguous receive buffer
+
+        Returns:
+            tuple of (inter_node_time, intra_node_time)
+        """
+        from mpi4py import MPI
+
+        rank = self.comm.Get_rank()
+        node_counts, offset, totals, node_displs = self._node_layout(counts)
+        node_buf = self._scratch('scatterv', (sum(node_counts),))
+
+        t_start = now()
+        if self.is_leader:
+            packed = None
+            if rank == 0:
+                packed = sendbuf.reshape(-1)
+                runs = self._node_order(counts, displs)
+                if runs is not None:
+                    packed = np.concatenate([packed[d:d + c] for d, c in runs])
+            self.leader_comm.Scatterv([packed, totals, node_displs, MPI.DOUBLE],
+                                      node_buf, root=0)
+        self.node_comm.Barrier()
+        t_inter_end = now()
+
+        recvbuf.reshape(-1)[...] = node_buf[offset:offset + counts[rank]]
+        t_end = now()
+        return t_inter_end - t_start, t_end - t_inter_end
+
+    def bcast(self, buf):
+        """
+        Two-level Bcast of a float64 buffer from rank 0.
+
+        The leaders broadcast into a node-shared array, from which every
+        rank of the node copies its own buffer.
+
+        Args:
+            buf: Buffer to broadcast (filled on rank 0)
+
+        Returns:
+            tuple of (inter_node_time, intra_node_time)
+        """
+        node_buf = self._scratch('bcast', buf.shape)
+
+        t_start = now()
+        if self.is_leader:
+            if self.comm.Get_rank() == 0:
+                node_buf[...] = buf
+            self.leader_comm.Bcast(node_buf, root=0)
+        self.node_comm.Barrier()
+        t_inter_end = now()
+
+        buf[...] = node_buf
+        t_end = now()
+        return t_inter_end - t_start, t_end - t_inter_end
+
+    def gatherv(self, sendbuf, counts, displs, recvbuf):
+        """
+        Two-level Gatherv of a float64 buffer to rank 0.
+
+        Args:
+            sendbuf: Contiguous buffer of this rank's elements
+            counts: Number of elements of every rank (all ranks)
+            displs: Offset of every rank's elements in recvbuf (all ranks)
+            recvbuf: Receive buffer (rank 0 only)
+
+        Returns:
+            tuple of (inter_node_time, intra_node_time)
+        """
+        from mpi4py import MPI
+
+        rank = self.comm.Get_rank()
+        node_counts, offset, totals, node_displs = self._node_layout(counts)
+        node_buf = self._scratch('gatherv', (sum(node_counts),))
+
+        t_start = now()
+        node_buf[offset:offset + counts[rank]] = sendbuf.reshape(-1)
+        self.node_comm.Barrier()
+        t_intra_end = now()
+
+        if self.is_leader:
+            packed = None
+            runs = None
+            if rank == 0:
+                packed = recvbuf.reshape(-1)
+                runs = self._node_order(counts, displs)
+                if runs is not None:
+                    unpacked = packed
+                    packed = np.empty(sum(totals), dtype=np.float64)
+            self.leader_comm.Gatherv(node_buf,
+                                     [packed, totals, node_displs, MPI.DOUBLE],
+                                     root=0)
+            if runs is not None:
+                pos = 0
+                for d, c in runs:
+                    unpacked[d:d + c] = packed[pos:pos + c]
+                    pos += c
+        t_end = now()
+        return t_end - t_intra_end, t_intra_end - t_start
+
+    def shared_array(self, shape):
+        """
+        Allocate one float64 array per node in an MPI shared-memory window.
+
+        The node leader owns the memory; every local rank gets a numpy
+        view of the same buffer without copying.
+
+        Args:
+            shape: Array shape
+
+        Returns:
+            numpy array backed by the node's shared window
+        """
+        from mpi4py import MPI
+
+        itemsize = MPI.DOUBLE.Get_size()
+        nbytes = int(np.prod(shape)) * itemsize if self.is_leader else 0
+        win = MPI.Win.Allocate_shared(nbytes, itemsize, comm=self.node_comm)
+        buf, _ = win.Shared_query(0)
+        self.windows.append(win)
+        return np.ndarray(shape, dtype=np.float64, buffer=buf)
+
+    def bcast_shared(self, array):
+        """
+        Broadcast a node-shared array from rank 0 of the parent communicator.
+
+        Only the node leaders take part in the broadcast; the barrier
+        afterwards makes the data visible to the other ranks of each node.
+
+        Args:
+            array: Array returned by shared_array
+        """
+        from mpi4py import MPI
+
+        if self.leader_comm != MPI.COMM_NULL:
+            self.leader_comm.Bcast(array, root=0)
+        self.node_comm.Barrier()
+
+    def free(self):
+        """Release the shared windows and the communicators."""
+        from mpi4py import MPI
+
+        for win in self.windows:
+            win.Free()
+        self.windows = []
+        self.scratch = {}
+        if self.leader_comm != MPI.COMM_NULL:
+            self.leader_comm.Free()
+        self.node_comm.Free()
+
+
 def print_timing_summary(rank, method, n_processes, n_workers, N, 
                          scatter_time, broadcast_time, compute_time, 
-                         gather_time, total_time):
+                         gather_time, total_time, title=None,
+                         broadcast_label="Broadcast Time",
+                         pool_startup_time=0.0, backend=None,
+                         blas_threads=None, generation_time=None,
+                         overlap_efficiency=None, gather_hidden_time=None,
+                         b_node_mib=None, level_times=None,
+                         rank_stats=None, throughput=None, shape=None,
+                         verification=None, schedule_time=None,
+                         panel_counts=None):
     """
     Print formatted timing summary (only from rank 0).
     
@@ -193,23 +1697,116 @@ def print_timing_summary(rank, method, n_processes, n_workers, N,
         compute_time: Time for local computation
         gather_time: Time for gather operation
         total_time: Total execution time
+        title: Summary heading (default: "<method> STRIPING")
+        broadcast_label: Label of the broadcast line (e.g. "Shift Time")
+        pool_startup_time: Time to start the local worker pool
+        backend: Local compute backend (optional)
+        blas_threads: BLAS threads per worker (optional, None when they
+            could not be limited)
+        generation_time: Time to generate the input matrices (optional)
+        overlap_efficiency: Fraction of broadcast time hidden behind
+            computation by the pipelined mode (optional)
+        gather_hidden_time: Gather time overlapped with computation by
+            the streaming gather (optional)
+        b_node_mib: Memory held for B on the busiest node in MiB (optional)
+        level_times: (inter_node_time, intra_node_time) of the
+            hierarchical collectives (optional)
+        rank_stats: Per-phase load balance from gather_rank_timings
+            (optional)
+        throughput: Metrics from throughput_metrics (optional)
+        shape: (M, K, N) of a rectangular product (optional, default
+            N × N)
+        verification: Result of freivalds_check (optional)
+        schedule_time: Time spent claiming panels under dynamic
+            scheduling (optional)
+        panel_counts: Number of panels computed by every rank under
+            dynamic scheduling (optional)
     """
     if rank == 0:
         comm_time = scatter_time + broadcast_time + gather_time
         print(f"\n{'='*70}")
-        print(f"  {method} STRIPING - TIMING SUMMARY")
+        if title is None:
+            title = f"{method} STRIPING"
+        print(f"  {title} - TIMING SUMMARY")
         print(f"{'='*70}")
-        print(f"  Matrix Size:              {N} × {N}")
+        if shape is None:
+            print(f"  Matrix Size:              {N} × {N}")
+        else:
+            print(f"  Matrix Size:              {shape[0]} × {shape[1]} "
+                  f"by {shape[1]} × {shape[2]}")
         print(f"  MPI Processes:            {n_processes}")
         print(f"  Local Workers:            {n_workers}")
+        if backend is not None:
+            threads = (f"{blas_threads} BLAS threads" if blas_threads is not None
+                       else "BLAS threads unmanaged")
+            print(f"  Local Backend:            {backend} ({threads})")
         print(f"{'-'*70}")
+        if generation_time is not None:
+            print(f"  Generation Time:          {generation_time:.6f} s")
         print(f"  Scatter Time:             {scatter_time:.6f} s")
-        print(f"  Broadcast Time:           {broadcast_time:.6f} s")
+        print(f"  {broadcast_label + ':':<26}{broadcast_time:.6f} s")
         print(f"  Compute Time:             {compute_time:.6f} s")
         print(f"  Gather Time:              {gather_time:.6f} s")
+        if level_times is not None:
+            print(f"    Inter-node (leaders):   {level_times[0]:.6f} s")
+            print(f"    Intra-node (shared):    {level_times[1]:.6f} s")
+        if gather_hidden_time is not None:
+            print(f"  Gather Hidden Time:       {gather_hidden_time:.6f} s")
+        print(f"  Pool Startup Time:        {pool_startup_time:.6f} s")
+        if schedule_time is not None:
+            print(f"  Schedule Time:            {schedule_time:.6f} s")
+        if b_node_mib is not None:
+            print(f"  B Memory per Node:        {b_node_mib:.2f} MiB")
         print(f"{'-'*70}")
         print(f"  Total Communication Time: {comm_time:.6f} s")
         print(f"  Total Execution Time:     {total_time:.6f} s")
         print(f"  Compute/Total Ratio:      {(compute_time/total_time)*100:.2f}%")
         print(f"  Communication/Total:      {(comm_time/total_time)*100:.2f}%")
+        if overlap_efficiency is not None:
+            print(f"  Overlap Efficiency:       {overlap_efficiency*100:.2f}%")
+        if throughput is not None:
+            print(f"{'-'*70}")
+            line = "  Compute Rate:             "
+            if throughput['gflops'] != '':
+                line += f"{throughput['gflops']:.2f} GFLOP/s"
+                if throughput['peak_percent'] != '':
+                    line += (f" ({throughput['peak_percent']:.1f}% of "
+                             f"{throughput['peak_gflops']:.2f} peak)")
+            else:
+                line += "n/a"
+            print(line)
+            bw_label = broadcast_label.replace('Time', 'Bandwidth')
+            for label, key in (('Scatter Bandwidth', 'scatter_bandwidth'),
+                               (bw_label, 'broadcast_bandwidth'),
+                               ('Gather Bandwidth', 'gather_bandwidth'),
+                               ('Comm Bandwidth', 'comm_bandwidth')):
+                value = throughput.get(key, '')
+                if value != '':
+                    print(f"  {label + ':':<26}{value:.3f} GB/s")
+            if throughput['arithmetic_intensity'] != '':
+                print(f"  Arithmetic Intensity:     "
+                      f"{throughput['arithmetic_intensity']:.2f} flop/byte")
+        if verification is not None:
+            print(f"{'-'*70}")
+            status = 'PASS' if verification['passed'] else 'FAIL'
+            print(f"  Verification (Freivalds): {status}, residual "
+                  f"{verification['residual']:.3e}, "
+                  f"{verification['ratio']:.2e} of rounding bound "
+                  f"({verification['trials']} trials, "
+                  f"{verification['time']:.6f} s)")
+        if rank_stats is not None:
+            print(f"{'-'*70}")
+            print(f"  {'Load Balance':<14}{'Min':>11}{'Mean':>11}{'Max':>11}"
+                  f"{'Max/Mean':>10}{'Slowest':>9}")
+            for phase, st in rank_stats.items():
+                print(f"  {phase.capitalize():<14}{st['min']:>11.6f}"
+                      f"{st['mean']:>11.6f}{st['max']:>11.6f}"
+                      f"{st['imbalance']:>10.2f}{st['slowest_rank']:>9}")
+        if panel_counts is not None:
+            print(f"{'-'*70}")
+            print(f"  Panels per Rank:          {sum(panel_counts)} total, "
+                  f"min {min(panel_counts)}, max {max(panel_counts)}")
+            for i in range(0, len(panel_counts), 10):
+                print("    " + "  ".join(f"{r}:{count}" for r, count in
+                                         enumerate(panel_counts[i:i + 10], i)))
         print(f"{'='*70}\n")